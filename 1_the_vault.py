@@ -89,6 +89,18 @@ with hall_wilds:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+# The Oracle answers for every hall at once
+col_l, col_c, col_r = st.columns([1, 1, 1])
+with col_c:
+    st.page_link("pages/9_the_oracle.py", label="THE ORACLE", use_container_width=True)
+    st.markdown("<p class='door-caption'>Search Every Archive</p>", unsafe_allow_html=True)
+
+# The Conclave conjures for every hall at once
+col_l, col_c, col_r = st.columns([1, 1, 1])
+with col_c:
+    st.page_link("pages/10_the_conclave.py", label="THE CONCLAVE", use_container_width=True)
+    st.markdown("<p class='door-caption'>Conjure in Bulk</p>", unsafe_allow_html=True)
+
 # The Pitch stands alone
 col_l, col_c, col_r = st.columns([1, 1, 1])
 with col_c:
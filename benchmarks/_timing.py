@@ -0,0 +1,61 @@
+"""Shared helpers for the benchmark scripts.
+
+Run a benchmark from the repository root, e.g. `python -m benchmarks.bench_backends`.
+They need no credentials and no network: everything runs on the memory and
+SQLite backends, or on local stubs.
+"""
+import itertools
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+
+def timed(fn, repeat: int = 20) -> list:
+    """Runs fn `repeat` times and returns each run's wall time in seconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(label: str, samples: list):
+    """Prints the median and 95th percentile of a set of timings, in ms.
+    Returns the median, in seconds.
+    """
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    median = statistics.median(ordered)
+    print(f"{label:<48} median {median * 1000:9.3f} ms   p95 {p95 * 1000:9.3f} ms")
+    return median
+
+
+def rows(count: int, width: int, stamp: bool = True) -> list:
+    """count synthetic sheet rows of `width` cells, with distinct timestamps."""
+    return [
+        [f"cell {i}-{c}" for c in range(width - 1)]
+        + ([f"2024-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}"] if stamp else [f"v{i}"])
+        for i in range(count)
+    ]
+
+
+
+SYLLABLES = "an bel dor el fen gar hal ir jor kal lun mor nor os pyr quel ran sig tor ul vyr wen yr zal".split()
+# A Zipf-shaped vocabulary, as in real prose: a few words everywhere, most rare.
+# VOCABULARY is in rank order: VOCABULARY[0] is the commonest word.
+VOCABULARY = random.Random(0).sample(
+    sorted({a + b + c for a in SYLLABLES for b in SYLLABLES for c in ("", "a", "in", "or")}), 24 * 24 * 4
+)
+WORD_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def prose(rng, count: int) -> str:
+    """count words drawn Zipf-wise from a fixed vocabulary, like a Lore paragraph."""
+    return " ".join(rng.choices(VOCABULARY, cum_weights=WORD_WEIGHTS, k=count))
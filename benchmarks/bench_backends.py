@@ -0,0 +1,25 @@
+"""Read, insert, update and delete latency of the local storage backends."""
+import tempfile
+import os
+
+from benchmarks._timing import timed, report, rows
+from services.vault_backends import MemoryBackend, SqliteBackend, TAB_HEADERS
+
+ROWS = 5000
+
+
+def bench(backend):
+    header = TAB_HEADERS["Creatures"]
+    backend.append_rows("Creatures", [row[:4] + [f"id{i}"] for i, row in enumerate(rows(ROWS, 4))])
+    name = backend.name
+    report(f"{name}: read_values ({ROWS} rows)", timed(lambda: backend.read_values("Creatures")))
+    report(f"{name}: read_column (ID)", timed(lambda: backend.read_column("Creatures", len(header))))
+    report(f"{name}: append_rows (1 row)", timed(lambda: backend.append_rows("Creatures", [["x", "y", "z", "w", "id"]]), 200))
+    report(f"{name}: update_cells (1 cell)", timed(lambda: backend.update_cells("Creatures", [(ROWS // 2, 2, "edited")]), 200))
+    report(f"{name}: delete_row (middle)", timed(lambda: backend.delete_row("Creatures", ROWS // 2), 100))
+
+
+if __name__ == "__main__":
+    bench(MemoryBackend())
+    with tempfile.TemporaryDirectory() as directory:
+        bench(SqliteBackend(os.path.join(directory, "vault.db")))
@@ -0,0 +1,62 @@
+"""One 30-card archive grid, built fresh on every rerun against served from
+the card cache, plus the cost of joining a grid row into one block.
+"""
+import random
+
+import pandas as pd
+
+from benchmarks._timing import timed, report, prose
+from utils.card_cache import CardCache, grid_row
+
+CARDS = 30
+
+
+def build_card(row) -> str:
+    """Shaped like the NPC Archives grid card: concatenated HTML per field."""
+    img_src = row.get("Image_URL", "")
+    if "cloudinary" in img_src and "/upload/" in img_src:
+        img_src = img_src.replace("/upload/", "/upload/c_fill,g_face,w_400,h_533,q_auto,f_auto/")
+    html = ""
+    html += '<div class="archive-card">'
+    html += f'<div class="img-frame"><img src="{img_src}" loading="lazy"></div>'
+    html += '<div class="card-identity"><div class="identity-top">'
+    html += f'<div class="card-name">{row["Name"]}</div>'
+    html += f'<div class="card-class">{row["Class"]}</div>'
+    html += '</div><div class="pill-container">'
+    if row.get("Campaign"):
+        html += f'<div class="pill-base pill-stone">{row["Campaign"]}</div>'
+    if row.get("Faction"):
+        html += f'<div class="pill-base pill-metal">{row["Faction"]}</div>'
+    html += '</div></div></div>'
+    return html
+
+
+def page(rng) -> list:
+    frame = pd.DataFrame({
+        "Name": [prose(rng, 2).title() for _ in range(CARDS)],
+        "Class": ["Rogue"] * CARDS,
+        "Lore": [prose(rng, 120) for _ in range(CARDS)],
+        "Image_URL": [f"https://res.cloudinary.com/vault/image/upload/v1/{i}.jpg" for i in range(CARDS)],
+        "Campaign": ["Saltmarsh"] * CARDS,
+        "Faction": [f"Faction {i % 4}" for i in range(CARDS)],
+        "ID": [f"id{i}" for i in range(CARDS)],
+    })
+    # The archive page walks its page frame with iterrows, so cards get Series.
+    return [row for _, row in frame.iterrows()]
+
+
+if __name__ == "__main__":
+    rows = page(random.Random(3))
+    cache = CardCache()
+    report(f"build {CARDS} cards, uncached", timed(lambda: [build_card(row) for row in rows], 200))
+    cold = CardCache()
+    report(f"{CARDS} cards through an empty cache", timed(
+        lambda: [cold.render("npc_archive", row, {}, lambda: build_card(row)) for row in rows], 1
+    ))
+    [cache.render("npc_archive", row, {}, lambda: build_card(row)) for row in rows]
+    report(f"{CARDS} cards through a warm cache", timed(
+        lambda: [cache.render("npc_archive", row, {}, lambda: build_card(row)) for row in rows], 200
+    ))
+    cards = [build_card(row) for row in rows]
+    report("join into 10 grid rows", timed(lambda: [grid_row(cards[i:i + 3], 3) for i in range(0, CARDS, 3)], 200))
+    print(f"warm cache hit rate: {cache.stats()['hit_rate']:.0%}")
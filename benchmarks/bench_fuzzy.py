@@ -0,0 +1,40 @@
+"""Misspelt-name lookup at 50k names: the trigram index against difflib
+scanning every name, plus the cost of an incremental insert.
+"""
+import difflib
+import random
+
+import pandas as pd
+
+from benchmarks._timing import timed, report, VOCABULARY
+from services.search_service import TrigramIndex
+
+ROWS = 50_000
+
+
+def names(count: int, rng) -> list:
+    """Two-word names from the vocabulary: "Sigrid Halvorin", the way the Well names NPCs."""
+    return [f"{rng.choice(VOCABULARY).title()} {rng.choice(VOCABULARY).title()}" for _ in range(count)]
+
+
+def misspelt(name: str) -> str:
+    """The first word with one vowel swapped, as a hurried DM would type it."""
+    word = name.split()[0].lower()
+    for i, letter in enumerate(word):
+        if letter in "aeiou":
+            return word[:i] + ("u" if letter != "u" else "a") + word[i + 1:]
+    return word
+
+
+if __name__ == "__main__":
+    rng = random.Random(5)
+    frame = pd.DataFrame({"Name": names(ROWS, rng), "ID": [f"id{i}" for i in range(ROWS)]})
+    index = TrigramIndex("Name")
+    report(f"trigram build ({ROWS} names)", timed(lambda: index.rebuild(frame), 3))
+    query = misspelt(frame["Name"].iloc[ROWS // 2])
+    words = sorted({word.lower() for name in frame["Name"] for word in name.split()})
+    report(f"difflib over every word ('{query}')", timed(lambda: difflib.get_close_matches(query, words, 10, 0.6), 5))
+    report("trigram: one misspelt word", timed(lambda: index.similar(query)))
+    report("trigram: misspelt full name", timed(lambda: index.similar(f"{query} {misspelt(frame['Name'].iloc[7])}")))
+    more = pd.DataFrame({"Name": names(10, rng), "ID": [f"new{i}" for i in range(10)]})
+    report("trigram: append 10 names", timed(lambda: index.appended(more), 50))
@@ -0,0 +1,81 @@
+"""Per-call overhead of the Gemini client against a local stub of the API:
+a new genai.Client per call (as before) against the shared, pooled one.
+
+The stub answers instantly over plain HTTP, so what is left is client setup
+and connection handling; against the real API each new connection also pays
+a TLS handshake, which only widens the gap.
+"""
+import http.server
+import json
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+
+from benchmarks._timing import timed, report
+from services import llm_service
+
+REPLY = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "{\"Name\": \"Sigrid\"}"}]}}],
+}).encode("utf-8")
+
+
+class StubGemini(http.server.BaseHTTPRequestHandler):
+    """Answers every generateContent with the same small reply, keeping the connection alive."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # else headers and body wait on a delayed ACK
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def new_client(base_url: str) -> genai.Client:
+    """What get_gemini_client used to build on every call."""
+    return genai.Client(api_key="stub", http_options=types.HttpOptions(base_url=base_url))
+
+
+def pooled_client(base_url: str) -> genai.Client:
+    """Built the way get_gemini_client builds its one shared client."""
+    limits = httpx.Limits(
+        max_connections=llm_service.MAX_CONNECTIONS,
+        max_keepalive_connections=llm_service.MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=llm_service.KEEPALIVE_EXPIRY,
+    )
+    return genai.Client(
+        api_key="stub", http_options=types.HttpOptions(base_url=base_url, client_args={"limits": limits})
+    )
+
+
+def ask(client: genai.Client):
+    client.models.generate_content(model=llm_service.TEXT_MODEL, contents="A dwarf smith")
+
+
+if __name__ == "__main__":
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    report("new client per call", timed(lambda: ask(new_client(base_url)), 50))
+    shared = pooled_client(base_url)
+    ask(shared)
+    report("shared pooled client", timed(lambda: ask(shared), 200))
+
+    def burst(make):
+        """Eight sessions asking at once."""
+        threads = [threading.Thread(target=lambda: ask(make())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report("8 concurrent calls, new clients", timed(lambda: burst(lambda: new_client(base_url)), 20))
+    report("8 concurrent calls, shared client", timed(lambda: burst(lambda: shared), 20))
+    server.shutdown()
@@ -0,0 +1,50 @@
+"""The Oracle's cross-archive search: one combined index over NPCs, items
+and creatures against scanning each archive's tab in turn.
+"""
+import random
+
+import pandas as pd
+
+from benchmarks._timing import timed, report, prose, VOCABULARY
+from services.db_service import SEARCH_FIELDS
+from services.search_service import CombinedIndex
+
+SIZES = {"NPCs": 20_000, "Magic Items": 10_000, "Creatures": 10_000}
+
+
+def frame(tab: str, count: int, rng) -> pd.DataFrame:
+    columns = {
+        column: [prose(rng, 60 if column == "Lore" else 2) for _ in range(count)]
+        for column in SEARCH_FIELDS[tab]
+    }
+    columns["ID"] = [f"{tab[0]}{i}" for i in range(count)]
+    return pd.DataFrame(columns)
+
+
+def scan_all(frames: dict, query: str) -> list:
+    """Every archive's own search box, one after the other."""
+    found = []
+    for tab, records in frames.items():
+        mask = pd.Series(False, index=records.index)
+        for column in SEARCH_FIELDS[tab]:
+            mask |= records[column].str.contains(query, case=False)
+        found.extend((tab, entity_id) for entity_id in records.loc[mask, "ID"])
+    return found
+
+
+if __name__ == "__main__":
+    rng = random.Random(11)
+    frames = {tab: frame(tab, count, rng) for tab, count in SIZES.items()}
+    index = CombinedIndex(SEARCH_FIELDS)
+
+    def build():
+        for tab, records in frames.items():
+            index.feed(tab).rebuild(records)
+    report(f"combined build ({sum(SIZES.values())} records)", timed(build, 3))
+    report("rebuild one tab's feed (Creatures)", timed(lambda: index.feed("Creatures").rebuild(frames["Creatures"]), 5))
+    middling, rare = VOCABULARY[150], VOCABULARY[1500]
+    report("scan every archive: one word", timed(lambda: scan_all(frames, middling), 5))
+    report("combined index: one word", timed(lambda: index.search(middling)))
+    report("combined index: two words", timed(lambda: index.search(f"{middling} {rare}")))
+    more = frame("NPCs", 10, rng).assign(ID=[f"new{i}" for i in range(10)])
+    report("combined index: append 10 NPCs", timed(lambda: index.feed("NPCs").appended(more), 50))
@@ -0,0 +1,46 @@
+"""Cost of one archive page from the SQLite store at 100k rows: unfiltered
+and facet-filtered, first page and deep pages.
+"""
+import os
+import tempfile
+
+from benchmarks._timing import timed, report
+from services.replica_service import VaultReplica
+from services.vault_backends import TAB_HEADERS
+
+ROWS = 100_000
+PAGE = 30
+CAMPAIGNS = [f"Campaign {i}" for i in range(5)]
+
+
+def seed(store: VaultReplica):
+    header = TAB_HEADERS["NPCs"]
+    store.sync("NPCs", [header])
+    store.append_rows("NPCs", [
+        [f"NPC {i}", "Rogue", "lore", "hi", "desc", "", f"2024-01-01 00:00:00.{i:06d}",
+         CAMPAIGNS[i % len(CAMPAIGNS)], f"Faction {i % 40}", f"id{i:06d}"]
+        for i in range(ROWS)
+    ])
+    store.index_columns([header.index(column) + 1 for column in ("Campaign", "Faction")])
+
+
+def walk(store: VaultReplica, filters: dict, pages: int):
+    """Reads `pages` pages in a row, counting only on the first, as query_page does."""
+    after, total = None, None
+    for _ in range(pages):
+        _, total, after = store.page("NPCs", filters, after, PAGE, total)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        store = VaultReplica(os.path.join(directory, "vault.db"))
+        seed(store)
+        campaign = {8: "Campaign 3"}
+        faction = {9: "Faction 7"}
+        report("first page, unfiltered (counted)", timed(lambda: store.page("NPCs", {}, None, PAGE)))
+        report("first page, unfiltered (total known)", timed(lambda: store.page("NPCs", {}, None, PAGE, ROWS)))
+        report("first page, Campaign (counted)", timed(lambda: store.page("NPCs", campaign, None, PAGE)))
+        report("first page, Campaign (total known)", timed(lambda: store.page("NPCs", campaign, None, PAGE, 0)))
+        report("first page, Faction (total known)", timed(lambda: store.page("NPCs", faction, None, PAGE, 0)))
+        report("Campaign + Faction (total known)", timed(lambda: store.page("NPCs", {**campaign, **faction}, None, PAGE, 0)))
+        report("50 Campaign pages, per page", [t / 50 for t in timed(lambda: walk(store, campaign, 50), 5)])
@@ -0,0 +1,63 @@
+"""What the local replica costs and saves: the first full sync into an empty
+replica, a resync with nothing or one row changed, a warm read of the whole
+tab, and a write-through append. Next to them, the load they replaced:
+gspread's get_all_records() turned into a DataFrame and kept by
+st.cache_data, which pickles the frame on a miss and unpickles a copy on
+every hit. Neither side counts the Sheets API fetch itself; the old cold load
+paid it on every cache miss, a warm replica does not pay it at all.
+"""
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+from gspread.utils import numericise_all, to_records
+
+from benchmarks._timing import timed, report, rows
+from services import db_service
+from services.replica_service import VaultReplica
+from services.vault_backends import TAB_HEADERS
+
+ROWS = 5000
+
+
+def sheet() -> list:
+    """The tab as get_all_values() would return it."""
+    header = TAB_HEADERS["NPCs"]
+    body = rows(ROWS, 7)
+    return [header] + [row + ["Saltmarsh", "Zhentarim", f"id{i}"] for i, row in enumerate(body)]
+
+
+def old_load(values: list) -> bytes:
+    """get_all_records() on fetched values, then the st.cache_data store."""
+    records = to_records(values[0], [numericise_all(row) for row in values[1:]])
+    return pickle.dumps(pd.DataFrame(records))
+
+
+if __name__ == "__main__":
+    values = sheet()
+    report(f"old cold load: get_all_records ({ROWS} rows)", timed(lambda: old_load(values), 5))
+    cached = old_load(values)
+    report("old warm load: st.cache_data hit", timed(lambda: pickle.loads(cached)))
+    with tempfile.TemporaryDirectory() as directory:
+        counter = iter(range(1000))
+
+        def cold():
+            VaultReplica(os.path.join(directory, f"cold{next(counter)}.db")).sync("NPCs", values)
+        report(f"cold sync into an empty replica ({ROWS} rows)", timed(cold, 5))
+
+        store = VaultReplica(os.path.join(directory, "warm.db"))
+        store.sync("NPCs", values)
+        report("replica cold load: sync + typed frame", timed(
+            lambda: (cold(), db_service._typed_frame(values)), 5))
+        report("replica warm load after a restart", timed(
+            lambda: db_service._typed_frame(store.values("NPCs")), 5))
+        report("resync, nothing changed", timed(lambda: store.sync("NPCs", values), 10))
+        edited = [list(row) for row in values]
+
+        def one_edit():
+            edited[ROWS // 2][2] = f"{edited[ROWS // 2][2]}!"
+            store.sync("NPCs", edited)
+        report("resync, one row changed", timed(one_edit, 10))
+        report("warm read of the whole tab", timed(lambda: store.values("NPCs")))
+        report("write-through append (1 row)", timed(lambda: store.append_rows("NPCs", [values[1]]), 200))
@@ -0,0 +1,57 @@
+"""Archive search at 50k NPCs: the old str.contains scan over the five text
+columns against the inverted index, for one word, several words and a prefix.
+"""
+import random
+
+import pandas as pd
+
+from benchmarks._timing import timed, report, prose, VOCABULARY
+from services.db_service import SEARCH_FIELDS
+from services.search_service import TextIndex
+
+ROWS = 50_000
+COLUMNS = list(SEARCH_FIELDS["NPCs"])
+
+
+def frame(count: int, rng) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Name": [f"{prose(rng, 2).title()} {i}" for i in range(count)],
+        "Class": [rng.choice(["Rogue", "Bard", "Cleric", "Warlock"]) for _ in range(count)],
+        "Lore": [prose(rng, 60) for _ in range(count)],
+        "Campaign": [f"Campaign {i % 5}" for i in range(count)],
+        "Faction": [f"Faction {i % 40}" for i in range(count)],
+        "ID": [f"id{i}" for i in range(count)],
+    })
+
+
+def scan_all(records: pd.DataFrame, query: str) -> pd.DataFrame:
+    """The search box before the index: a case-insensitive scan per column."""
+    mask = pd.Series(False, index=records.index)
+    for column in COLUMNS:
+        mask |= records[column].astype(str).str.contains(query, case=False)
+    return records[mask]
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    records = frame(ROWS, rng)
+    index = TextIndex(SEARCH_FIELDS["NPCs"])
+    report(f"index build ({ROWS} records)", timed(lambda: index.rebuild(records), 3))
+    common, middling, rare = VOCABULARY[3], VOCABULARY[150], VOCABULARY[1500]
+    scan = report("scan: one word", timed(lambda: scan_all(records, middling), 5))
+    # The archive asks for one page (plus one to spare) at a time.
+    queries = {
+        "one common word": common,
+        "one middling word": middling,
+        "one rare word": rare,
+        "three words, ranked": f"{common} {middling} {rare}",
+        "prefix": middling[:3],
+    }
+    slower = [
+        label for label, query in queries.items()
+        if report(f"index: {label}", timed(lambda: index.ranked(query, limit=60))) >= scan
+    ]
+    more = frame(10, rng).assign(ID=[f"new{i}" for i in range(10)])
+    report("index: append 10 records", timed(lambda: index.appended(more), 50))
+    if slower:
+        raise SystemExit(f"The index is no faster than the scan for: {', '.join(slower)}")
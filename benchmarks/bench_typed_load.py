@@ -0,0 +1,50 @@
+"""The archive frame built the old way (a dict per row, object columns, the
+Timestamp re-parsed on every rerun) against the typed columnar load, in time
+and in memory.
+"""
+import pandas as pd
+
+from benchmarks._timing import timed, report, rows
+from services import db_service
+from services.vault_backends import TAB_HEADERS
+
+ROWS = 10_000
+
+
+def values() -> list:
+    header = TAB_HEADERS["NPCs"]
+    body = rows(ROWS, 7)
+    return [header] + [row + [f"Campaign {i % 5}", f"Faction {i % 40}", f"id{i}"] for i, row in enumerate(body)]
+
+
+def old_load(values: list) -> pd.DataFrame:
+    header = values[0]
+    return pd.DataFrame([dict(zip(header, row)) for row in values[1:]])
+
+
+def old_rerun(frame: pd.DataFrame):
+    """What every archive rerun did before the load typed the columns."""
+    for column in ("Campaign", "Faction"):
+        frame[column].astype(str).unique()
+    pd.to_datetime(frame["Timestamp"], errors="coerce").sort_values()
+
+
+def megabytes(frame: pd.DataFrame) -> float:
+    return frame.memory_usage(deep=True).sum() / 1e6
+
+
+def typed_rerun(frame: pd.DataFrame):
+    for column in ("Campaign", "Faction"):
+        frame[column].cat.categories
+    frame[db_service.PARSED_TIMESTAMP].sort_values()
+
+
+if __name__ == "__main__":
+    sheet = values()
+    report(f"old load ({ROWS} rows)", timed(lambda: old_load(sheet), 5))
+    report("typed load", timed(lambda: db_service._typed_frame(sheet), 5))
+    old, typed = old_load(sheet), db_service._typed_frame(sheet)
+    report("old rerun (astype + to_datetime)", timed(lambda: old_rerun(old)))
+    report("typed rerun", timed(lambda: typed_rerun(typed)))
+    print(f"{'old frame memory':<48} {megabytes(old):9.2f} MB")
+    print(f"{'typed frame memory':<48} {megabytes(typed):9.2f} MB")
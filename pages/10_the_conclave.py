@@ -0,0 +1,130 @@
+import streamlit as st
+import html
+
+import utils.styles as styles
+from services import bulk_service
+
+# -----------------------------------------------------------------------------
+# 1. PAGE CONFIGURATION
+# -----------------------------------------------------------------------------
+st.set_page_config(page_title="The Conclave", page_icon="📜", layout="wide")
+
+# -----------------------------------------------------------------------------
+# 2. THE VISUAL ENGINE
+# -----------------------------------------------------------------------------
+styles.load_css()
+
+# -----------------------------------------------------------------------------
+# 3. PROGRESS — one line per concept, read from the running job
+# -----------------------------------------------------------------------------
+STATUS_LABELS = {
+    bulk_service.WAITING: "⏳ Waiting",
+    bulk_service.WRITING: "✒️ Writing",
+    bulk_service.PAINTING: "🎨 Painting",
+    bulk_service.UPLOADING: "☁️ Uploading",
+    bulk_service.DONE: "✅ Done",
+    bulk_service.FAILED: "❌ Failed",
+}
+
+def render_progress(state: dict):
+    items = state["items"]
+    finished = sum(item["status"] in bulk_service.FINISHED for item in items)
+    failed = sum(item["status"] == bulk_service.FAILED for item in items)
+    st.progress(finished / len(items), text=f"{finished} of {len(items)} conjured" + (f" · {failed} failed" if failed else ""))
+
+    lines = []
+    for item in items:
+        label = STATUS_LABELS[item["status"]]
+        detail = f" — {html.escape(item['error'])}" if item["error"] else ""
+        lines.append(
+            f"<div class='subtext' style='text-align:left;'>{label} · "
+            f"{html.escape(item['concept'])} <span style='color:#666;'>({html.escape(item['variant'])})</span>{detail}</div>"
+        )
+    st.markdown("".join(lines), unsafe_allow_html=True)
+
+@st.fragment(run_every=1.0)
+def live_progress(job_id: str):
+    """Redraws the job's progress every second until it is saved."""
+    job = bulk_service.get_job(job_id)
+    render_progress(job.snapshot())
+    if not job.running():
+        st.rerun()
+
+# -----------------------------------------------------------------------------
+# 4. LAYOUT
+# -----------------------------------------------------------------------------
+st.page_link("1_the_vault.py", label="< RETURN TO VAULT", use_container_width=False)
+
+st.markdown("<h1>THE CONCLAVE</h1>", unsafe_allow_html=True)
+st.markdown("<div class='subtext'>A whole session's cast, conjured at once.</div>", unsafe_allow_html=True)
+
+# The job ID rides in the URL, so a refreshed page finds its job again.
+job_id = st.query_params.get("job")
+job = bulk_service.get_job(job_id) if job_id else None
+
+if job is None:
+    kind = st.radio("What to conjure", list(bulk_service.KINDS), horizontal=True)
+    spec = bulk_service.KINDS[kind]
+
+    c_variant, c_workers = st.columns([2, 1])
+    with c_variant:
+        default = st.selectbox(
+            f"{spec['variant']} (when a line names none)", spec["choices"],
+            index=1 if spec["variant"] == "Tone" else 0,
+        )
+    with c_workers:
+        concurrency = st.slider(
+            "Conjured at once", 1, bulk_service.MAX_CONCURRENCY, 4,
+            help="How many concepts are worked on at the same time.",
+        )
+
+    source_paste, source_csv = st.tabs(["PASTE A LIST", "UPLOAD A CSV"])
+    with source_paste:
+        pasted = st.text_area(
+            "Concepts", height=200, label_visibility="collapsed",
+            placeholder=f"One concept per line, optionally with | {spec['variant'].lower()}\n"
+                        f"e.g., A retired pirate who runs a bakery | {spec['choices'][0]}",
+        )
+    with source_csv:
+        uploaded = st.file_uploader(
+            f"A CSV with a 'concept' column and an optional '{spec['variant'].lower()}' column",
+            type=["csv"],
+        )
+
+    if uploaded is not None:
+        concepts = bulk_service.parse_csv(uploaded.getvalue(), kind, default)
+    else:
+        concepts = bulk_service.parse_pasted(pasted, kind, default)
+
+    st.markdown(f"<div class='subtext'>{len(concepts)} concepts ready.</div>", unsafe_allow_html=True)
+
+    if st.button("CONVENE THE CONCLAVE", type="primary", disabled=not concepts):
+        try:
+            st.query_params["job"] = bulk_service.start_job(kind, concepts, concurrency)
+            st.rerun()
+        except Exception as e:
+            st.error(f"The Conclave would not convene: {e}")
+    st.stop()
+
+state = job.snapshot()
+st.markdown(
+    f"<div class='subtext'>{len(state['items'])} {state['kind']} · {state['concurrency']} at once</div>",
+    unsafe_allow_html=True,
+)
+
+if job.running():
+    live_progress(job.id)
+else:
+    render_progress(state)
+    saved = sum(item["status"] == bulk_service.DONE for item in state["items"])
+    if state["save_error"]:
+        st.error(state["save_error"])
+        if st.button("TRY THE VAULT AGAIN"):
+            job.retry_save()
+            st.rerun()
+    else:
+        st.success(f"{saved} {state['kind']} saved to the Vault in one write.")
+
+if st.button("NEW CONCLAVE"):
+    del st.query_params["job"]
+    st.rerun()
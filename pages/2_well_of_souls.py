@@ -1,8 +1,12 @@
 import streamlit as st
 import datetime
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import utils.styles as styles
+import utils.card_cache as card_cache
+import utils.gallery as gallery
 from services import llm_service, storage_service, db_service
 
 # -----------------------------------------------------------------------------
@@ -15,6 +19,8 @@ if "npc_data" not in st.session_state:
     st.session_state.npc_data = None
 if "last_concept" not in st.session_state:
     st.session_state.last_concept = ""
+if "npc_pending" not in st.session_state:
+    st.session_state.npc_pending = None
 
 # -----------------------------------------------------------------------------
 # 2. THE VISUAL ENGINE (The Void Theme)
@@ -24,6 +30,7 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. CARD RENDERING
 # -----------------------------------------------------------------------------
+@card_cache.cached_card("npc")
 def build_npc_card(data: dict, forming: bool = False) -> str:
     """Builds the character-card HTML.
 
@@ -75,6 +82,10 @@ def show_status(slot):
     status = st.session_state.get("db_status")
     if not status:
         return
+    # Saves are queued; a failed batch write surfaces on the next render.
+    error = db_service.ticket_error(st.session_state.get("db_ticket"))
+    if error:
+        status = st.session_state.db_status = f"Vault Exception: {error}"
     if "Success!" in status:
         slot.success(status)
     else:
@@ -84,15 +95,34 @@ def show_status(slot):
 # -----------------------------------------------------------------------------
 # 4. CORE LOGIC — PROGRESSIVE ("LIVE") GENERATION
 # -----------------------------------------------------------------------------
-def generate_live(card_slot, status_slot, concept: str, tone: str, fast: bool = True):
+def _summon_portrait(char_data: dict, tone: str, fast: bool, candidates: int = 1) -> list:
+    """Candidate portraits for a (possibly still half-written) NPC, from one
+    request; runs off the script thread.
+    """
+    images = llm_service.generate_npc_image(
+        char_data.get("Visual_Desc", ""),
+        char_data.get("Class", ""),
+        tone,
+        fast=fast,
+        candidates=candidates,
+    )
+    return images if candidates > 1 else [images]
+
+
+def generate_live(card_slot, status_slot, concept: str, tone: str, fast: bool = True, candidates: int = 1):
     """Generates an NPC and renders it progressively.
 
-    The written details appear the moment the text lands, so the card is
-    performable seconds sooner; the portrait fills into the same card once it
-    is ready, and the Vault save happens last.
+    The text streams in and is written into the card as it arrives. The
+    portrait starts as soon as Class and Visual_Desc are complete, so it is
+    generated while the Greeting and Lore are still being written; it fills
+    into the same card once it is ready, and the Vault save happens last.
 
     fast=True  -> quick image model (live, mid-session use).
     fast=False -> high-fidelity image model (prep).
+
+    With candidates > 1 the portraits come back together and nothing is
+    saved yet: the NPC waits in st.session_state.npc_pending for the DM to
+    pick one, and None is returned.
     """
     status_slot.empty()
 
@@ -102,36 +132,63 @@ def generate_live(card_slot, status_slot, concept: str, tone: str, fast: bool =
         unsafe_allow_html=True,
     )
 
-    # 1. TEXT — the moment this lands, the card is performable.
+    # The portrait is generated on its own thread, alongside the streaming text.
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    # 1. TEXT — streamed; every chunk redraws the card, portrait still forming.
+    # Half-written cards skip the card cache (__wrapped__) so they don't crowd it.
+    portrait = None
+    char_data = None
     try:
-        char_data = llm_service.generate_npc_text(concept, tone)
+        for char_data, complete in llm_service.stream_npc_text(concept, tone):
+            # 2. IMAGE — fired the moment it has what it needs.
+            if portrait is None and {"Class", "Visual_Desc"} <= complete:
+                portrait = pool.submit(_summon_portrait, dict(char_data), tone, fast, candidates)
+            if char_data.get("Name"):
+                card_slot.markdown(build_npc_card.__wrapped__(char_data, forming=True), unsafe_allow_html=True)
     except Exception as e:
         card_slot.empty()
         status_slot.error(f"Failed to commune with the Void: {e}")
+        pool.shutdown(wait=False, cancel_futures=True)
+        return None
+    if not char_data:
+        card_slot.empty()
+        status_slot.error("Failed to commune with the Void: the reply was empty.")
+        pool.shutdown(wait=False, cancel_futures=True)
         return None
 
-    # 2. Render the card NOW — portrait still forming.
+    # 3. The finished text, portrait still forming.
     card_slot.markdown(build_npc_card(char_data, forming=True), unsafe_allow_html=True)
+    if portrait is None:
+        portrait = pool.submit(_summon_portrait, char_data, tone, fast, candidates)
 
-    # 3. IMAGE — generated behind the already-visible text.
     try:
-        image_bytes = llm_service.generate_npc_image(
-            char_data.get("Visual_Desc", ""),
-            char_data.get("Class", ""),
-            tone,
-            fast=fast,
-        )
+        images = portrait.result()
+    except Exception:
+        images = []
+    pool.shutdown(wait=False)
+
+    if len(images) > 1:
+        st.session_state.npc_pending = {"data": char_data, "images": images, "tone": tone}
+        return None
+    return inscribe(card_slot, status_slot, char_data, images[0] if images else None)
+
+
+def inscribe(card_slot, status_slot, char_data: dict, image_bytes):
+    """Uploads the portrait, swaps it into the card and queues the Vault save."""
+    # 4. Swap the finished portrait into the same card.
+    try:
+        if image_bytes is None:
+            raise Exception("No portrait was generated.")
         b64_encoded = base64.b64encode(image_bytes).decode("utf-8")
         data_uri = f"data:image/jpeg;base64,{b64_encoded}"
         char_data["image_url"] = storage_service.upload_image_to_cdn(data_uri)
     except Exception:
         # Image is non-critical: the card still shows, with "No Visage Found".
         char_data["image_url"] = "Image Upload Failed"
-
-    # 4. Swap the finished portrait into the same card.
     card_slot.markdown(build_npc_card(char_data, forming=False), unsafe_allow_html=True)
 
-    # 5. Save to the Vault — last, after the card is already in hand.
+    # 5. Save to the Vault — queued, so it never holds up the card.
     try:
         row_to_save = [
             char_data.get("Name", "Unknown"),
@@ -142,7 +199,7 @@ def generate_live(card_slot, status_slot, concept: str, tone: str, fast: bool =
             char_data.get("image_url", ""),
             str(datetime.datetime.now()),
         ]
-        db_service.insert_character(row_to_save)
+        st.session_state.db_ticket = db_service.insert_character(row_to_save)
         st.session_state.db_status = f"Success! {char_data.get('Name')} saved to Vault."
     except Exception as e:
         st.session_state.db_status = f"Vault Exception: {str(e)}"
@@ -152,7 +209,70 @@ def generate_live(card_slot, status_slot, concept: str, tone: str, fast: bool =
 
 
 # -----------------------------------------------------------------------------
-# 5. LAYOUT
+# 5. FORESIGHT — the reroll tones, generated before they are asked for
+# While the DM reads a fresh card, the two tones they didn't pick are written
+# and painted on a small per-session pool. A reroll click then only uploads and
+# saves. Variants are held in memory only: one that is never picked is never
+# uploaded or saved, and a new conjuring cancels whatever is still foreseen.
+# -----------------------------------------------------------------------------
+TONES = ["Noble & Bright", "Grim & Shadow", "Mystic & Strange"]
+FORESIGHT_WORKERS = 2  # variants generated at once, per session
+
+
+def _foresee(concept: str, tone: str, fast: bool, cancelled: threading.Event):
+    """One reroll variant: (char_data, image_bytes). Runs off the script thread."""
+    char_data = llm_service.generate_npc_text(concept, tone)
+    if cancelled.is_set():
+        return None
+    return char_data, _summon_portrait(char_data, tone, fast)[0]
+
+
+def cancel_foresight():
+    """Drops every foreseen variant: queued ones never start, running ones stop after their text."""
+    foresight = st.session_state.get("foresight")
+    if foresight:
+        foresight["cancelled"].set()
+        for future in foresight["variants"].values():
+            future.cancel()
+    st.session_state.foresight = None
+
+
+def start_foresight(concept: str, current_tone: str, fast: bool = True):
+    """Foresees every tone but current_tone for this concept, keeping the
+    variants already foreseen for it.
+    """
+    foresight = st.session_state.get("foresight")
+    if not foresight or foresight["concept"] != concept:
+        cancel_foresight()
+        foresight = st.session_state.foresight = {
+            "concept": concept, "cancelled": threading.Event(), "variants": {},
+        }
+    if "foresight_pool" not in st.session_state:
+        st.session_state.foresight_pool = ThreadPoolExecutor(max_workers=FORESIGHT_WORKERS)
+    pool = st.session_state.foresight_pool
+    for tone in TONES:
+        if tone != current_tone and tone not in foresight["variants"]:
+            foresight["variants"][tone] = pool.submit(_foresee, concept, tone, fast, foresight["cancelled"])
+
+
+def take_foreseen(concept: str, tone: str):
+    """The foreseen (char_data, image_bytes) for a reroll, waiting for it if it
+    is still being generated; None if there is none or it failed.
+    """
+    foresight = st.session_state.get("foresight")
+    if not foresight or foresight["concept"] != concept:
+        return None
+    future = foresight["variants"].pop(tone, None)
+    if future is None or future.cancelled():
+        return None
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+
+# -----------------------------------------------------------------------------
+# 6. LAYOUT
 # -----------------------------------------------------------------------------
 st.page_link("1_the_vault.py", label="< RETURN TO VAULT", use_container_width=False)
 
@@ -160,6 +280,14 @@ st.markdown("<h1>THE WELL OF SOULS</h1>", unsafe_allow_html=True)
 st.markdown("<div class='subtext'>Conjure a form and inscribe the soul... </div>", unsafe_allow_html=True)
 
 st.sidebar.markdown('<div class="sidebar-header">Well of Souls</div>', unsafe_allow_html=True)
+foresight_on = st.sidebar.toggle(
+    "Foresee rerolls", value=True, key="foresight_on",
+    help="Write and paint the other two tones in the background, so a reroll appears at once.",
+)
+if not foresight_on:
+    # Turning it off stops the variants already queued from spending quota.
+    cancel_foresight()
+candidates = gallery.candidate_count("npc_candidates")
 
 with st.form("forge_form"):
     user_input = st.text_input(
@@ -178,7 +306,7 @@ with st.form("forge_form"):
 
         selected_vibe = st.selectbox(
             "CHOOSE A RESONANCE",
-            ["Noble & Bright", "Grim & Shadow", "Mystic & Strange"],
+            TONES,
             label_visibility="collapsed"
         )
     with c_btn:
@@ -186,14 +314,22 @@ with st.form("forge_form"):
         submitted = st.form_submit_button("INSCRIBE THE SOUL.")
 
 # -----------------------------------------------------------------------------
-# 6. RESULT — placeholders that the live generation renders into, in order
+# 7. RESULT — placeholders that the live generation renders into, in order
 # -----------------------------------------------------------------------------
 status_slot = st.empty()
 card_slot = st.empty()
 
 if submitted and user_input:
+    cancel_foresight()
+    st.session_state.npc_pending = None
     st.session_state.last_concept = user_input
-    st.session_state.npc_data = generate_live(card_slot, status_slot, user_input, selected_vibe)
+    st.session_state.npc_data = generate_live(
+        card_slot, status_slot, user_input, selected_vibe, candidates=candidates
+    )
+    if st.session_state.npc_data and foresight_on:
+        start_foresight(user_input, selected_vibe)
+elif st.session_state.npc_pending:
+    card_slot.markdown(build_npc_card(st.session_state.npc_pending["data"], forming=True), unsafe_allow_html=True)
 elif st.session_state.npc_data:
     show_status(status_slot)
     card_slot.markdown(
@@ -201,8 +337,23 @@ elif st.session_state.npc_data:
         unsafe_allow_html=True,
     )
 
+# Candidate portraits wait here; only the chosen one is uploaded and saved.
+pending = st.session_state.npc_pending
+if pending:
+    st.markdown(
+        "<div class='subtext'>Choose the visage to keep. The others fade back into the Void.</div>",
+        unsafe_allow_html=True,
+    )
+    choice = gallery.pick_one("npc_visage", pending["images"])
+    if choice is not None:
+        st.session_state.npc_pending = None
+        st.session_state.npc_data = inscribe(card_slot, status_slot, pending["data"], pending["images"][choice])
+        if foresight_on:
+            start_foresight(st.session_state.last_concept, pending["tone"])
+        st.rerun()
+
 # -----------------------------------------------------------------------------
-# 7. MODIFIERS (REROLL)
+# 8. MODIFIERS (REROLL)
 # -----------------------------------------------------------------------------
 if st.session_state.npc_data:
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -221,12 +372,25 @@ if st.session_state.npc_data:
             reroll_tone = "Mystic & Strange"
 
     if reroll_tone:
-        st.session_state.npc_data = generate_live(
-            card_slot, status_slot, st.session_state.last_concept, reroll_tone
-        )
+        concept = st.session_state.last_concept
+        card_slot.markdown("<div class='summoning-state'>The Void stirs...</div>", unsafe_allow_html=True)
+        foreseen = take_foreseen(concept, reroll_tone)
+        if foreseen:
+            char_data, image_bytes = foreseen
+            card_slot.markdown(build_npc_card(char_data, forming=True), unsafe_allow_html=True)
+            st.session_state.npc_data = inscribe(card_slot, status_slot, char_data, image_bytes)
+        else:
+            st.session_state.npc_data = generate_live(
+                card_slot, status_slot, concept, reroll_tone, candidates=candidates
+            )
+        if st.session_state.npc_data and foresight_on:
+            start_foresight(concept, reroll_tone)
+        if st.session_state.npc_pending:
+            # The candidate gallery sits above the reroll buttons.
+            st.rerun()
 
 # -----------------------------------------------------------------------------
-# 8. FOOTER
+# 9. FOOTER
 # -----------------------------------------------------------------------------
 runes = ["ᚦ", "ᛖ", "᛫", "ᚾ", "ᛁ", "ᚷ", "ᚺ", "ᛏ"]
 rune_html = "<div class='footer-container'>"
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 import base64
 
 import utils.styles as styles
+import utils.pager as pager
+import utils.card_cache as card_cache
 from services import db_service, llm_service, storage_service
 
 # -----------------------------------------------------------------------------
@@ -18,17 +19,62 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. FETCH DATA
 # -----------------------------------------------------------------------------
+# Only the sidebar's facets are read up front; the grid asks for its page below.
+# Each option's count honours the other filter, so it shows what choosing it would leave.
+chosen = {'Campaign': st.session_state.get("facet_campaign", "All"), 'Faction': st.session_state.get("facet_faction", "All")}
+chosen = {col: val for col, val in chosen.items() if val != "All"}
 try:
-    df = db_service.get_all_records()
+    campaign_counts = dict(db_service.facet_counts("NPCs", "Campaign", chosen))
+    faction_counts = dict(db_service.facet_counts("NPCs", "Faction", chosen))
 except Exception as e:
     st.error(f"Could not read from Vault: {e}")
     st.stop()
 
+# -----------------------------------------------------------------------------
+# 4. CARD RENDERING
+# -----------------------------------------------------------------------------
+@card_cache.cached_card("npc_archive")
+def build_archive_card(row) -> str:
+    """One grid card: thumbnail, name, class and the Campaign / Faction pills."""
+    img_src = row.get('Image_URL', '')
+    if not str(img_src).startswith("http"):
+        img_src = "https://via.placeholder.com/400x533?text=No+Visage"
+
+    # PERFORMANCE FIX: Cloudinary optimized thumbnails (3:4 aspect ratio)
+    if "cloudinary" in img_src and "/upload/" in img_src:
+        img_src = img_src.replace("/upload/", "/upload/c_fill,g_face,w_400,h_533,q_auto,f_auto/")
+
+    html = ""
+    html += '<div class="archive-card">'
+    html += '<div class="img-frame">'
+    html += f'<img src="{img_src}" loading="lazy">'
+    html += '</div>'
+    html += '<div class="card-identity">'
+
+    html += '<div class="identity-top">'
+    html += f'<div class="card-name">{row["Name"]}</div>'
+    html += f'<div class="card-class">{row["Class"]}</div>'
+    html += '</div>'
+
+    # --- PILLS ---
+    html += '<div class="pill-container">'
+    if row.get('Campaign'):
+        html += f'<div class="pill-base pill-stone">{row["Campaign"]}</div>'
+    if row.get('Faction'):
+        html += f'<div class="pill-base pill-metal">{row["Faction"]}</div>'
+    if not row.get('Campaign') and not row.get('Faction'):
+        html += f'<div class="pill-base pill-stone" style="opacity:0;">EMPTY</div>'
+    html += '</div>'
+
+    html += '</div>'
+    html += '</div>'
+    return html
+
 # -----------------------------------------------------------------------------
 # 5. THE MODAL (POP UP FUNCTION) - CLEAN
 # -----------------------------------------------------------------------------
 @st.dialog("The Archive Opens...", width="large")
-def view_soul(row, index_in_sheet):
+def view_soul(row, entity_id):
     img_src = row.get('Image_URL', '')
     if not str(img_src).startswith("http"):
         img_src = "https://via.placeholder.com/800x400?text=No+Visage"
@@ -49,6 +95,21 @@ def view_soul(row, index_in_sheet):
         </div>
         """, unsafe_allow_html=True)
         st.markdown(f"<div class='modal-visual'>{row['Visual_Desc']}</div>", unsafe_allow_html=True)
+
+        # --- KINDRED (closest in look and lore, from the similarity index) ---
+        kindred = db_service.related_records("NPCs", entity_id)
+        if not kindred.empty:
+            st.markdown("<div style='font-family:Cinzel; color:#95b4a7; margin:16px 0 8px;'>🜂 Kindred Souls</div>", unsafe_allow_html=True)
+            for kin_col, (_, kin) in zip(st.columns(len(kindred)), kindred.iterrows()):
+                kin_src = str(kin.get('Image_URL', ''))
+                if not kin_src.startswith("http"):
+                    kin_src = "https://via.placeholder.com/150x200?text=No+Visage"
+                elif "cloudinary" in kin_src and "/upload/" in kin_src:
+                    kin_src = kin_src.replace("/upload/", "/upload/c_fill,g_face,w_150,h_200,q_auto,f_auto/")
+                kin_col.markdown(f"""
+                    <img src="{kin_src}" loading="lazy" style="width:100%; border:1px solid #333; border-radius:2px;">
+                    <div style="font-family:Cinzel; font-size:0.7rem; color:#aaa; text-align:center; margin-top:4px;">{kin.get('Name', '')}</div>
+                """, unsafe_allow_html=True)
         
     with col2:
         st.markdown(f"""
@@ -63,12 +124,12 @@ def view_soul(row, index_in_sheet):
         st.markdown("<hr style='border: 1px solid #222; margin: 20px 0;'>", unsafe_allow_html=True)
         st.markdown("<div style='font-family:Cinzel; color:#95b4a7; margin-bottom:8px;'>✨ Reforge Visage (Fast Lane)</div>", unsafe_allow_html=True)
         
-        preview_key = f"pending_npc_preview_{index_in_sheet}"
+        preview_key = f"pending_npc_preview_{entity_id}"
         
-        tweak_prompt = st.text_input("Tweak visual details", placeholder="e.g., 'Make it snowing', 'Give them a scar'", label_visibility="collapsed", key=f"tweak_{index_in_sheet}")
-        tweak_tone = st.selectbox("Resonance", ["Noble & Bright", "Grim & Shadow", "Mystic & Strange"], key=f"tweak_tone_{index_in_sheet}")
+        tweak_prompt = st.text_input("Tweak visual details", placeholder="e.g., 'Make it snowing', 'Give them a scar'", label_visibility="collapsed", key=f"tweak_{entity_id}")
+        tweak_tone = st.selectbox("Resonance", ["Noble & Bright", "Grim & Shadow", "Mystic & Strange"], key=f"tweak_tone_{entity_id}")
         
-        if st.button("REFORGE IMAGE", type="primary", use_container_width=True, key=f"btn_reforge_{index_in_sheet}"):
+        if st.button("REFORGE IMAGE", type="primary", use_container_width=True, key=f"btn_reforge_{entity_id}"):
             if not tweak_prompt:
                 st.warning("Please enter a tweak description.")
             else:
@@ -102,18 +163,18 @@ def view_soul(row, index_in_sheet):
             
             btn_col1, btn_col2 = st.columns(2)
             with btn_col1:
-                if st.button("↩ KEEP ORIGINAL", use_container_width=True, key=f"keep_{index_in_sheet}"):
+                if st.button("↩ KEEP ORIGINAL", use_container_width=True, key=f"keep_{entity_id}"):
                     del st.session_state[preview_key]
                     st.rerun()
             with btn_col2:
-                if st.button("✅ ACCEPT NEW", type="primary", use_container_width=True, key=f"accept_{index_in_sheet}"):
+                if st.button("✅ ACCEPT NEW", type="primary", use_container_width=True, key=f"accept_{entity_id}"):
                     with st.spinner("Inscribing new visage..."):
                         try:
                             img_bytes = st.session_state[preview_key]["bytes"]
                             b64_encoded = base64.b64encode(img_bytes).decode("utf-8")
                             data_uri = f"data:image/jpeg;base64,{b64_encoded}"
                             new_image_url = storage_service.upload_image_to_cdn(data_uri)
-                            db_service.update_character_image(index_in_sheet + 2, new_image_url)
+                            db_service.update_character_image(entity_id, new_image_url)
                             del st.session_state[preview_key]
                             st.session_state["show_success_toast"] = True
                             st.rerun()
@@ -135,133 +196,129 @@ if st.session_state.get("show_success_toast"):
 # --- SIDEBAR FILTERS ---
 st.sidebar.markdown('<div class="sidebar-header">Filter Archives</div>', unsafe_allow_html=True)
 
-if not df.empty:
-    campaigns = ["All"]
-    if 'Campaign' in df.columns:
-        unique_cams = sorted([str(x) for x in df['Campaign'].unique() if str(x).strip() != "" and str(x).lower() != "nan"])
-        campaigns.extend(unique_cams)
-    sel_campaign = st.sidebar.selectbox("Campaign", campaigns)
-    
-    factions = ["All"]
-    if 'Faction' in df.columns:
-        unique_facs = sorted([str(x) for x in df['Faction'].unique() if str(x).strip() != "" and str(x).lower() != "nan"])
-        factions.extend(unique_facs)
-    sel_faction = st.sidebar.selectbox("Faction", factions)
-else:
-    sel_campaign = "All"
-    sel_faction = "All"
+sel_campaign = st.sidebar.selectbox(
+    "Campaign", ["All"] + list(campaign_counts), key="facet_campaign",
+    format_func=lambda v: v if v == "All" else f"{v} ({campaign_counts[v]})"
+)
+sel_faction = st.sidebar.selectbox(
+    "Faction", ["All"] + list(faction_counts), key="facet_faction",
+    format_func=lambda v: v if v == "All" else f"{v} ({faction_counts[v]})"
+)
 
 # --- SEARCH & FILTER LOGIC ---
 search_query = st.text_input("Search the Archives", placeholder="Speak the name, class, or secret...")
+semantic = st.toggle("Search by meaning", key="semantic_mode", help="Find souls whose look and lore resemble your words, not only those containing them.")
 
-filtered_df = df.copy()
-
+filters = {}
 if sel_campaign != "All":
-    filtered_df['Campaign'] = filtered_df['Campaign'].astype(str)
-    filtered_df = filtered_df[filtered_df['Campaign'] == sel_campaign]
-
+    filters['Campaign'] = sel_campaign
 if sel_faction != "All":
-    filtered_df['Faction'] = filtered_df['Faction'].astype(str)
-    filtered_df = filtered_df[filtered_df['Faction'] == sel_faction]
-
-if search_query:
-    mask = (
-        filtered_df['Name'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Class'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Lore'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Campaign'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Faction'].astype(str).str.contains(search_query, case=False)
-    )
-    filtered_df = filtered_df[mask]
+    filters['Faction'] = sel_faction
+
+# --- BULK EDIT (one batched write for every chosen soul) ---
+# Off by default: choosing from the whole view means reading every match.
+if st.toggle("Bulk inscription", key="bulk_mode"):
+    matches = db_service.query_matches("NPCs", filters, search_query, semantic)
+    if not matches.empty and 'ID' in matches.columns:
+        soul_names = dict(zip(matches['ID'], matches['Name']))
+        take_all = st.checkbox(f"Every soul in this view ({len(soul_names)})", key="bulk_all")
+        bulk_ids = list(soul_names) if take_all else st.multiselect(
+            "Souls", list(soul_names), format_func=soul_names.get,
+            placeholder="Choose souls from the current search...", key="bulk_ids"
+        )
+        bulk_c1, bulk_c2 = st.columns(2)
+        with bulk_c1:
+            bulk_campaign = st.text_input("Campaign", placeholder="Leave blank to keep", key="bulk_campaign")
+        with bulk_c2:
+            bulk_faction = st.text_input("Faction", placeholder="Leave blank to keep", key="bulk_faction")
+
+        if st.button("INSCRIBE ALL", type="primary", key="bulk_save", disabled=not bulk_ids):
+            fields = {}
+            if bulk_campaign.strip():
+                fields["Campaign"] = bulk_campaign.strip()
+            if bulk_faction.strip():
+                fields["Faction"] = bulk_faction.strip()
+            if not fields:
+                st.warning("Enter a Campaign or Faction to inscribe.")
+            else:
+                try:
+                    db_service.update_records("NPCs", [(entity_id, fields) for entity_id in bulk_ids])
+                    st.toast(f"{len(bulk_ids)} souls inscribed.", icon="✒️")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
 # --- GRID ---
-MAX_DISPLAY = 30
-
-if not filtered_df.empty:
-    
-    # 1. SORTING LOGIC: Latest First
-    if 'Timestamp' in filtered_df.columns:
-        filtered_df['Timestamp_Temp'] = pd.to_datetime(filtered_df['Timestamp'], errors='coerce')
-        filtered_df = filtered_df.sort_values(by='Timestamp_Temp', ascending=False)
-    else:
-        filtered_df = filtered_df.iloc[::-1]
-
-    # Cap displayed entries
-    display_df = filtered_df.head(MAX_DISPLAY)
-
-    cols = st.columns(3)
-    
-    for i, (index, row) in enumerate(display_df.iterrows()): 
-        col_index = i % 3
-        img_src = row.get('Image_URL', '')
-        if not str(img_src).startswith("http"):
-            img_src = "https://via.placeholder.com/400x533?text=No+Visage"
-
-        # PERFORMANCE FIX: Cloudinary optimized thumbnails (3:4 aspect ratio)
-        if "cloudinary" in img_src and "/upload/" in img_src:
-            img_src = img_src.replace("/upload/", "/upload/c_fill,g_face,w_400,h_533,q_auto,f_auto/")
-
-        with cols[col_index]:
-            html = ""
-            html += '<div class="archive-card">'
-            html += '<div class="img-frame">'
-            html += f'<img src="{img_src}" loading="lazy">'
-            html += '</div>'
-            html += '<div class="card-identity">'
-            
-            html += '<div class="identity-top">'
-            html += f'<div class="card-name">{row["Name"]}</div>'
-            html += f'<div class="card-class">{row["Class"]}</div>'
-            html += '</div>'
-            
-            # --- PILLS ---
-            html += '<div class="pill-container">'
-            if row.get('Campaign'):
-                 html += f'<div class="pill-base pill-stone">{row["Campaign"]}</div>'
-            if row.get('Faction'):
-                 html += f'<div class="pill-base pill-metal">{row["Faction"]}</div>'
-            if not row.get('Campaign') and not row.get('Faction'):
-                 html += f'<div class="pill-base pill-stone" style="opacity:0;">EMPTY</div>'
-            html += '</div>'
-            
-            html += '</div>'
-            html += '</div>' 
-            st.markdown(html, unsafe_allow_html=True)
-            
-            # ACTIONS
-            b_col1, b_col2, b_col3 = st.columns([0.6, 0.2, 0.2])
+PAGE_SIZE = 30
+WHOLE_ROWS = True  # send each row of three cards as a single st.markdown
+
+# Latest first, one page at a time: only the cards on screen are read, and only
+# they get widgets. The page cursor lives in session_state.
+cursor = pager.page_cursor("npc_pager", (tuple(sorted(filters.items())), search_query, semantic))
+try:
+    display_df, total_matches, next_cursor = db_service.query_page(
+        "NPCs", page_size=PAGE_SIZE, filters=filters, search=search_query, semantic=semantic, cursor=cursor
+    )
+except Exception as e:
+    st.error(f"Could not read from Vault: {e}")
+    st.stop()
+
+
+if not display_df.empty:
+
+    # One st.markdown per grid row (WHOLE_ROWS) or per card; either way the
+    # card HTML comes from the card cache.
+    page_rows = list(display_df.iterrows())
+    for start in range(0, len(page_rows), 3):
+        chunk = page_rows[start:start + 3]
+        cards = [build_archive_card(row) for _, row in chunk]
+        if WHOLE_ROWS:
+            st.markdown(card_cache.grid_row(cards, 3), unsafe_allow_html=True)
+        cols = st.columns(3)
+
+        for col, card, (_, row) in zip(cols, cards, chunk):
+            entity_id = row.get('ID', '')
+            with col:
+                if not WHOLE_ROWS:
+                    st.markdown(card, unsafe_allow_html=True)
+
+                # ACTIONS
+                b_col1, b_col2, b_col3 = st.columns([0.6, 0.2, 0.2])
             
-            with b_col1:
-                if st.button(f"INSPECT ᛦ", key=f"inspect_{index}", type="primary", use_container_width=True):
-                    view_soul(row, index)
+                with b_col1:
+                    if st.button(f"INSPECT ᛦ", key=f"inspect_{entity_id}", type="primary", use_container_width=True):
+                        view_soul(row, entity_id)
             
-            # QUICK EDIT (Quill)
-            with b_col2:
-                with st.popover("✒️", use_container_width=True):
-                    st.markdown("<span style='color:#888; font-size:0.8rem; font-family:Cinzel; letter-spacing:1px; border-bottom:1px solid #333; display:block; margin-bottom:4px;'>CAMPAIGN</span>", unsafe_allow_html=True)
-                    p_campaign = st.text_input("Campaign", value=row.get('Campaign', ''), key=f"pc_{index}", label_visibility="collapsed")
+                # QUICK EDIT (Quill)
+                with b_col2:
+                    with st.popover("✒️", use_container_width=True):
+                        st.markdown("<span style='color:#888; font-size:0.8rem; font-family:Cinzel; letter-spacing:1px; border-bottom:1px solid #333; display:block; margin-bottom:4px;'>CAMPAIGN</span>", unsafe_allow_html=True)
+                        p_campaign = st.text_input("Campaign", value=row.get('Campaign', ''), key=f"pc_{entity_id}", label_visibility="collapsed")
                     
-                    st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True) 
+                        st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True) 
 
-                    st.markdown("<span style='color:#8a9ba8; font-size:0.8rem; font-family:Cinzel; letter-spacing:1px; border-bottom:1px solid #4a5568; display:block; margin-bottom:4px;'>FACTION</span>", unsafe_allow_html=True)
-                    p_faction = st.text_input("Faction", value=row.get('Faction', ''), key=f"pf_{index}", label_visibility="collapsed")
+                        st.markdown("<span style='color:#8a9ba8; font-size:0.8rem; font-family:Cinzel; letter-spacing:1px; border-bottom:1px solid #4a5568; display:block; margin-bottom:4px;'>FACTION</span>", unsafe_allow_html=True)
+                        p_faction = st.text_input("Faction", value=row.get('Faction', ''), key=f"pf_{entity_id}", label_visibility="collapsed")
                     
-                    st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True) 
+                        st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True) 
+
+                        if st.button("Save", key=f"psave_{entity_id}", type="primary"):
+                            try:
+                                db_service.update_character_meta(entity_id, p_campaign, p_faction)
+                                st.toast("Resonance Inscribed", icon="✒️")
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"Error: {e}")
 
-                    if st.button("Save", key=f"psave_{index}", type="primary"):
+                with b_col3:
+                    if st.button("ᚺ", key=f"burn_{entity_id}", type="secondary", use_container_width=True, help="Burn Soul"):
                         try:
-                            sheet_row = index + 2
-                            db_service.update_character_meta(sheet_row, p_campaign, p_faction)
-                            st.toast("Resonance Inscribed", icon="✒️")
+                            db_service.delete_character(entity_id)
+                            st.toast(f"Severed.", icon="🔥")
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
 
-            with b_col3:
-                if st.button("ᚺ", key=f"burn_{index}", type="secondary", use_container_width=True, help="Burn Soul"):
-                    try:
-                        db_service.delete_character(index + 2)
-                        st.toast(f"Severed.", icon="🔥")
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Error: {e}")
\ No newline at end of file
+# --- PAGER ---
+pager.render_pager("npc_pager", next_cursor, total_matches, PAGE_SIZE, "souls")
+card_cache.render_stats()
@@ -3,6 +3,8 @@ import datetime
 import base64
 
 import utils.styles as styles
+import utils.card_cache as card_cache
+import utils.gallery as gallery
 from services import llm_service, storage_service, db_service
 
 # -----------------------------------------------------------------------------
@@ -15,6 +17,8 @@ if "item_data" not in st.session_state:
     st.session_state.item_data = None
 if "last_item_concept" not in st.session_state:
     st.session_state.last_item_concept = ""
+if "item_pending" not in st.session_state:
+    st.session_state.item_pending = None
 
 # -----------------------------------------------------------------------------
 # 2. THE VISUAL ENGINE
@@ -24,7 +28,7 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. CORE LOGIC
 # -----------------------------------------------------------------------------
-def forge_item(concept, rarity):
+def forge_item(concept, rarity, candidates=1):
     # 1. GENERATE TEXT
     with st.spinner(f"The Anvil rings..."):
         try:
@@ -33,22 +37,41 @@ def forge_item(concept, rarity):
             st.error(f"Failed to forge item text: {e}")
             return None
 
-    # 2. GENERATE IMAGE
+    # 2. GENERATE IMAGE — every candidate comes from a single request
     with st.spinner("Enchanting the Form..."):
         try:
-            image_bytes = llm_service.generate_item_image(
+            images = llm_service.generate_item_image(
                 item_data.get('Visual_Desc', ''), 
-                item_data.get('Type', 'Wondrous Item')
+                item_data.get('Type', 'Wondrous Item'),
+                candidates=candidates,
             )
-            
-            b64_encoded = base64.b64encode(image_bytes).decode("utf-8")
-            data_uri = f"data:image/jpeg;base64,{b64_encoded}"
-            
-            # ---> UPLOAD TO CLOUDINARY <---
-            item_data["image_url"] = storage_service.upload_image_to_cdn(data_uri, folder="The_Forge")
+            images = images if candidates > 1 else [images]
         except Exception as e:
             st.warning(f"Could not forge visual form: {e}")
+            images = []
+
+    # Several candidates: nothing is kept until one is chosen.
+    if len(images) > 1:
+        st.session_state.item_pending = {"data": item_data, "rarity": rarity, "images": images}
+        return None
+    return temper_item(item_data, rarity, images[0] if images else None)
+
+def temper_item(item_data, rarity, image_bytes):
+    """Uploads the artifact's image and queues its save to the Armory."""
+    with st.spinner("Tempering the artifact..."):
+        if image_bytes is None:
+            # Generation already failed and said so; there is nothing to upload.
             item_data["image_url"] = "Image Upload Failed"
+        else:
+            try:
+                b64_encoded = base64.b64encode(image_bytes).decode("utf-8")
+                data_uri = f"data:image/jpeg;base64,{b64_encoded}"
+
+                # ---> UPLOAD TO CLOUDINARY <---
+                item_data["image_url"] = storage_service.upload_image_to_cdn(data_uri, folder="The_Forge")
+            except Exception as e:
+                st.warning(f"Could not forge visual form: {e}")
+                item_data["image_url"] = "Image Upload Failed"
 
         # ---> 3. SAVE TO GOOGLE SHEETS <---
         try:
@@ -63,13 +86,39 @@ def forge_item(concept, rarity):
                 current_time                       
             ]
             
-            db_service.insert_item(row_to_save)
+            st.session_state.db_ticket = db_service.insert_item(row_to_save)
             st.session_state.db_status = f"Success! {item_data.get('Name')} saved to the Armory."
         except Exception as e:
             st.session_state.db_status = f"Armory Exception: {str(e)}"
 
         return item_data
 
+@card_cache.cached_card("item")
+def build_item_card(data: dict, rarity: str = "") -> str:
+    """Builds the forged artifact's character-card HTML."""
+    card_html = ""
+    card_html += f'<div class="character-card">'
+    card_html += f'  <div class="card-header">'
+    card_html += f'    <div class="card-name">{data.get("Name", "Unknown Artifact")}</div>'
+    card_html += f'    <div class="card-class" style="color:#c9a347;">{data.get("Type", "Wondrous Item")} • {rarity}</div>'
+    card_html += f'  </div>'
+    card_html += f'  <div class="img-container">'
+    if data.get("image_url", "").startswith("http"):
+        card_html += f'    <a href="{data["image_url"]}" target="_blank">'
+        card_html += f'      <img src="{data["image_url"]}" title="Click to Expand">'
+        card_html += f'    </a>'
+    else:
+        card_html += f'    <div style="height:400px; display:flex; align-items:center; justify-content:center; color:#555;">No Visage Found</div>'
+    card_html += f'  </div>'
+    card_html += f'  <div class="visual-caption">"{data.get("Visual_Desc", "")}"</div>'
+    card_html += f'  <hr class="seam">'
+    card_html += f'  <div class="lore-section">'
+    card_html += f'    <span class="lore-label">Lore</span>'
+    card_html += f'    {data.get("Lore", "")}'
+    card_html += f'  </div>'
+    card_html += f'</div>'
+    return card_html
+
 # -----------------------------------------------------------------------------
 # 4. LAYOUT
 # -----------------------------------------------------------------------------
@@ -79,6 +128,7 @@ st.markdown("<h1>THE FORGE</h1>", unsafe_allow_html=True)
 st.markdown("<div class='subtext'>Forge artifacts of power and ruin...</div>", unsafe_allow_html=True)
 
 st.sidebar.markdown('<div class="sidebar-header">The Forge</div>', unsafe_allow_html=True)
+candidates = gallery.candidate_count("item_candidates")
 
 with st.form("armory_form"):
     user_input = st.text_input(
@@ -107,48 +157,47 @@ with st.form("armory_form"):
 
 if submitted and user_input:
     st.session_state.last_item_concept = user_input
-    st.session_state.item_data = forge_item(user_input, selected_rarity) 
+    st.session_state.item_pending = None
+    st.session_state.item_data = forge_item(user_input, selected_rarity, candidates=candidates)
     st.rerun()
 
 # -----------------------------------------------------------------------------
 # 5. RESULT & MODIFIERS
 # -----------------------------------------------------------------------------
-if st.session_state.item_data:
+# Candidate images wait here; only the chosen one is uploaded and saved.
+pending = st.session_state.item_pending
+if pending:
+    st.markdown(build_item_card(pending["data"], rarity=pending["rarity"]), unsafe_allow_html=True)
+    st.markdown(
+        "<div class='subtext'>Choose the form to temper. The others return to the fire.</div>",
+        unsafe_allow_html=True,
+    )
+    choice = gallery.pick_one("item_form", pending["images"])
+    if choice is not None:
+        st.session_state.item_pending = None
+        st.session_state.item_data = temper_item(pending["data"], pending["rarity"], pending["images"][choice])
+        st.rerun()
+elif st.session_state.item_data:
     data = st.session_state.item_data
     if "db_status" in st.session_state:
+        # Saves are queued; a failed batch write surfaces on the next render.
+        error = db_service.ticket_error(st.session_state.get("db_ticket"))
+        if error:
+            st.session_state.db_status = f"Armory Exception: {error}"
         # If success, show green. If error, show yellow.
         if "Success!" in st.session_state.db_status:
             st.success(st.session_state.db_status)
         else:
             st.warning(st.session_state.db_status)
     
-    card_html = ""
-    card_html += f'<div class="character-card">'
-    card_html += f'  <div class="card-header">'
-    card_html += f'    <div class="card-name">{data.get("Name", "Unknown Artifact")}</div>'
-    card_html += f'    <div class="card-class" style="color:#c9a347;">{data.get("Type", "Wondrous Item")} • {selected_rarity}</div>'
-    card_html += f'  </div>'
-    card_html += f'  <div class="img-container">'
-    if data.get("image_url", "").startswith("http"):
-        card_html += f'    <a href="{data["image_url"]}" target="_blank">'
-        card_html += f'      <img src="{data["image_url"]}" title="Click to Expand">'
-        card_html += f'    </a>'
-    else:
-        card_html += f'    <div style="height:400px; display:flex; align-items:center; justify-content:center; color:#555;">No Visage Found</div>'
-    card_html += f'  </div>'
-    card_html += f'  <div class="visual-caption">"{data.get("Visual_Desc", "")}"</div>'
-    card_html += f'  <hr class="seam">'
-    card_html += f'  <div class="lore-section">'
-    card_html += f'    <span class="lore-label">Lore</span>'
-    card_html += f'    {data.get("Lore", "")}'
-    card_html += f'  </div>'
-    card_html += f'</div>'
-    st.markdown(card_html, unsafe_allow_html=True)
+    st.markdown(build_item_card(data, rarity=selected_rarity), unsafe_allow_html=True)
 
     st.markdown("<br><br>", unsafe_allow_html=True)
     
     if st.button("REROLL ARTIFACT", use_container_width=True, type="secondary"):
-        st.session_state.item_data = forge_item(st.session_state.last_item_concept, selected_rarity)
+        st.session_state.item_data = forge_item(
+            st.session_state.last_item_concept, selected_rarity, candidates=candidates
+        )
         st.rerun()
 
 runes = ["ᛟ", "ᚠ", "᛫", "ᛟ", "ᚢ", "ᚱ"]
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 import base64
 
 import utils.styles as styles
+import utils.pager as pager
+import utils.card_cache as card_cache
 from services import db_service, llm_service, storage_service
 
 # -----------------------------------------------------------------------------
@@ -18,17 +19,58 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. FETCH DATA
 # -----------------------------------------------------------------------------
+# Only the sidebar's facets are read up front; the grid asks for its page below.
+# Each option's count honours the other filter, so it shows what choosing it would leave.
+chosen = {'Rarity': st.session_state.get("facet_rarity", "All"), 'Type': st.session_state.get("facet_type", "All")}
+chosen = {col: val for col, val in chosen.items() if val != "All"}
 try:
-    df = db_service.get_all_items()
+    rarity_counts = dict(db_service.facet_counts("Magic Items", "Rarity", chosen))
+    type_counts = dict(db_service.facet_counts("Magic Items", "Type", chosen))
 except Exception as e:
     st.error(f"Could not read from Vault: {e}")
     st.stop()
 
+# -----------------------------------------------------------------------------
+# 4. CARD RENDERING
+# -----------------------------------------------------------------------------
+@card_cache.cached_card("item_archive")
+def build_archive_card(row) -> str:
+    """One grid card: thumbnail, name, type and the Rarity pill."""
+    img_src = row.get('Image_URL', '')
+    if not str(img_src).startswith("http"):
+        img_src = "https://via.placeholder.com/400x400?text=No+Visage"
+
+    # PERFORMANCE FIX: Cloudinary optimized thumbnails
+    if "cloudinary" in img_src and "/upload/" in img_src:
+        img_src = img_src.replace("/upload/", "/upload/c_fill,g_center,w_400,h_400,q_auto,f_auto/")
+
+    html = ""
+    html += '<div class="archive-card">'
+    html += '<div class="img-frame">'
+    html += f'<img src="{img_src}" loading="lazy">'
+    html += '</div>'
+    html += '<div class="card-identity">'
+
+    html += '<div class="identity-top">'
+    html += f'<div class="card-name">{row.get("Name", "Unknown")}</div>'
+    html += f'<div class="card-class" style="color: #c9a347;">{row.get("Type", "Item")}</div>'
+    html += '</div>'
+
+    # --- PILLS ---
+    html += '<div class="pill-container">'
+    if row.get('Rarity'):
+        html += f'<div class="pill-base pill-metal">{row.get("Rarity", "")}</div>'
+    html += '</div>'
+
+    html += '</div>'
+    html += '</div>'
+    return html
+
 # -----------------------------------------------------------------------------
 # 5. THE MODAL (POP UP FUNCTION) - CLEAN
 # -----------------------------------------------------------------------------
 @st.dialog("The Reliquary Opens...", width="large")
-def view_item(row, index_in_sheet):
+def view_item(row, entity_id):
     img_src = row.get('Image_URL', '')
     if not str(img_src).startswith("http"):
         img_src = "https://via.placeholder.com/800x800?text=No+Visage"
@@ -49,6 +91,21 @@ def view_item(row, index_in_sheet):
         </div>
         """, unsafe_allow_html=True)
         st.markdown(f"<div class='modal-visual'>{row.get('Visual_Desc', '')}</div>", unsafe_allow_html=True)
+
+        # --- KINDRED (closest in look and lore, from the similarity index) ---
+        kindred = db_service.related_records("Magic Items", entity_id)
+        if not kindred.empty:
+            st.markdown("<div style='font-family:Cinzel; color:#95b4a7; margin:16px 0 8px;'>🜂 Kindred Relics</div>", unsafe_allow_html=True)
+            for kin_col, (_, kin) in zip(st.columns(len(kindred)), kindred.iterrows()):
+                kin_src = str(kin.get('Image_URL', ''))
+                if not kin_src.startswith("http"):
+                    kin_src = "https://via.placeholder.com/150x200?text=No+Visage"
+                elif "cloudinary" in kin_src and "/upload/" in kin_src:
+                    kin_src = kin_src.replace("/upload/", "/upload/c_fill,g_auto,w_150,h_200,q_auto,f_auto/")
+                kin_col.markdown(f"""
+                    <img src="{kin_src}" loading="lazy" style="width:100%; border:1px solid #333; border-radius:2px;">
+                    <div style="font-family:Cinzel; font-size:0.7rem; color:#aaa; text-align:center; margin-top:4px;">{kin.get('Name', '')}</div>
+                """, unsafe_allow_html=True)
         
     with col2:
         st.markdown(f"""
@@ -62,11 +119,11 @@ def view_item(row, index_in_sheet):
         st.markdown("<hr style='border: 1px solid #222; margin: 20px 0;'>", unsafe_allow_html=True)
         st.markdown("<div style='font-family:Cinzel; color:#95b4a7; margin-bottom:8px;'>✨ Reforge Artifact (Fast Lane)</div>", unsafe_allow_html=True)
         
-        preview_key = f"pending_item_preview_{index_in_sheet}"
+        preview_key = f"pending_item_preview_{entity_id}"
         
-        tweak_prompt = st.text_input("Tweak visual details", placeholder="e.g., 'Make it glow blue', 'Wrap it in chains'", label_visibility="collapsed", key=f"tweak_{index_in_sheet}")
+        tweak_prompt = st.text_input("Tweak visual details", placeholder="e.g., 'Make it glow blue', 'Wrap it in chains'", label_visibility="collapsed", key=f"tweak_{entity_id}")
         
-        if st.button("REFORGE IMAGE", type="primary", use_container_width=True, key=f"btn_reforge_{index_in_sheet}"):
+        if st.button("REFORGE IMAGE", type="primary", use_container_width=True, key=f"btn_reforge_{entity_id}"):
             if not tweak_prompt:
                 st.warning("Please enter a tweak description.")
             else:
@@ -99,18 +156,18 @@ def view_item(row, index_in_sheet):
             
             btn_col1, btn_col2 = st.columns(2)
             with btn_col1:
-                if st.button("↩ KEEP ORIGINAL", use_container_width=True, key=f"keep_{index_in_sheet}"):
+                if st.button("↩ KEEP ORIGINAL", use_container_width=True, key=f"keep_{entity_id}"):
                     del st.session_state[preview_key]
                     st.rerun()
             with btn_col2:
-                if st.button("✅ ACCEPT NEW", type="primary", use_container_width=True, key=f"accept_{index_in_sheet}"):
+                if st.button("✅ ACCEPT NEW", type="primary", use_container_width=True, key=f"accept_{entity_id}"):
                     with st.spinner("Inscribing new artifact..."):
                         try:
                             img_bytes = st.session_state[preview_key]["bytes"]
                             b64_encoded = base64.b64encode(img_bytes).decode("utf-8")
                             data_uri = f"data:image/jpeg;base64,{b64_encoded}"
                             new_image_url = storage_service.upload_image_to_cdn(data_uri, folder="The_Forge")
-                            db_service.update_item_image(index_in_sheet + 2, new_image_url)
+                            db_service.update_item_image(entity_id, new_image_url)
                             del st.session_state[preview_key]
                             st.session_state["show_success_toast"] = True
                             st.rerun()
@@ -132,102 +189,107 @@ if st.session_state.get("show_success_toast"):
 # --- SIDEBAR FILTERS ---
 st.sidebar.markdown('<div class="sidebar-header">Filter Reliquary</div>', unsafe_allow_html=True)
 
-if not df.empty:
-    rarities = ["All"]
-    if 'Rarity' in df.columns:
-        unique_rarities = sorted([str(x) for x in df['Rarity'].unique() if str(x).strip() != "" and str(x).lower() != "nan"])
-        rarities.extend(unique_rarities)
-    sel_rarity = st.sidebar.selectbox("Rarity", rarities)
-    
-    types = ["All"]
-    if 'Type' in df.columns:
-        unique_types = sorted([str(x) for x in df['Type'].unique() if str(x).strip() != "" and str(x).lower() != "nan"])
-        types.extend(unique_types)
-    sel_type = st.sidebar.selectbox("Item Type", types)
-else:
-    sel_rarity = "All"
-    sel_type = "All"
+sel_rarity = st.sidebar.selectbox(
+    "Rarity", ["All"] + list(rarity_counts), key="facet_rarity",
+    format_func=lambda v: v if v == "All" else f"{v} ({rarity_counts[v]})"
+)
+sel_type = st.sidebar.selectbox(
+    "Item Type", ["All"] + list(type_counts), key="facet_type",
+    format_func=lambda v: v if v == "All" else f"{v} ({type_counts[v]})"
+)
 
 # --- SEARCH & FILTER LOGIC ---
 search_query = st.text_input("Search the Reliquary", placeholder="Search by name, lore, or type...")
+semantic = st.toggle("Search by meaning", key="semantic_mode", help="Find artifacts whose look and lore resemble your words, not only those containing them.")
 
-filtered_df = df.copy()
-
+filters = {}
 if sel_rarity != "All":
-    filtered_df['Rarity'] = filtered_df['Rarity'].astype(str)
-    filtered_df = filtered_df[filtered_df['Rarity'] == sel_rarity]
-
+    filters['Rarity'] = sel_rarity
 if sel_type != "All":
-    filtered_df['Type'] = filtered_df['Type'].astype(str)
-    filtered_df = filtered_df[filtered_df['Type'] == sel_type]
-
-if search_query:
-    mask = (
-        filtered_df['Name'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Type'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Lore'].astype(str).str.contains(search_query, case=False) |
-        filtered_df['Rarity'].astype(str).str.contains(search_query, case=False)
-    )
-    filtered_df = filtered_df[mask]
+    filters['Type'] = sel_type
+
+# --- BULK EDIT (one batched write for every chosen artifact) ---
+# Off by default: choosing from the whole view means reading every match.
+if st.toggle("Bulk inscription", key="bulk_mode"):
+    matches = db_service.query_matches("Magic Items", filters, search_query, semantic)
+    if not matches.empty and 'ID' in matches.columns:
+        item_names = dict(zip(matches['ID'], matches['Name']))
+        take_all = st.checkbox(f"Every artifact in this view ({len(item_names)})", key="bulk_all")
+        bulk_ids = list(item_names) if take_all else st.multiselect(
+            "Artifacts", list(item_names), format_func=item_names.get,
+            placeholder="Choose artifacts from the current search...", key="bulk_ids"
+        )
+        bulk_c1, bulk_c2 = st.columns(2)
+        with bulk_c1:
+            bulk_rarity = st.selectbox(
+                "Rarity", ["Keep", "Common", "Uncommon", "Rare", "Very Rare", "Legendary", "Artifact"],
+                key="bulk_rarity"
+            )
+        with bulk_c2:
+            bulk_type = st.text_input("Item Type", placeholder="Leave blank to keep", key="bulk_type")
+
+        if st.button("INSCRIBE ALL", type="primary", key="bulk_save", disabled=not bulk_ids):
+            fields = {}
+            if bulk_rarity != "Keep":
+                fields["Rarity"] = bulk_rarity
+            if bulk_type.strip():
+                fields["Type"] = bulk_type.strip()
+            if not fields:
+                st.warning("Choose a Rarity or enter an Item Type to inscribe.")
+            else:
+                try:
+                    db_service.update_records("Magic Items", [(entity_id, fields) for entity_id in bulk_ids])
+                    st.toast(f"{len(bulk_ids)} artifacts inscribed.", icon="✒️")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
 # --- GRID ---
-MAX_DISPLAY = 30
-
-if not filtered_df.empty:
-    
-    # 1. SORTING LOGIC: Latest First
-    if 'Timestamp' in filtered_df.columns:
-        filtered_df['Timestamp_Temp'] = pd.to_datetime(filtered_df['Timestamp'], errors='coerce')
-        filtered_df = filtered_df.sort_values(by='Timestamp_Temp', ascending=False)
-    else:
-        filtered_df = filtered_df.iloc[::-1]
-
-    # Cap displayed entries
-    display_df = filtered_df.head(MAX_DISPLAY)
-
-    cols = st.columns(3)
-    
-    for i, (index, row) in enumerate(display_df.iterrows()): 
-        col_index = i % 3
-        img_src = row.get('Image_URL', '')
-        if not str(img_src).startswith("http"):
-            img_src = "https://via.placeholder.com/400x400?text=No+Visage"
-
-        # PERFORMANCE FIX: Cloudinary optimized thumbnails
-        if "cloudinary" in img_src and "/upload/" in img_src:
-            img_src = img_src.replace("/upload/", "/upload/c_fill,g_center,w_400,h_400,q_auto,f_auto/")
-
-        with cols[col_index]:
-            html = ""
-            html += '<div class="archive-card">'
-            html += '<div class="img-frame">'
-            html += f'<img src="{img_src}" loading="lazy">'
-            html += '</div>'
-            html += '<div class="card-identity">'
-            
-            html += '<div class="identity-top">'
-            html += f'<div class="card-name">{row.get("Name", "Unknown")}</div>'
-            html += f'<div class="card-class" style="color: #c9a347;">{row.get("Type", "Item")}</div>'
-            html += '</div>'
-            
-            # --- PILLS ---
-            html += '<div class="pill-container">'
-            if row.get('Rarity'):
-                 html += f'<div class="pill-base pill-metal">{row.get("Rarity", "")}</div>'
-            html += '</div>'
-            
-            html += '</div>'
-            html += '</div>' 
-            st.markdown(html, unsafe_allow_html=True)
-            
-            # ACTIONS
-            b_col1, b_col2 = st.columns([0.8, 0.2])
+PAGE_SIZE = 30
+WHOLE_ROWS = True  # send each row of three cards as a single st.markdown
+
+# Latest first, one page at a time: only the cards on screen are read, and only
+# they get widgets. The page cursor lives in session_state.
+cursor = pager.page_cursor("item_pager", (tuple(sorted(filters.items())), search_query, semantic))
+try:
+    display_df, total_matches, next_cursor = db_service.query_page(
+        "Magic Items", page_size=PAGE_SIZE, filters=filters, search=search_query, semantic=semantic, cursor=cursor
+    )
+except Exception as e:
+    st.error(f"Could not read from Vault: {e}")
+    st.stop()
+
+
+if not display_df.empty:
+
+    # One st.markdown per grid row (WHOLE_ROWS) or per card; either way the
+    # card HTML comes from the card cache.
+    page_rows = list(display_df.iterrows())
+    for start in range(0, len(page_rows), 3):
+        chunk = page_rows[start:start + 3]
+        cards = [build_archive_card(row) for _, row in chunk]
+        if WHOLE_ROWS:
+            st.markdown(card_cache.grid_row(cards, 3), unsafe_allow_html=True)
+        cols = st.columns(3)
+
+        for col, card, (_, row) in zip(cols, cards, chunk):
+            entity_id = row.get('ID', '')
+            with col:
+                if not WHOLE_ROWS:
+                    st.markdown(card, unsafe_allow_html=True)
+
+                # ACTIONS
+                b_col1, b_col2 = st.columns([0.8, 0.2])
             
-            with b_col1:
-                if st.button(f"INSPECT ᛦ", key=f"inspect_{index}", type="primary", use_container_width=True):
-                    view_item(row, index)
+                with b_col1:
+                    if st.button(f"INSPECT ᛦ", key=f"inspect_{entity_id}", type="primary", use_container_width=True):
+                        view_item(row, entity_id)
             
-            with b_col2:
-                # We don't have a delete_item function in db_service yet, so we will omit the burn button for now
-                # to prevent accidentally deleting NPCs if the indices don't align.
-                pass
+                with b_col2:
+                    # We don't have a delete_item function in db_service yet, so we will omit the burn button for now
+                    # to prevent accidentally deleting NPCs if the indices don't align.
+                    pass
+
+# --- PAGER ---
+pager.render_pager("item_pager", next_cursor, total_matches, PAGE_SIZE, "artifacts")
+card_cache.render_stats()
@@ -4,6 +4,8 @@ import base64
 import html
 
 import utils.styles as styles
+import utils.card_cache as card_cache
+import utils.gallery as gallery
 from services import llm_service, storage_service, db_service
 
 # -----------------------------------------------------------------------------
@@ -15,6 +17,8 @@ if "creature_data" not in st.session_state:
     st.session_state.creature_data = None
 if "last_creature_concept" not in st.session_state:
     st.session_state.last_creature_concept = ""
+if "creature_pending" not in st.session_state:
+    st.session_state.creature_pending = None
 
 # -----------------------------------------------------------------------------
 # 2. THE VISUAL ENGINE
@@ -24,18 +28,30 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. CORE LOGIC
 # -----------------------------------------------------------------------------
-def conjure_creature(concept: str, tone: str):
+def conjure_creature(concept: str, tone: str, candidates: int = 1):
     """Concept in, creature out: the Vault's eye sharpens it, the image model
     renders it, and it is caged in the Vault. Returns the result, or None on failure.
+
+    With candidates > 1 the images come from one request and wait in
+    st.session_state.creature_pending for the DM to pick one; None is returned.
     """
     with st.spinner("The Menagerie stirs..."):
         try:
             description = llm_service.enhance_prompt(concept, "creature", tone)
-            image_bytes = llm_service.generate_image(description, "creature", tone)
+            images = llm_service.generate_image(description, "creature", tone, candidates=candidates)
+            images = images if candidates > 1 else [images]
         except Exception as e:
             st.error(f"The beast would not take form: {e}")
             return None
 
+    if len(images) > 1:
+        st.session_state.creature_pending = {"concept": concept, "tone": tone, "images": images}
+        return None
+    return cage_creature(concept, tone, images[0])
+
+
+def cage_creature(concept: str, tone: str, image_bytes: bytes):
+    """Uploads the creature's image and queues it for the Vault."""
     try:
         b64_encoded = base64.b64encode(image_bytes).decode("utf-8")
         data_uri = f"data:image/jpeg;base64,{b64_encoded}"
@@ -44,7 +60,7 @@ def conjure_creature(concept: str, tone: str):
         image_url = "Image Upload Failed"
 
     try:
-        db_service.insert_creature(
+        st.session_state.db_ticket = db_service.insert_creature(
             [concept, tone, image_url, str(datetime.datetime.now())]
         )
         st.session_state.db_status = "Success! The beast was caged in the Vault."
@@ -54,6 +70,7 @@ def conjure_creature(concept: str, tone: str):
     return {"concept": concept, "image_url": image_url}
 
 
+@card_cache.cached_card("creature")
 def build_creature_card(data: dict) -> str:
     """The framed presentation: the conjured image, the concept inscribed beneath."""
     concept = html.escape(str(data.get("concept", "")))
@@ -83,6 +100,7 @@ st.markdown("<h1>THE MENAGERIE</h1>", unsafe_allow_html=True)
 st.markdown("<div class='subtext'>Summon the beasts that prowl the edges of the world.</div>", unsafe_allow_html=True)
 
 st.sidebar.markdown('<div class="sidebar-header">The Menagerie</div>', unsafe_allow_html=True)
+candidates = gallery.candidate_count("creature_candidates")
 
 with st.form("menagerie_form"):
     user_input = st.text_input(
@@ -111,17 +129,38 @@ with st.form("menagerie_form"):
 
 if submitted and user_input:
     st.session_state.last_creature_concept = user_input
-    st.session_state.creature_data = conjure_creature(user_input, selected_vibe)
+    st.session_state.creature_pending = None
+    st.session_state.creature_data = conjure_creature(user_input, selected_vibe, candidates=candidates)
 
 # -----------------------------------------------------------------------------
 # 5. RESULT
 # -----------------------------------------------------------------------------
-if st.session_state.creature_data:
+# Candidate images wait here; only the chosen one is uploaded and caged.
+pending = st.session_state.creature_pending
+if pending:
+    st.markdown(
+        "<div class='subtext'>Choose the beast to cage. The others slip back into the dark.</div>",
+        unsafe_allow_html=True,
+    )
+    choice = gallery.pick_one("creature_form", pending["images"])
+    if choice is not None:
+        st.session_state.creature_pending = None
+        st.session_state.creature_data = cage_creature(pending["concept"], pending["tone"], pending["images"][choice])
+        st.rerun()
+elif st.session_state.creature_data:
     data = st.session_state.creature_data
     if "db_status" in st.session_state:
+        # Saves are queued; a failed batch write surfaces on the next render.
+        error = db_service.ticket_error(st.session_state.get("db_ticket"))
+        if error:
+            st.session_state.db_status = f"Vault Exception: {error}"
         if "Success!" in st.session_state.db_status:
             st.success(st.session_state.db_status)
         else:
             st.warning(st.session_state.db_status)
 
     st.markdown(build_creature_card(data), unsafe_allow_html=True)
+
+gen_stats = llm_service.generation_stats()
+if gen_stats:
+    st.sidebar.caption(f"Generation cache: {gen_stats['hit_rate']:.0%} hits · {gen_stats['bytes'] / 1024:.0f} KB stored")
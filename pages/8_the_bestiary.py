@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 import html
 
 import utils.styles as styles
+import utils.pager as pager
+import utils.card_cache as card_cache
 from services import db_service
 
 # -----------------------------------------------------------------------------
@@ -18,14 +19,54 @@ styles.load_css()
 # -----------------------------------------------------------------------------
 # 3. FETCH DATA
 # -----------------------------------------------------------------------------
+# Only the sidebar's facets are read up front; the grid asks for its page below.
 try:
-    df = db_service.get_all_creatures()
+    tone_counts = dict(db_service.facet_counts("Creatures", "Tone"))
 except Exception as e:
     st.error(f"Could not read from the Vault: {e}")
     st.stop()
 
 # -----------------------------------------------------------------------------
-# 4. LAYOUT
+# 4. CARD RENDERING
+# -----------------------------------------------------------------------------
+@card_cache.cached_card("beast_archive")
+def build_beast_card(row) -> str:
+    """One grid card: the beast (linking to the full image), its concept and Resonance."""
+    original = str(row.get('Image_URL', ''))
+    if original.startswith("http"):
+        thumb = original
+        if "cloudinary" in thumb and "/upload/" in thumb:
+            thumb = thumb.replace("/upload/", "/upload/c_fill,g_auto,w_400,h_533,q_auto,f_auto/")
+    else:
+        original = "https://via.placeholder.com/400x533?text=No+Visage"
+        thumb = original
+
+    raw_concept = str(row.get('Concept', ''))
+    if len(raw_concept) > 75:
+        raw_concept = raw_concept[:72] + "..."
+    concept = html.escape(raw_concept)
+    tone = html.escape(str(row.get('Tone', '')))
+
+    return (
+        '<div class="archive-card">'
+        '<div class="img-frame">'
+        f'<a href="{original}" target="_blank" style="display:block; width:100%; height:100%;">'
+        f'<img src="{thumb}" loading="lazy"></a>'
+        '</div>'
+        '<div class="card-identity">'
+        '<div class="identity-top">'
+        '<div style="font-family:Cormorant Garamond,serif; font-style:italic; '
+        f'color:#aaa; font-size:1.05rem; line-height:1.4; text-align:center; padding:0 0.6rem;">{concept}</div>'
+        '</div>'
+        '<div class="pill-container">'
+        f'<div class="pill-base pill-metal">{tone}</div>'
+        '</div>'
+        '</div>'
+        '</div>'
+    )
+
+# -----------------------------------------------------------------------------
+# 5. LAYOUT
 # -----------------------------------------------------------------------------
 st.page_link("1_the_vault.py", label="< RETURN TO VAULT", use_container_width=False)
 
@@ -35,70 +76,48 @@ st.markdown("<div class='subtext'>Every beast ever summoned — caged, catalogue
 st.sidebar.markdown('<div class="sidebar-header">Filter the Bestiary</div>', unsafe_allow_html=True)
 
 # --- FILTERS ---
-if not df.empty and 'Tone' in df.columns:
-    unique_tones = sorted([str(x) for x in df['Tone'].unique() if str(x).strip() and str(x).lower() != "nan"])
-    sel_tone = st.sidebar.selectbox("Resonance", ["All"] + unique_tones)
-else:
-    sel_tone = "All"
+sel_tone = st.sidebar.selectbox(
+    "Resonance", ["All"] + list(tone_counts), key="facet_tone",
+    format_func=lambda v: v if v == "All" else f"{v} ({tone_counts[v]})"
+) if tone_counts else "All"
 
 search_query = st.text_input("Search the Bestiary", placeholder="Search by description...")
+semantic = st.toggle("Search by meaning", key="semantic_mode", help="Find beasts whose description resembles your words, not only those containing them.")
 
-filtered_df = df.copy()
-if sel_tone != "All" and 'Tone' in filtered_df.columns:
-    filtered_df = filtered_df[filtered_df['Tone'].astype(str) == sel_tone]
-if search_query and 'Concept' in filtered_df.columns:
-    filtered_df = filtered_df[filtered_df['Concept'].astype(str).str.contains(search_query, case=False, na=False)]
+filters = {'Tone': sel_tone} if sel_tone != "All" else {}
 
 # --- GRID ---
-MAX_DISPLAY = 30
+PAGE_SIZE = 30
+WHOLE_ROWS = True  # send each row of three cards as a single st.markdown
 
-if filtered_df.empty:
+# Latest first, one page at a time: only the cards on screen are read, and only
+# they get widgets. The page cursor lives in session_state.
+cursor = pager.page_cursor("beast_pager", (tuple(sorted(filters.items())), search_query, semantic))
+try:
+    display_df, total_matches, next_cursor = db_service.query_page(
+        "Creatures", page_size=PAGE_SIZE, filters=filters, search=search_query, semantic=semantic, cursor=cursor
+    )
+except Exception as e:
+    st.error(f"Could not read from the Vault: {e}")
+    st.stop()
+
+if display_df.empty:
     st.markdown(
         "<div class='subtext'>The Bestiary is empty. Summon your first beast in The Menagerie.</div>",
         unsafe_allow_html=True,
     )
 else:
-    if 'Timestamp' in filtered_df.columns:
-        filtered_df['_ts'] = pd.to_datetime(filtered_df['Timestamp'], errors='coerce')
-        filtered_df = filtered_df.sort_values(by='_ts', ascending=False)
+    # One st.markdown per grid row (WHOLE_ROWS) or per card; either way the
+    # card HTML comes from the card cache.
+    cards = [build_beast_card(row) for _, row in display_df.iterrows()]
+    if WHOLE_ROWS:
+        for start in range(0, len(cards), 3):
+            st.markdown(card_cache.grid_row(cards[start:start + 3], 3), unsafe_allow_html=True)
     else:
-        filtered_df = filtered_df.iloc[::-1]
-
-    display_df = filtered_df.head(MAX_DISPLAY)
-    cols = st.columns(3)
-
-    for i, (_, row) in enumerate(display_df.iterrows()):
-        original = str(row.get('Image_URL', ''))
-        if original.startswith("http"):
-            thumb = original
-            if "cloudinary" in thumb and "/upload/" in thumb:
-                thumb = thumb.replace("/upload/", "/upload/c_fill,g_auto,w_400,h_533,q_auto,f_auto/")
-        else:
-            original = "https://via.placeholder.com/400x533?text=No+Visage"
-            thumb = original
-
-        raw_concept = str(row.get('Concept', ''))
-        if len(raw_concept) > 75:
-            raw_concept = raw_concept[:72] + "..."
-        concept = html.escape(raw_concept)
-        tone = html.escape(str(row.get('Tone', '')))
-
-        with cols[i % 3]:
-            card = (
-                '<div class="archive-card">'
-                '<div class="img-frame">'
-                f'<a href="{original}" target="_blank" style="display:block; width:100%; height:100%;">'
-                f'<img src="{thumb}" loading="lazy"></a>'
-                '</div>'
-                '<div class="card-identity">'
-                '<div class="identity-top">'
-                '<div style="font-family:Cormorant Garamond,serif; font-style:italic; '
-                f'color:#aaa; font-size:1.05rem; line-height:1.4; text-align:center; padding:0 0.6rem;">{concept}</div>'
-                '</div>'
-                '<div class="pill-container">'
-                f'<div class="pill-base pill-metal">{tone}</div>'
-                '</div>'
-                '</div>'
-                '</div>'
-            )
-            st.markdown(card, unsafe_allow_html=True)
+        cols = st.columns(3)
+        for i, card in enumerate(cards):
+            cols[i % 3].markdown(card, unsafe_allow_html=True)
+
+# --- PAGER ---
+pager.render_pager("beast_pager", next_cursor, total_matches, PAGE_SIZE, "beasts")
+card_cache.render_stats()
@@ -0,0 +1,134 @@
+import streamlit as st
+import html
+
+import utils.styles as styles
+import utils.card_cache as card_cache
+from services import db_service
+
+# -----------------------------------------------------------------------------
+# 1. PAGE CONFIGURATION
+# -----------------------------------------------------------------------------
+st.set_page_config(page_title="The Oracle", page_icon="🔮", layout="wide")
+
+# -----------------------------------------------------------------------------
+# 2. THE VISUAL ENGINE
+# -----------------------------------------------------------------------------
+styles.load_css()
+
+# -----------------------------------------------------------------------------
+# 3. THE ARCHIVES — what each tab is called here, and where its archive lives
+# -----------------------------------------------------------------------------
+ARCHIVES = {
+    "NPCs": {"title": "Souls", "page": "pages/3_npc_archives.py", "link": "NPC ARCHIVES"},
+    "Magic Items": {"title": "Artifacts", "page": "pages/5_item_archives.py", "link": "THE RELIQUARY"},
+    "Creatures": {"title": "Beasts", "page": "pages/8_the_bestiary.py", "link": "THE BESTIARY"},
+}
+GROUP_STEP = 6  # cards drawn per archive at first, and per "Reveal more"
+
+# -----------------------------------------------------------------------------
+# 4. CARD RENDERING
+# -----------------------------------------------------------------------------
+@card_cache.cached_card("oracle")
+def build_result_card(row, tab: str = "") -> str:
+    """One result card: thumbnail, name (or concept) and the record's kind."""
+    img_src = str(row.get('Image_URL', ''))
+    if not img_src.startswith("http"):
+        img_src = "https://via.placeholder.com/400x400?text=No+Visage"
+    if "cloudinary" in img_src and "/upload/" in img_src:
+        img_src = img_src.replace("/upload/", "/upload/c_fill,g_auto,w_400,h_400,q_auto,f_auto/")
+
+    if tab == "Creatures":
+        name = str(row.get('Concept', ''))
+        if len(name) > 60:
+            name = name[:57] + "..."
+        kind = row.get('Tone', '')
+    elif tab == "Magic Items":
+        name = row.get('Name', 'Unknown')
+        kind = " · ".join(v for v in (str(row.get('Rarity', '')), str(row.get('Type', ''))) if v)
+    else:
+        name = row.get('Name', 'Unknown')
+        kind = row.get('Class', '')
+
+    return (
+        '<div class="archive-card">'
+        '<div class="img-frame">'
+        f'<img src="{img_src}" loading="lazy">'
+        '</div>'
+        '<div class="card-identity">'
+        '<div class="identity-top">'
+        f'<div class="card-name">{html.escape(str(name))}</div>'
+        f'<div class="card-class">{html.escape(str(kind))}</div>'
+        '</div>'
+        '</div>'
+        '</div>'
+    )
+
+# -----------------------------------------------------------------------------
+# 5. LAYOUT
+# -----------------------------------------------------------------------------
+st.page_link("1_the_vault.py", label="< RETURN TO VAULT", use_container_width=False)
+
+st.markdown("<h1>THE ORACLE</h1>", unsafe_allow_html=True)
+st.markdown("<div class='subtext'>One question, asked of every archive at once.</div>", unsafe_allow_html=True)
+
+query = st.text_input("Ask the Oracle", placeholder="A name, a faction, a word from the lore...")
+
+if not query.strip():
+    st.markdown(
+        "<div class='subtext'>Souls, artifacts and beasts are all searched together.</div>",
+        unsafe_allow_html=True,
+    )
+    st.stop()
+
+try:
+    ranked = db_service.search_archives(query)
+except Exception as e:
+    st.error(f"Could not read from the Vault: {e}")
+    st.stop()
+
+if not ranked:
+    # Nothing matched word for word; the name may just be misspelt.
+    ranked = db_service.fuzzy_archives(query)
+    if not ranked:
+        st.markdown("<div class='subtext'>The Oracle is silent. Nothing in the Vault answers to that.</div>", unsafe_allow_html=True)
+        st.stop()
+    st.markdown("<div class='subtext'>No exact answer. These names sound close:</div>", unsafe_allow_html=True)
+
+# Group by archive, keeping the merged rank: the archive holding the best
+# match comes first, and each group lists its records best first.
+groups = {}
+for tab, entity_id in ranked:
+    groups.setdefault(tab, []).append(entity_id)
+
+# How many cards each group shows lives in session_state, reset per query.
+shown = st.session_state.setdefault("oracle_shown", {"query": query, "counts": {}})
+if shown["query"] != query:
+    shown["query"] = query
+    shown["counts"] = {}
+
+st.markdown(
+    f"<div class='subtext'>{len(ranked)} answers across {len(groups)} archives.</div>",
+    unsafe_allow_html=True,
+)
+
+for tab, entity_ids in groups.items():
+    archive = ARCHIVES[tab]
+    st.markdown(f"<h3>{archive['title']} · {len(entity_ids)}</h3>", unsafe_allow_html=True)
+
+    # Only the cards on screen are read from the frame and rendered.
+    count = shown["counts"].get(tab, GROUP_STEP)
+    records = db_service.records_for(tab, entity_ids[:count])
+    cards = [build_result_card(row, tab=tab) for _, row in records.iterrows()]
+    for start in range(0, len(cards), 3):
+        st.markdown(card_cache.grid_row(cards[start:start + 3], 3), unsafe_allow_html=True)
+
+    more_col, link_col = st.columns([1, 1])
+    with more_col:
+        if count < len(entity_ids):
+            if st.button(f"Reveal more {archive['title'].lower()}", key=f"oracle_more_{tab}", use_container_width=True):
+                shown["counts"][tab] = count + GROUP_STEP
+                st.rerun()
+    with link_col:
+        st.page_link(archive["page"], label=archive["link"], use_container_width=True)
+
+card_cache.render_stats()
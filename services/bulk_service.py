@@ -0,0 +1,303 @@
+import streamlit as st
+import concurrent.futures
+import threading
+import datetime
+import base64
+import csv
+import io
+import json
+import os
+import uuid
+
+from services import llm_service, storage_service, db_service
+from services.replica_service import REPLICA_DIR
+
+# -----------------------------------------------------------------------------
+# BULK CONJURING — a list of concepts in, a batch of finished records out.
+# Each concept runs text -> image -> upload on a bounded pool of worker
+# threads; the finished rows go to the Vault together, in one insert_many.
+# A job lives in the process (so a refreshed browser finds it still running)
+# and on disk as JSON after every step (so a restarted app can pick it up:
+# finished concepts keep their uploaded image, the rest run again).
+# The rows' IDs are chosen and written to disk before the Vault write, so a
+# save cut short by a restart inserts only the rows that did not land.
+# -----------------------------------------------------------------------------
+JOBS_DIR = os.path.join(REPLICA_DIR, "bulk_jobs")
+MAX_CONCURRENCY = 8
+MAX_CONCEPTS = 100
+
+TONES = ["Noble & Bright", "Grim & Shadow", "Mystic & Strange"]
+RARITIES = ["Common", "Uncommon", "Rare", "Very Rare", "Legendary", "Artifact"]
+
+WAITING, WRITING, PAINTING, UPLOADING, DONE, FAILED = (
+    "waiting", "writing", "painting", "uploading", "done", "failed",
+)
+FINISHED = (DONE, FAILED)
+
+
+def _upload(image_bytes: bytes, folder: str) -> str:
+    b64_encoded = base64.b64encode(image_bytes).decode("utf-8")
+    return storage_service.upload_image_to_cdn(f"data:image/jpeg;base64,{b64_encoded}", folder=folder)
+
+# Each kind: its tab, the variant it takes (tone or rarity), and its pipeline.
+# A pipeline step calls mark(status) as it moves on and returns the row to save.
+def _conjure_npc(concept: str, tone: str, mark) -> list:
+    mark(WRITING)
+    char_data = llm_service.generate_npc_text(concept, tone)
+    mark(PAINTING)
+    image_bytes = llm_service.generate_npc_image(char_data.get("Visual_Desc", ""), char_data.get("Class", ""), tone)
+    mark(UPLOADING)
+    return [
+        char_data.get("Name", "Unknown"),
+        char_data.get("Class", "Unknown"),
+        char_data.get("Lore", ""),
+        char_data.get("Greeting", ""),
+        char_data.get("Visual_Desc", ""),
+        _upload(image_bytes, "Well_of_Souls"),
+        str(datetime.datetime.now()),
+    ]
+
+def _conjure_item(concept: str, rarity: str, mark) -> list:
+    mark(WRITING)
+    item_data = llm_service.generate_item_text(concept, rarity)
+    mark(PAINTING)
+    image_bytes = llm_service.generate_item_image(item_data.get("Visual_Desc", ""), item_data.get("Type", ""))
+    mark(UPLOADING)
+    return [
+        item_data.get("Name", "Unknown Artifact"),
+        item_data.get("Type", "Unknown"),
+        rarity,
+        item_data.get("Lore", ""),
+        item_data.get("Visual_Desc", ""),
+        _upload(image_bytes, "The_Forge"),
+        str(datetime.datetime.now()),
+    ]
+
+def _conjure_creature(concept: str, tone: str, mark) -> list:
+    mark(WRITING)
+    description = llm_service.enhance_prompt(concept, "creature", tone, fresh=True)
+    mark(PAINTING)
+    image_bytes = llm_service.generate_image(description, "creature", tone)
+    mark(UPLOADING)
+    return [concept, tone, _upload(image_bytes, "The_Menagerie"), str(datetime.datetime.now())]
+
+KINDS = {
+    "NPCs": {"tab": "NPCs", "variant": "Tone", "choices": TONES, "run": _conjure_npc},
+    "Magic Items": {"tab": "Magic Items", "variant": "Rarity", "choices": RARITIES, "run": _conjure_item},
+    "Creatures": {"tab": "Creatures", "variant": "Tone", "choices": TONES, "run": _conjure_creature},
+}
+
+# -----------------------------------------------------------------------------
+# READING THE CONCEPT LIST
+# -----------------------------------------------------------------------------
+def _variant(value: str, choices: list, default: str) -> str:
+    """Matches a tone or rarity case-insensitively; anything else gets the default."""
+    for choice in choices:
+        if choice.lower() == str(value).strip().lower():
+            return choice
+    return default
+
+def parse_pasted(text: str, kind: str, default: str) -> list:
+    """One concept per line, optionally followed by `| tone` (or `| rarity`)."""
+    choices = KINDS[kind]["choices"]
+    concepts = []
+    for line in text.splitlines():
+        concept, _, variant = line.partition("|")
+        if concept.strip():
+            concepts.append((concept.strip(), _variant(variant, choices, default)))
+    return concepts
+
+def parse_csv(data: bytes, kind: str, default: str) -> list:
+    """A CSV with a `concept` column and, optionally, a `tone` or `rarity` column.
+    Without a header row, the first two columns are read as concept and variant.
+    """
+    choices = KINDS[kind]["choices"]
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "concept" in header:
+        concept_col = header.index("concept")
+        variant_name = KINDS[kind]["variant"].lower()
+        variant_col = header.index(variant_name) if variant_name in header else None
+        rows = rows[1:]
+    else:
+        concept_col, variant_col = 0, 1
+    concepts = []
+    for row in rows:
+        concept = row[concept_col].strip() if len(row) > concept_col else ""
+        variant = row[variant_col] if variant_col is not None and len(row) > variant_col else ""
+        if concept:
+            concepts.append((concept, _variant(variant, choices, default)))
+    return concepts
+
+# -----------------------------------------------------------------------------
+# THE JOB
+# -----------------------------------------------------------------------------
+class BulkJob:
+    """One batch of concepts, worked on `concurrency` at a time."""
+
+    def __init__(self, state: dict):
+        self.state = state
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @property
+    def id(self) -> str:
+        return self.state["id"]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(JOBS_DIR, f"{self.id}.json")
+
+    def _persist(self):
+        """Writes the job to disk; called under the lock after every change."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def snapshot(self) -> dict:
+        """A copy of the job's state that is safe to read while it runs."""
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+    def running(self) -> bool:
+        with self._lock:
+            return self.state["saved_at"] is None
+
+    def start(self):
+        """Runs every concept that has not finished yet. Concepts caught midway
+        by a restart start over; finished ones are kept.
+        """
+        with self._lock:
+            todo = []
+            for i, item in enumerate(self.state["items"]):
+                if item["status"] not in FINISHED:
+                    item["status"] = WAITING
+                    todo.append(i)
+            self._persist()
+        if not todo:
+            self._save()
+            return
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.state["concurrency"], thread_name_prefix=f"bulk-{self.id}"
+        )
+        for i in todo:
+            self._pool.submit(self._run, i)
+        self._pool.shutdown(wait=False)
+
+    def _mark(self, i: int, **changes):
+        with self._lock:
+            self.state["items"][i].update(changes)
+            self._persist()
+
+    def _run(self, i: int):
+        item = self.state["items"][i]
+        run = KINDS[self.state["kind"]]["run"]
+        try:
+            row = run(item["concept"], item["variant"], lambda status: self._mark(i, status=status))
+            self._mark(i, status=DONE, row=row, error="")
+        except Exception as e:
+            self._mark(i, status=FAILED, error=str(e))
+        with self._lock:
+            last = all(item["status"] in FINISHED for item in self.state["items"])
+        if last:
+            self._save()
+
+    def _save(self):
+        """Writes every finished row to the Vault in one call. Runs once; a
+        save tried before (and cut short or failed) writes only the rows whose
+        IDs the Vault does not hold yet.
+        """
+        tab = KINDS[self.state["kind"]]["tab"]
+        with self._lock:
+            if self.state["saved_at"] is not None or self.state.get("saving"):
+                return
+            self.state["saving"] = True
+            rows = [item["row"] for item in self.state["items"] if item["status"] == DONE]
+            tried = bool(self.state.get("save_ids"))
+            if not tried:
+                self.state["save_ids"] = [db_service.new_entity_id() for _ in rows]
+                self._persist()
+            ids = list(self.state["save_ids"])
+        try:
+            if tried:
+                landed = db_service.saved_ids(tab, ids)
+                kept = [(row, entity_id) for row, entity_id in zip(rows, ids) if entity_id not in landed]
+                rows, ids = [row for row, _ in kept], [entity_id for _, entity_id in kept]
+            db_service.insert_many(tab, rows, ids)
+            error = ""
+        except Exception as e:
+            error = f"Vault Exception: {e}"
+        with self._lock:
+            self.state["saving"] = False
+            self.state["save_error"] = error
+            self.state["saved_at"] = str(datetime.datetime.now())
+            if not error:
+                self.state.pop("save_ids", None)
+            self._persist()
+
+    def retry_save(self):
+        """Tries the Vault write again after it failed."""
+        with self._lock:
+            if not self.state.get("save_error"):
+                return
+            self.state["saved_at"] = None
+            self.state["save_error"] = ""
+            self._persist()
+        self._save()
+
+
+@st.cache_resource
+def _get_jobs():
+    """The jobs this process is running (or has run), by ID."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    return {"jobs": {}, "lock": threading.Lock()}
+
+def start_job(kind: str, concepts: list, concurrency: int) -> str:
+    """Starts conjuring `concepts` ((concept, variant) pairs) and returns the job ID."""
+    if kind not in KINDS:
+        raise Exception(f"Unknown kind of record: {kind}")
+    if not concepts:
+        raise Exception("No concepts to conjure.")
+    if len(concepts) > MAX_CONCEPTS:
+        raise Exception(f"At most {MAX_CONCEPTS} concepts per job.")
+    registry = _get_jobs()
+    job = BulkJob({
+        "id": uuid.uuid4().hex[:12],
+        "kind": kind,
+        "concurrency": max(1, min(int(concurrency), MAX_CONCURRENCY)),
+        "created_at": str(datetime.datetime.now()),
+        "saved_at": None,
+        "save_error": "",
+        "items": [
+            {"concept": concept, "variant": variant, "status": WAITING, "error": "", "row": None}
+            for concept, variant in concepts
+        ],
+    })
+    with registry["lock"]:
+        registry["jobs"][job.id] = job
+    job.start()
+    return job.id
+
+def get_job(job_id: str):
+    """The job with this ID, or None. A job left unfinished by an earlier run of
+    the app is read back from disk and resumed.
+    """
+    registry = _get_jobs()
+    with registry["lock"]:
+        job = registry["jobs"].get(job_id)
+        if job is not None:
+            return job
+        path = os.path.join(JOBS_DIR, f"{os.path.basename(job_id)}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                job = BulkJob(json.load(f))
+        except (OSError, ValueError):
+            return None
+        job.state["saving"] = False
+        registry["jobs"][job_id] = job
+    if job.running():
+        job.start()
+    return job
@@ -1,138 +1,913 @@
 import streamlit as st
-import gspread
-from google.oauth2 import service_account
 import pandas as pd
+from concurrent.futures import Future
+from contextlib import contextmanager
+import threading
+import bisect
+import atexit
+import time
+import uuid
+import os
+
+from services import replica_service
+from services.search_service import TextIndex, CombinedIndex, TrigramIndex
+from services.vector_service import VectorIndex
+from services.facet_service import FacetIndex
+from services.recency_service import RecencyIndex
+from services.vault_backends import get_backend
 
 # -----------------------------------------------------------------------------
-# 1. AUTHENTICATION & CONNECTION (Memoized)
+# 1. STORAGE — the vault lives in whichever backend `vault_backend` names
+# (Google Sheets by default; see vault_backends). A remote backend is fronted
+# by the local SQLite replica; local backends are read directly.
 # -----------------------------------------------------------------------------
-@st.cache_resource
-def get_gspread_client():
-    """Authenticates and returns the gspread client. Cached so we only connect once."""
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    if "gcp_service_account" in st.secrets:
-        creds = service_account.Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"], scopes=SCOPES
-        )
-    else:
-        creds = service_account.Credentials.from_service_account_file("service_account.json", scopes=SCOPES)
-    
-    return gspread.authorize(creds)
+TABS = ("NPCs", "Magic Items", "Creatures")
 
-@st.cache_resource
-def get_worksheet():
-    """Returns the main NPC worksheet. Cached for performance."""
-    gc = get_gspread_client()
-    sh = gc.open("Masters_Vault_Db")
-    return sh.worksheet("NPCs")
+def _fetch_values(tab: str) -> list:
+    """The whole tab straight from the backend, header row first."""
+    return get_backend().read_values(tab)
 
-@st.cache_resource
-def get_items_worksheet():
-    """Returns the Magic Items worksheet. Cached for performance."""
-    gc = get_gspread_client()
-    sh = gc.open("Masters_Vault_Db")
-    try:
-        return sh.worksheet("Magic Items")
-    except Exception as e:
-        raise Exception(f"Could not find a tab named 'Magic Items' in your Google Sheet. Error: {e}")
+def _replica():
+    """The local replica, or None when the backend is already local."""
+    return replica_service.get_replica() if get_backend().remote else None
 
 # -----------------------------------------------------------------------------
-# 2. READ OPERATIONS
+# 2. READ OPERATIONS — served from memory, backed by the local SQLite replica.
+# Writes patch the cached frame directly instead of invalidating it, so the
+# next page load after a save costs no API calls and no reload. The replica's
+# background sync reconciles the frame with edits made outside the app.
 # -----------------------------------------------------------------------------
-@st.cache_data(ttl=60)
-def get_all_records():
-    """Fetches all records from the sheet as a Pandas DataFrame.
-    Cached for 60 seconds to prevent rate-limiting, but auto-refreshes.
+# Low-cardinality columns are held as categoricals, and the Timestamp is parsed
+# once at load into a derived column, so archive reruns never re-convert them.
+# Derived columns always sit after the sheet's own columns.
+CATEGORY_COLUMNS = ("Campaign", "Faction", "Rarity", "Type", "Tone")
+TIMESTAMP_COLUMN = "Timestamp"
+PARSED_TIMESTAMP = "Timestamp_dt"
+
+def _typed_frame(values: list) -> pd.DataFrame:
+    """Builds a typed frame column by column from get_all_values()-style rows
+    (header first), padding or trimming every row to the header's width.
+    """
+    if not values:
+        return pd.DataFrame()
+    header = values[0]
+    width = len(header)
+    rows = [(list(r) + [""] * width)[:width] for r in values[1:]]
+    columns = list(zip(*rows)) if rows else [()] * width
+    frame = pd.DataFrame({
+        pos: pd.Series(column, dtype="category" if name in CATEGORY_COLUMNS else None)
+        for pos, (name, column) in enumerate(zip(header, columns))
+    })
+    frame.columns = header
+    if TIMESTAMP_COLUMN in header:
+        frame[PARSED_TIMESTAMP] = _parse_timestamps(frame[TIMESTAMP_COLUMN])
+    return frame
+
+def _parse_timestamps(values) -> pd.Series:
+    """Timestamp cells as datetimes, NaT where blank or unreadable. Cells are
+    read the way the replica reads them, so a column mixing
+    "2024-01-01 10:00:00" and "2024-01-01 10:00:00.25" sorts the same here as
+    in SQLite instead of pandas inferring one format and dropping the rest.
+    ISO cells (all the app writes) parse in one vectorised pass; only the
+    rest go through replica_service.timestamp_key one by one.
+    """
+    cells = pd.Series(values).astype(str).str.strip()
+    try:
+        parsed = pd.to_datetime(cells, format="ISO8601", errors="coerce")
+    except ValueError:  # offsets that differ from cell to cell
+        parsed = None
+    if parsed is None or parsed.dt.tz is not None:
+        # The replica drops a UTC offset rather than converting; so do we.
+        parsed = pd.Series(pd.NaT, index=cells.index, dtype="datetime64[us]")
+    rest = parsed.isna() & (cells != "")
+    if rest.any():
+        keys = cells[rest].map(replica_service.timestamp_key)
+        parsed[rest] = pd.to_datetime(keys, format=replica_service.TIMESTAMP_KEY_FORMAT, errors="coerce")
+    return parsed
+
+def _read_tab(tab: str) -> pd.DataFrame:
+    """Reads a tab (from the replica if the backend is remote) and makes sure
+    the background sync is running.
+    """
+    get_id_column(tab)
+    if _replica() is None:
+        return _typed_frame(_fetch_values(tab))
+    return _typed_frame(_ensure_replica(tab).values(tab))
+
+def _ensure_replica(tab: str):
+    """Makes sure the replica holds the tab and the background sync is running."""
+    replica = _replica()
+    refreshers = {name: (lambda name=name: _refresh_and_reconcile(name)) for name in TABS}
+    replica.ensure_syncing(refreshers)
+    if not replica.has_tab(tab):
+        _refresh(tab)
+    return replica
+
+def _refresh(tab: str) -> int:
+    """Brings the replica's copy of a tab up to date, reading only as much as
+    the change needs. Returns the number of rows touched.
+
+    - the backend's change marker hasn't moved: nothing is read. The app's
+      own writes move the recorded marker along with them (see _own_write),
+      so after them too nothing is read;
+    - the ID column shows rows were only appended: just the new rows are read;
+    - anything else (deletes, in-place edits, header changes made outside the
+      app): the whole tab is read and applied as a delta.
+
+    Runs under the tab's lock, so a queued flush can't land halfway through
+    and be mirrored twice.
     """
-    worksheet = get_worksheet()
-    data = worksheet.get_all_records()
-    return pd.DataFrame(data)
+    with get_tab_lock(tab):
+        backend = get_backend()
+        replica = _replica()
+        marker = backend.change_marker(tab)
+        if marker is not None and replica.has_tab(tab) and str(marker) == replica.marker(tab):
+            return 0
+
+        touched = None
+        if replica.has_tab(tab):
+            id_col = get_id_column(tab)
+            local_ids = replica.column(tab, id_col)
+            remote_ids = backend.read_column(tab, id_col)[1:]
+            if len(remote_ids) > len(local_ids) and remote_ids[:len(local_ids)] == local_ids:
+                new_rows = backend.read_rows(tab, len(local_ids) + 2)
+                replica.append_rows(tab, new_rows)
+                touched = len(new_rows)
+        if touched is None:
+            touched = replica.sync(tab, backend.read_values(tab))
+        replica.set_marker(tab, marker)
+        return touched
+
+def _refresh_and_reconcile(tab: str) -> int:
+    """One background pull: refresh the replica and, if it changed, reload
+    the frame from it, both under the tab's lock.
+    """
+    with get_tab_lock(tab):
+        touched = _refresh(tab)
+        if touched:
+            get_frame_cache(tab).reload()
+        return touched
+
+@contextmanager
+def _own_write(tab: str):
+    """Wraps one of the app's own writes to the backend. If the change marker
+    hadn't moved since the replica last recorded it, the marker the write
+    leaves behind is recorded in its place (for every tab that shared it), so
+    the next refresh knows the change is already mirrored and reads nothing.
+    """
+    replica = _replica()
+    if replica is None:
+        yield
+        return
+    backend = get_backend()
+    before = backend.change_marker(tab)
+    yield
+    after = backend.change_marker(tab)
+    if before is None or after is None:
+        return
+    for name in TABS:
+        if replica.marker(name) == str(before):
+            replica.set_marker(name, after)
+
+class FrameCache:
+    """One tab's DataFrame, held in memory and patched in place by the write path.
+
+    The frame keeps a plain RangeIndex in sheet order, so position p is sheet
+    row p + 2, and rows_by_id maps each entity ID to its current sheet row.
+    width is the number of sheet columns (derived columns come after them).
+    version goes up on every change; anything derived from the frame can key on it.
+
+    Watchers are derived indexes that follow the frame: each has a version,
+    rebuild(frame), appended(added_rows), updated(entity_id, row) and
+    deleted(entity_id). A watcher that was current when a change landed gets
+    the change applied in place; one that fell behind is rebuilt by sync().
+
+    Loading takes the tab's lock before the cache's own, the order every
+    write uses, so a first load never deadlocks against a flush.
+    append, update and delete are called with the tab's lock already held.
+    """
+
+    def __init__(self, tab: str):
+        self.tab = tab
+        self.frame = None
+        self.width = 0
+        self.rows_by_id = {}
+        self.version = 0
+        self.watchers = []
+        self._lock = threading.RLock()
+
+    def _index_ids(self):
+        ids = self.frame[ID_HEADER] if ID_HEADER in self.frame.columns else []
+        self.rows_by_id = {entity_id: pos + 2 for pos, entity_id in enumerate(ids) if entity_id}
+
+    def _loaded(self):
+        if self.frame is None:
+            with get_tab_lock(self.tab), self._lock:
+                if self.frame is None:
+                    self._load()
+
+    def get(self) -> pd.DataFrame:
+        self._loaded()
+        with self._lock:
+            return self.frame
+
+    def watch(self, watcher):
+        with self._lock:
+            self.watchers.append(watcher)
+
+    def sync(self, watcher) -> pd.DataFrame:
+        """Brings a watcher up to the current version and returns the frame."""
+        self._loaded()
+        with self._lock:
+            frame = self.frame
+            if watcher.version != self.version:
+                watcher.rebuild(frame)
+                watcher.version = self.version
+            return frame
+
+    def _notify(self, event: str, *args):
+        for watcher in self.watchers:
+            if watcher.version == self.version - 1:
+                getattr(watcher, event)(*args)
+                watcher.version = self.version
+
+    def rows_for(self, entity_ids, in_sheet_order: bool = False) -> pd.DataFrame:
+        """The rows holding these IDs, in the order given (or in sheet order);
+        unknown IDs are skipped.
+        """
+        self._loaded()
+        with self._lock:
+            frame = self.frame
+            positions = [self.rows_by_id[e] - 2 for e in entity_ids if e in self.rows_by_id]
+            return frame.iloc[sorted(positions) if in_sheet_order else positions]
+
+    def _load(self):
+        self.frame = _read_tab(self.tab)
+        self.width = len(self.frame.columns) - (PARSED_TIMESTAMP in self.frame.columns)
+        self._index_ids()
+        self.version += 1
+
+    def reload(self):
+        with get_tab_lock(self.tab), self._lock:
+            self._load()
+
+    def row_of(self, entity_id: str) -> int:
+        """The sheet row currently holding entity_id."""
+        self._loaded()
+        with self._lock:
+            if entity_id not in self.rows_by_id:
+                raise Exception(f"No record with ID '{entity_id}' in the '{self.tab}' tab.")
+            return self.rows_by_id[entity_id]
+
+    def append(self, rows: list):
+        with self._lock:
+            if self.frame is None:
+                return
+            header = list(self.frame.columns[:self.width])
+            added = _typed_frame([header] + [[str(v) for v in row] for row in rows])
+            first_row = len(self.frame) + 2
+            frame = pd.concat([self.frame, added], ignore_index=True)
+            for name in CATEGORY_COLUMNS:
+                if name in frame.columns:
+                    # concat falls back to object when the categories differ.
+                    frame[name] = frame[name].astype("category")
+            self.frame = frame
+            if ID_HEADER in self.frame.columns:
+                for offset, entity_id in enumerate(added[ID_HEADER]):
+                    self.rows_by_id[entity_id] = first_row + offset
+            self.version += 1
+            self._notify("appended", added)
+
+    def update(self, sheet_row: int, cells: dict):
+        """Applies {column_number: value} to one row, like update_cell does."""
+        with self._lock:
+            if self.frame is None:
+                return
+            if max(cells) > self.width:
+                # The sheet just grew a column the frame doesn't have yet.
+                self._load()
+                return
+            pos = sheet_row - 2
+            for col, value in cells.items():
+                value = str(value)
+                column = self.frame.iloc[:, col - 1]
+                if isinstance(column.dtype, pd.CategoricalDtype) and value not in column.cat.categories:
+                    self.frame.isetitem(col - 1, column.cat.add_categories([value]))
+                self.frame.iat[pos, col - 1] = value
+                if self.frame.columns[col - 1] == TIMESTAMP_COLUMN:
+                    self.frame.at[pos, PARSED_TIMESTAMP] = _parse_timestamps([value]).iloc[0]
+            self.version += 1
+            if ID_HEADER in self.frame.columns:
+                self._notify("updated", self.frame.at[pos, ID_HEADER], self.frame.iloc[pos])
+
+    def delete(self, sheet_row: int):
+        with self._lock:
+            if self.frame is None:
+                return
+            pos = sheet_row - 2
+            entity_id = self.frame.at[pos, ID_HEADER] if ID_HEADER in self.frame.columns else ""
+            self.frame = self.frame.drop(index=pos).reset_index(drop=True)
+            self._index_ids()
+            self.version += 1
+            if entity_id:
+                self._notify("deleted", entity_id)
+
+@st.cache_resource
+def get_frame_cache(tab: str) -> FrameCache:
+    """Returns the process-wide frame cache for a tab. Cached so every session shares it."""
+    return FrameCache(tab)
+
+def get_all_records():
+    """Fetches all NPC records as a Pandas DataFrame. Treat it as read-only."""
+    return get_frame_cache("NPCs").get()
 
 def clear_cache():
-    """Manually invalidates the data cache (useful after writing data)."""
-    get_all_records.clear()
+    """Manually reloads the NPC frame from the replica."""
+    get_frame_cache("NPCs").reload()
 
-@st.cache_data(ttl=60)
 def get_all_items():
-    """Fetches all records from the Items sheet as a Pandas DataFrame."""
-    worksheet = get_items_worksheet()
-    data = worksheet.get_all_records()
-    return pd.DataFrame(data)
+    """Fetches all records from the Items sheet as a Pandas DataFrame. Treat it as read-only."""
+    return get_frame_cache("Magic Items").get()
 
 def clear_items_cache():
-    """Manually invalidates the items cache."""
-    get_all_items.clear()
+    """Manually reloads the items frame from the replica."""
+    get_frame_cache("Magic Items").reload()
 
 # -----------------------------------------------------------------------------
-# 3. WRITE OPERATIONS
+# 3. ENTITY IDS — every row carries a stable ID in its own column, so pages
+# address records by ID rather than by DataFrame position + 2 (which points at
+# the wrong row as soon as another row is added or deleted).
 # -----------------------------------------------------------------------------
-def insert_character(row_data: list):
-    """Inserts a new character row at the top of the sheet."""
-    worksheet = get_worksheet()
-    worksheet.insert_row(row_data, 2)
-    clear_cache()
-
-def insert_item(row_data: list):
-    """Inserts a new item row at the top of the Items sheet."""
-    worksheet = get_items_worksheet()
-    worksheet.insert_row(row_data, 2)
-    clear_items_cache()
-
-def update_character_meta(sheet_row: int, campaign: str, faction: str):
-    """Updates specific columns (Campaign, Faction) for a given row."""
-    worksheet = get_worksheet()
-    worksheet.update_cell(sheet_row, 8, campaign)
-    worksheet.update_cell(sheet_row, 9, faction)
-    clear_cache()
-
-def update_character_image(sheet_row: int, new_image_url: str):
-    """Updates only the Image_URL column (Column 6 in the sheet) for a given row."""
-    worksheet = get_worksheet()
-    worksheet.update_cell(sheet_row, 6, new_image_url)
-    clear_cache()
-
-def delete_character(sheet_row: int):
-    """Deletes a specific row in the sheet."""
-    worksheet = get_worksheet()
-    worksheet.delete_rows(sheet_row)
-    clear_cache()
-
-def update_item_image(sheet_row: int, new_image_url: str):
-    """
-    Updates only the Image_URL column (Column 6 in the Magic Items sheet) for a given row.
-    """
-    worksheet = get_items_worksheet()
-    worksheet.update_cell(sheet_row, 6, new_image_url)
-    clear_items_cache()
+ID_HEADER = "ID"
+
+def new_entity_id() -> str:
+    """A short random ID for a new record."""
+    return uuid.uuid4().hex[:12]
+
+@st.cache_resource
+def get_id_column(tab: str) -> int:
+    """Makes sure the tab has an ID column with every row filled in, and returns
+    its column number. Runs once per tab per process, and reads only the header
+    row plus the ID column and the first column (which says how long the tab is),
+    so a warm start never pulls a whole tab.
+    """
+    backend = get_backend()
+    header = backend.read_header(tab)
+    cells = []
+    if ID_HEADER in header:
+        id_col = header.index(ID_HEADER) + 1
+        first, ids = backend.read_columns(tab, [1, id_col])
+        ids = ids[1:]
+    else:
+        id_col = len(header) + 1
+        cells.append((1, id_col, ID_HEADER))
+        first, = backend.read_columns(tab, [1])
+        ids = []
+
+    # Backfill any row without an ID, all in one batched write.
+    last_row = max(len(first), len(ids) + 1)
+    for sheet_row in range(2, last_row + 1):
+        if sheet_row - 2 >= len(ids) or not ids[sheet_row - 2]:
+            cells.append((sheet_row, id_col, new_entity_id()))
+
+    if cells:
+        backend.update_cells(tab, cells)
+        replica = _replica()
+        if replica is not None:
+            replica.sync(tab, backend.read_values(tab))
+    return id_col
+
+def _with_id(tab: str, row_data: list, entity_id: str = None) -> list:
+    """Pads a new row out to the ID column and stamps it with an ID (a fresh
+    one unless given).
+    """
+    id_col = get_id_column(tab)
+    return (list(row_data) + [""] * id_col)[:id_col - 1] + [entity_id or new_entity_id()]
 
 # -----------------------------------------------------------------------------
-# 4. CREATURES (The Menagerie)
+# 4. WRITE QUEUE — new rows are appended in batches, never inserted at row 2.
+# Appending leaves every existing row where it is, and one append_rows call
+# carries a whole batch. Newest-first ordering comes from the Timestamp column.
 # -----------------------------------------------------------------------------
+FLUSH_SIZE = 10        # flush as soon as this many rows are waiting...
+FLUSH_INTERVAL = 2.0   # ...or once the oldest waiting row is this many seconds old
+
 @st.cache_resource
-def get_creatures_worksheet():
-    """Returns the Creatures worksheet, creating the tab if it does not exist."""
-    gc = get_gspread_client()
-    sh = gc.open("Masters_Vault_Db")
-    try:
-        return sh.worksheet("Creatures")
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title="Creatures", rows=200, cols=8)
-        ws.append_row(["Concept", "Tone", "Image_URL", "Timestamp"])
-        return ws
+def get_tab_lock(tab: str) -> threading.RLock:
+    """The lock held around every write to a tab, so rows never shift under a
+    sheet row that has just been looked up. Process-wide, like the queue.
+    """
+    return threading.RLock()
+
+class WriteQueue:
+    """Buffers new rows for one tab and appends them with a single API call.
+
+    put() returns a Future right away, so a page can render its card without
+    waiting on the sheet; the Future resolves once the batch has been written
+    (or carries the exception if the write failed).
+    """
+
+    def __init__(self, tab: str, append, on_flush, lock=None):
+        self.tab = tab
+        self._append = append
+        self._on_flush = on_flush
+        self._pending = []
+        self._first_at = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = lock or threading.RLock()
+        threading.Thread(target=self._run, daemon=True, name=f"vault-writer-{tab}").start()
+        atexit.register(self.flush)
+
+    def put(self, row_data: list) -> Future:
+        ticket = Future()
+        with self._cond:
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((row_data, ticket))
+            self._cond.notify()
+        return ticket
+
+    def write_now(self, rows: list):
+        """Appends rows straight away in one call, in turn with the queued
+        batches. Raises if the write fails.
+        """
+        with self._write_lock:
+            self._append(rows)
+            self._on_flush(rows)
+
+    def flush(self):
+        """Writes whatever is waiting right now (also runs at interpreter exit)."""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        self._write(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._first_at + FLUSH_INTERVAL
+                while self._pending and len(self._pending) < FLUSH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+            self._write(batch)
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        rows = [row for row, _ in batch]
+        with self._write_lock:
+            try:
+                self._append(rows)
+                self._on_flush(rows)
+            except Exception as e:
+                for _, ticket in batch:
+                    ticket.set_exception(e)
+                return
+        for _, ticket in batch:
+            ticket.set_result(True)
+
+def _append_rows(tab: str, rows: list):
+    with _own_write(tab):
+        get_backend().append_rows(tab, rows)
+
+def _after_append(tab: str):
+    """Builds the on_flush hook: mirror the batch into the replica and the cached frame.
+    A tab the replica has never synced is left to its first sync, which reads
+    the rows with the header that places their keys.
+    """
+    def on_flush(rows: list):
+        replica = _replica()
+        if replica is not None and replica.has_tab(tab):
+            replica.append_rows(tab, rows)
+        get_frame_cache(tab).append(rows)
+    return on_flush
+
+@st.cache_resource
+def get_write_queue(tab: str) -> WriteQueue:
+    """Returns the process-wide write queue for a tab. Cached so every session shares it."""
+    return WriteQueue(tab, lambda rows: _append_rows(tab, rows), _after_append(tab), get_tab_lock(tab))
 
-@st.cache_data(ttl=60)
+def ticket_error(ticket) -> str:
+    """The error a queued save ended with, or "" while pending or once saved."""
+    if ticket is None or not ticket.done() or ticket.exception() is None:
+        return ""
+    return str(ticket.exception())
+
+# -----------------------------------------------------------------------------
+# 5. WRITE OPERATIONS — every write lands in the backend, then in the replica
+# and the cached frame
+# -----------------------------------------------------------------------------
+def _apply_update(tab: str, sheet_row: int, cells: dict):
+    """Mirrors a {column_number: value} cell update into the replica and the frame."""
+    replica = _replica()
+    if replica is not None:
+        replica.update_cells(tab, sheet_row, cells)
+    get_frame_cache(tab).update(sheet_row, cells)
+
+def _apply_delete(tab: str, sheet_row: int):
+    """Mirrors a row deletion into the replica and the frame."""
+    replica = _replica()
+    if replica is not None:
+        replica.delete_row(tab, sheet_row)
+    get_frame_cache(tab).delete(sheet_row)
+
+def _checked_rows(tab: str, entity_ids: list) -> dict:
+    """{entity_id: sheet_row} for these IDs, after checking in one read that each
+    row's ID cell really holds its ID. A map that has gone stale (rows shifted by
+    an edit outside the app) is rebuilt once; if it still disagrees, nothing is
+    written. Call with the tab's lock held.
+    """
+    cache = get_frame_cache(tab)
+    id_col = get_id_column(tab)
+    for attempt in range(2):
+        rows = {entity_id: cache.row_of(entity_id) for entity_id in entity_ids}
+        found = get_backend().read_cells(tab, [(sheet_row, id_col) for sheet_row in rows.values()])
+        if found == list(rows):
+            return rows
+        if attempt == 0:
+            replica = _replica()
+            if replica is not None:
+                replica.sync(tab, get_backend().read_values(tab))
+            cache.reload()
+    raise Exception(f"The '{tab}' tab changed while saving; no record was touched. Please try again.")
+
+def insert_character(row_data: list) -> Future:
+    """Queues a new character row to be appended to the sheet. Returns its ticket."""
+    return get_write_queue("NPCs").put(_with_id("NPCs", row_data))
+
+def insert_item(row_data: list) -> Future:
+    """Queues a new item row to be appended to the Items sheet. Returns its ticket."""
+    return get_write_queue("Magic Items").put(_with_id("Magic Items", row_data))
+
+def insert_many(tab: str, rows_data: list, entity_ids: list = None) -> list:
+    """Appends many new rows to a tab in ONE append_rows call, without waiting
+    in the write queue. Returns the new rows' entity IDs, in order. Pass
+    entity_ids to stamp the rows with IDs chosen beforehand, so a caller can
+    tell later (with saved_ids) whether an interrupted insert landed.
+    """
+    entity_ids = entity_ids or [None] * len(rows_data)
+    rows = [_with_id(tab, row_data, entity_id) for row_data, entity_id in zip(rows_data, entity_ids)]
+    if rows:
+        get_write_queue(tab).write_now(rows)
+    return [row[-1] for row in rows]
+
+def saved_ids(tab: str, entity_ids: list) -> set:
+    """Which of these entity IDs the tab holds, read from the backend itself:
+    the replica may not have caught up with a write cut short by a restart.
+    """
+    wanted = set(entity_ids)
+    if not wanted:
+        return set()
+    return wanted.intersection(get_backend().read_column(tab, get_id_column(tab)))
+
+def update_records(tab: str, changes: list):
+    """Applies many field edits across many records in ONE batch_update call.
+
+    changes is a list of (entity_id, {column: value}) pairs, where a column is
+    either a header name ("Campaign") or a 1-based column number.
+    """
+    cache = get_frame_cache(tab)
+    header = list(cache.get().columns[:cache.width])
+    resolved = []
+    for entity_id, fields in changes:
+        cells = {}
+        for column, value in fields.items():
+            if isinstance(column, int):
+                cells[column] = value
+            elif column in header:
+                cells[header.index(column) + 1] = value
+            else:
+                raise Exception(f"No column named '{column}' in the '{tab}' tab.")
+        resolved.append((entity_id, cells))
+    if not resolved:
+        return
+
+    with get_tab_lock(tab):
+        rows = _checked_rows(tab, list(dict.fromkeys(entity_id for entity_id, _ in resolved)))
+        with _own_write(tab):
+            get_backend().update_cells(tab, [
+                (rows[entity_id], col, value)
+                for entity_id, cells in resolved
+                for col, value in cells.items()
+            ])
+        for entity_id, cells in resolved:
+            _apply_update(tab, rows[entity_id], cells)
+
+def update_character_meta(entity_id: str, campaign: str, faction: str):
+    """Updates specific columns (Campaign, Faction) for the character with this ID."""
+    update_records("NPCs", [(entity_id, {8: campaign, 9: faction})])
+
+def update_character_image(entity_id: str, new_image_url: str):
+    """Updates only the Image_URL column (Column 6 in the sheet) for the character with this ID."""
+    update_records("NPCs", [(entity_id, {6: new_image_url})])
+
+def delete_character(entity_id: str):
+    """Deletes the character with this ID from the sheet."""
+    with get_tab_lock("NPCs"):
+        sheet_row = _checked_rows("NPCs", [entity_id])[entity_id]
+        with _own_write("NPCs"):
+            get_backend().delete_row("NPCs", sheet_row)
+        _apply_delete("NPCs", sheet_row)
+
+def update_item_image(entity_id: str, new_image_url: str):
+    """
+    Updates only the Image_URL column (Column 6 in the Magic Items sheet) for the item with this ID.
+    """
+    update_records("Magic Items", [(entity_id, {6: new_image_url})])
+
+# -----------------------------------------------------------------------------
+# 6. CREATURES (The Menagerie)
+# -----------------------------------------------------------------------------
 def get_all_creatures():
-    """Fetches all creatures from the Creatures tab as a Pandas DataFrame."""
-    worksheet = get_creatures_worksheet()
-    data = worksheet.get_all_records()
-    return pd.DataFrame(data)
+    """Fetches all creatures from the Creatures tab as a Pandas DataFrame. Treat it as read-only."""
+    return get_frame_cache("Creatures").get()
 
 def clear_creatures_cache():
-    """Manually invalidates the creatures cache."""
-    get_all_creatures.clear()
-
-def insert_creature(row_data: list):
-    """Inserts a new creature row at the top of the Creatures tab."""
-    worksheet = get_creatures_worksheet()
-    worksheet.insert_row(row_data, 2)
-    clear_creatures_cache()
+    """Manually reloads the creatures frame from the replica."""
+    get_frame_cache("Creatures").reload()
+
+def insert_creature(row_data: list) -> Future:
+    """Queues a new creature row to be appended to the Creatures tab. Returns its ticket."""
+    return get_write_queue("Creatures").put(_with_id("Creatures", row_data))
+
+# -----------------------------------------------------------------------------
+# 7. PAGED QUERIES — the archive grids ask for one page at a time, and step
+# from page to page with the cursor each page hands back.
+# With no search, and filters only on indexed columns, the page comes straight
+# off the recency index of the local SQLite store (the replica, or the sqlite
+# backend's own file), or off an expression index on the filtered column, so
+# its cost is the page rather than the vault. The match count comes from the
+# facet index, or is counted once per query and carried in the cursor.
+# Otherwise a search goes through the full-text (or similarity) index, facet
+# filters are set intersections on the facet index, only a filter on any
+# other column compares the cached frame row by row, and newest-first order is
+# read off an in-memory recency index rather than sorted per rerun.
+# -----------------------------------------------------------------------------
+INDEXED_COLUMNS = CATEGORY_COLUMNS
+
+# The sidebar filter columns of each tab.
+FACET_COLUMNS = {
+    "NPCs": ("Campaign", "Faction"),
+    "Magic Items": ("Rarity", "Type"),
+    "Creatures": ("Tone",),
+}
+
+@st.cache_resource
+def get_facet_index(tab: str) -> FacetIndex:
+    """Returns the process-wide facet index for a tab, following its frame cache."""
+    index = FacetIndex(FACET_COLUMNS[tab], id_column=ID_HEADER)
+    get_frame_cache(tab).watch(index)
+    return index
+
+def facet_counts(tab: str, column: str, filters: dict = None) -> list:
+    """(value, count) for each non-blank value of a facet column, sorted by
+    value. Counts honour the filters on the other facet columns.
+    """
+    index = get_facet_index(tab)
+    get_frame_cache(tab).sync(index)
+    return index.counts(column, filters)
+
+# The columns the search box looks in, and how much a hit in each one counts.
+SEARCH_FIELDS = {
+    "NPCs": {"Name": 3, "Class": 2, "Lore": 1, "Campaign": 1, "Faction": 1},
+    "Magic Items": {"Name": 3, "Type": 2, "Lore": 1, "Rarity": 1},
+    "Creatures": {"Concept": 1},
+}
+
+@st.cache_resource
+def get_text_index(tab: str) -> TextIndex:
+    """Returns the process-wide full-text index for a tab, following its frame cache."""
+    index = TextIndex(SEARCH_FIELDS[tab], id_column=ID_HEADER)
+    get_frame_cache(tab).watch(index)
+    return index
+
+def search_ids(tab: str, query: str, limit: int = None) -> list:
+    """Entity IDs whose text matches every word of the query (prefixes count), best first."""
+    index = get_text_index(tab)
+    get_frame_cache(tab).sync(index)
+    return index.search(query, limit)
+
+@st.cache_resource
+def get_archive_index() -> CombinedIndex:
+    """Returns the process-wide full-text index over every tab at once,
+    following each tab's frame cache.
+    """
+    index = CombinedIndex(SEARCH_FIELDS, id_column=ID_HEADER)
+    for tab in TABS:
+        get_frame_cache(tab).watch(index.feed(tab))
+    return index
+
+def search_archives(query: str, limit: int = None) -> list:
+    """(tab, entity_id) of records in any archive matching every word of the
+    query, best first. Scores are comparable across tabs.
+    """
+    index = get_archive_index()
+    for tab, feed in index.feeds.items():
+        get_frame_cache(tab).sync(feed)
+    return index.search(query, limit)
+
+def records_for(tab: str, entity_ids: list) -> pd.DataFrame:
+    """The rows of a tab with these entity IDs, in the order given."""
+    return get_frame_cache(tab).rows_for(entity_ids)
+
+# The name column each tab can be looked up by with a misspelling.
+FUZZY_COLUMNS = {
+    "NPCs": "Name",
+    "Magic Items": "Name",
+}
+FUZZY_LIMIT = 30  # a fuzzy lookup returns at most this many records
+
+@st.cache_resource
+def get_fuzzy_index(tab: str) -> TrigramIndex:
+    """Returns the process-wide trigram name index for a tab, following its frame cache."""
+    index = TrigramIndex(FUZZY_COLUMNS[tab], id_column=ID_HEADER)
+    get_frame_cache(tab).watch(index)
+    return index
+
+def fuzzy_matches(tab: str, query: str, limit: int = FUZZY_LIMIT) -> list:
+    """(entity_id, similarity) for records whose name resembles the query,
+    best first. Tabs without a name column have no fuzzy matches.
+    """
+    if tab not in FUZZY_COLUMNS:
+        return []
+    index = get_fuzzy_index(tab)
+    get_frame_cache(tab).sync(index)
+    return index.similar(query, limit)
+
+def fuzzy_archives(query: str, limit: int = FUZZY_LIMIT) -> list:
+    """(tab, entity_id) of records in any archive whose name resembles the query, best first."""
+    scored = [
+        (score, tab, entity_id)
+        for tab in FUZZY_COLUMNS
+        for entity_id, score in fuzzy_matches(tab, query, limit)
+    ]
+    scored.sort(key=lambda match: -match[0])
+    return [(tab, entity_id) for _, tab, entity_id in scored[:limit]]
+
+# The descriptive columns the similarity index reads, per tab.
+VECTOR_FIELDS = {
+    "NPCs": ("Visual_Desc", "Lore"),
+    "Magic Items": ("Visual_Desc", "Lore"),
+    "Creatures": ("Concept",),
+}
+SEMANTIC_LIMIT = 60  # a meaning search returns at most this many records
+
+@st.cache_resource
+def get_vector_index(tab: str) -> VectorIndex:
+    """Returns the process-wide similarity index for a tab, following its frame cache."""
+    slug = tab.lower().replace(" ", "_")
+    path = os.path.join(replica_service.REPLICA_DIR, f"vectors_{slug}.npz")
+    index = VectorIndex(VECTOR_FIELDS[tab], path, id_column=ID_HEADER)
+    get_frame_cache(tab).watch(index)
+    return index
+
+def similar_ids(tab: str, text: str = "", entity_id: str = "", k: int = 10) -> list:
+    """Entity IDs closest in meaning to a description, or to an existing record."""
+    index = get_vector_index(tab)
+    get_frame_cache(tab).sync(index)
+    return index.similar_to(entity_id, k) if entity_id else index.similar_to_text(text, k)
+
+def related_records(tab: str, entity_id: str, k: int = 4) -> pd.DataFrame:
+    """The k records most like this one, best first."""
+    return get_frame_cache(tab).rows_for(similar_ids(tab, entity_id=entity_id, k=k))
+
+def _indexed_store(tab: str):
+    """The SQLite store that can answer paged queries for a tab, or None."""
+    get_id_column(tab)
+    store = _ensure_replica(tab) if _replica() is not None else get_backend().local_store()
+    if store is not None:
+        header = store.header(tab)
+        store.index_columns([header.index(column) + 1 for column in INDEXED_COLUMNS if column in header])
+    return store
+
+def _facet_total(tab: str, filters: dict):
+    """How many records pass the filters, read off the facet index; None when
+    a filter is on a column the index doesn't cover.
+    """
+    if not all(column in FACET_COLUMNS[tab] for column in filters):
+        return None
+    index = get_facet_index(tab)
+    get_frame_cache(tab).sync(index)
+    return index.count(filters)
+
+@st.cache_resource
+def get_recency_index(tab: str) -> RecencyIndex:
+    """Returns the process-wide newest-first order of a tab, following its frame cache."""
+    index = RecencyIndex(PARSED_TIMESTAMP, id_column=ID_HEADER)
+    get_frame_cache(tab).watch(index)
+    return index
+
+def _match_ids(tab: str, filters: dict, search: str, semantic: bool, limit: int = None) -> tuple:
+    """(entity IDs matching the filters and the search, in result order; how
+    many match in all). An unfiltered text search stops ranking at limit;
+    everything else comes back whole.
+    """
+    cache = get_frame_cache(tab)
+    facets = get_facet_index(tab)
+    frame = cache.sync(facets)
+    faceted = {column: value for column, value in filters.items() if column in facets.columns}
+    allowed = facets.matching(faceted) if faceted else None
+
+    rest = {column: value for column, value in filters.items() if column not in faceted}
+    if rest:
+        mask = pd.Series(True, index=frame.index)
+        for column, value in rest.items():
+            if column not in frame.columns:
+                raise Exception(f"No column named '{column}' in the '{tab}' tab.")
+            mask &= frame[column] == value
+        passing = set(frame.loc[mask, ID_HEADER])
+        allowed = passing if allowed is None else allowed & passing
+
+    if search.strip():
+        total = 0
+        if semantic:
+            ranked = similar_ids(tab, text=search, k=SEMANTIC_LIMIT)
+        else:
+            index = get_text_index(tab)
+            cache.sync(index)
+            # Filters apply after ranking, so only an unfiltered search can stop early.
+            ranked, total = index.ranked(search, limit if allowed is None else None)
+            if not total:
+                # No exact hit: the name was probably misspelt.
+                ranked = [e for e, _ in fuzzy_matches(tab, search)]
+        if allowed is not None:
+            ranked, total = [e for e in ranked if e in allowed], 0
+        return ranked, total or len(ranked)
+    recency = get_recency_index(tab)
+    cache.sync(recency)
+    ids = recency.newest(allowed)
+    return ids, len(ids)
+
+def query_matches(tab: str, filters: dict = None, search: str = "", semantic: bool = False) -> pd.DataFrame:
+    """Every record matching {column: value} filters and the search.
+    Searches come back best match first: from the full-text index (falling
+    back to fuzzy name matches when nothing matches exactly), or with
+    semantic=True the closest in meaning from the similarity index. Without
+    a search the result is newest first; rows without a readable Timestamp go
+    last, and ties are broken by entity ID.
+    """
+    return get_frame_cache(tab).rows_for(_match_ids(tab, dict(filters or {}), search, semantic)[0])
+
+def _resume_at(tab: str, matches: list, cursor) -> int:
+    """Where the page after cursor starts in matches. A newest-first list
+    resumes past the last record shown by its (timestamp, ID) key, as the
+    replica path does, so deletes and inserts above it shift nothing. A ranked
+    list has no such key: it resumes after the last record of the page shown
+    that is still there.
+    """
+    if cursor is None:
+        return 0
+    end, shown, last_key = cursor
+    if last_key is not None:
+        return bisect.bisect_right(matches, last_key, key=get_recency_index(tab).key_of)
+    positions = {entity_id: pos for pos, entity_id in enumerate(matches)}
+    for entity_id in reversed(shown):
+        if entity_id in positions:
+            return positions[entity_id] + 1
+    # The whole page is gone: what followed it moved up by that much.
+    return max(0, end - len(shown))
+
+def query_page(tab: str, page_size: int = 30, filters: dict = None, search: str = "",
+               semantic: bool = False, cursor=None):
+    """One page of records, newest first (best first for a search).
+
+    cursor is None for the first page, then the next_cursor the previous
+    call returned; treat it as opaque. It names the last record shown rather
+    than a position, so burning a card on an earlier page neither skips nor
+    repeats one on the next. Returns (page_frame, total_matches, next_cursor),
+    with next_cursor None on the last page.
+    """
+    filters = dict(filters or {})
+    ranked = bool(search.strip())
+    indexed = not ranked and all(column in INDEXED_COLUMNS for column in filters)
+    store = _indexed_store(tab) if indexed else None
+    if store is None:
+        # A ranked list is only ranked as far as this page needs, with a
+        # page to spare for records that moved in above the cursor.
+        limit = (cursor[0] if cursor is not None else 0) + 2 * page_size if ranked else None
+        matches, total = _match_ids(tab, filters, search, semantic, limit)
+        start = _resume_at(tab, matches, cursor)
+        end = start + page_size
+        shown = matches[start:end]
+        page = get_frame_cache(tab).rows_for(shown)
+        next_cursor = None
+        if shown and end < total:
+            last_key = None if ranked else get_recency_index(tab).key_of(shown[-1])
+            next_cursor = (end, shown, last_key)
+        return page, total, next_cursor
+
+    header = store.header(tab)
+    for column in filters:
+        if column not in header:
+            raise Exception(f"No column named '{column}' in the '{tab}' tab.")
+    after, total = cursor if cursor is not None else (None, _facet_total(tab, filters))
+    rows, total, next_after = store.page(
+        tab, {header.index(column) + 1: value for column, value in filters.items()},
+        after, page_size, total,
+    )
+    next_cursor = (next_after, total) if next_after is not None else None
+    return _typed_frame([header] + rows), total, next_cursor
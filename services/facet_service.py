@@ -0,0 +1,110 @@
+import threading
+
+# -----------------------------------------------------------------------------
+# FACETS — the sidebar filters, kept as an index instead of recomputed.
+# For every low-cardinality column (Campaign, Faction, Rarity, Type, Tone) the
+# index holds value -> set of entity IDs. A combined filter such as
+# Campaign=X AND Faction=Y is a set intersection, and the count beside each
+# dropdown option is the size of one.
+#
+# The index is a FrameCache watcher (see db_service), so inserts, edits and
+# deletes are applied to it in place.
+# -----------------------------------------------------------------------------
+
+
+class FacetIndex:
+    """value -> {entity IDs} for each facet column of one tab."""
+
+    def __init__(self, columns: tuple, id_column: str = "ID"):
+        self.columns = columns
+        self.id_column = id_column
+        self.version = -1
+        self._ids = {}
+        self._value_of = {}
+        self._all = set()
+        self._lock = threading.Lock()
+
+    # --- MAINTENANCE ---------------------------------------------------------
+    def _add(self, entity_id: str, values: dict):
+        self._all.add(entity_id)
+        for column in self.columns:
+            value = str(values.get(column, "") or "")
+            self._value_of[column][entity_id] = value
+            self._ids[column].setdefault(value, set()).add(entity_id)
+
+    def _remove(self, entity_id: str):
+        self._all.discard(entity_id)
+        for column in self.columns:
+            value = self._value_of[column].pop(entity_id, None)
+            if value is None:
+                continue
+            members = self._ids[column][value]
+            members.discard(entity_id)
+            if not members:
+                del self._ids[column][value]
+
+    def _rows(self, frame):
+        if self.id_column not in frame.columns:
+            return
+        cells = {c: frame[c].tolist() for c in self.columns if c in frame.columns}
+        for pos, entity_id in enumerate(frame[self.id_column].tolist()):
+            if entity_id:
+                yield entity_id, {c: col[pos] for c, col in cells.items()}
+
+    def rebuild(self, frame):
+        with self._lock:
+            self._ids = {c: {} for c in self.columns}
+            self._value_of = {c: {} for c in self.columns}
+            self._all = set()
+            for entity_id, values in self._rows(frame):
+                self._add(entity_id, values)
+
+    def appended(self, added):
+        with self._lock:
+            for entity_id, values in self._rows(added):
+                self._add(entity_id, values)
+
+    def updated(self, entity_id: str, row):
+        with self._lock:
+            self._remove(entity_id)
+            self._add(entity_id, {c: row.get(c, "") for c in self.columns})
+
+    def deleted(self, entity_id: str):
+        with self._lock:
+            self._remove(entity_id)
+
+    # --- QUERIES -------------------------------------------------------------
+    def _matching(self, filters: dict):
+        """IDs passing every {column: value} filter, or None when nothing filters."""
+        if not filters:
+            return None
+        # Smallest set first, so each intersection is as cheap as it can be.
+        sets = sorted((self._ids[c].get(str(v), set()) for c, v in filters.items()), key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def matching(self, filters: dict) -> set:
+        """Entity IDs passing every {column: value} filter on facet columns."""
+        with self._lock:
+            found = self._matching(filters)
+            return set(self._all) if found is None else found
+
+    def count(self, filters: dict = None) -> int:
+        """How many records pass every {column: value} filter."""
+        with self._lock:
+            found = self._matching(filters)
+            return len(self._all) if found is None else len(found)
+
+    def counts(self, column: str, filters: dict = None) -> list:
+        """(value, count) for every non-blank value of a column, sorted by
+        value, counting only records that pass the filters on the other columns.
+        """
+        if column not in self.columns:
+            return []
+        others = {c: v for c, v in (filters or {}).items() if c != column}
+        with self._lock:
+            base = self._matching(others)
+            return [
+                (value, len(members) if base is None else len(members & base))
+                for value, members in sorted(self._ids[column].items())
+                if value.strip()
+            ]
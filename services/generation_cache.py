@@ -0,0 +1,104 @@
+import streamlit as st
+import threading
+import hashlib
+import json
+import time
+import os
+
+from services.replica_service import REPLICA_DIR
+
+# -----------------------------------------------------------------------------
+# GENERATION CACHE — text-model answers kept on disk, so asking the same thing
+# twice (the same beast re-summoned, the same artifact re-forged) costs nothing.
+# Each answer is a JSON file named by the hash of what produced it: the
+# generator, the model, the prompt version and the arguments. Files are
+# touched on every hit, and the least recently used go first once the cache
+# outgrows MAX_BYTES. It is off unless `generation_cache = true` is set in
+# secrets: the Vault saves what it generates, so a served answer is a duplicate.
+# -----------------------------------------------------------------------------
+CACHE_DIR = os.path.join(REPLICA_DIR, "generations")
+MAX_BYTES = 20 * 1024 * 1024
+
+
+class GenerationCache:
+    """A size-bounded, LRU, content-addressed store of JSON values."""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sizes = {}
+        self._used = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                self._sizes[name[:-5]] = stat.st_size
+                self._used[name[:-5]] = stat.st_mtime
+
+    @staticmethod
+    def key(*parts) -> str:
+        """The content address of a generation: a hash of everything that shaped it."""
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """The stored value, or None on a miss."""
+        with self._lock:
+            if key in self._sizes:
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        value = json.load(f)
+                    now = time.time()
+                    os.utime(self._path(key), (now, now))
+                    self._used[key] = now
+                    self._hits += 1
+                    return value
+                except (OSError, ValueError):
+                    # Gone or damaged on disk: forget it and count a miss.
+                    self._sizes.pop(key, None)
+                    self._used.pop(key, None)
+            self._misses += 1
+            return None
+
+    def put(self, key: str, value):
+        with self._lock:
+            data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            self._sizes[key] = len(data)
+            self._used[key] = time.time()
+            total = sum(self._sizes.values())
+            for oldest in sorted(self._used, key=self._used.get):
+                if total <= self.max_bytes:
+                    break
+                total -= self._sizes.pop(oldest)
+                del self._used[oldest]
+                try:
+                    os.remove(self._path(oldest))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._sizes),
+                "bytes": sum(self._sizes.values()),
+            }
+
+
+@st.cache_resource
+def get_generation_cache():
+    """Returns the process-wide generation cache, or None when it is turned off."""
+    enabled = st.secrets["generation_cache"] if "generation_cache" in st.secrets else False
+    return GenerationCache() if enabled else None
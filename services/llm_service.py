@@ -1,7 +1,12 @@
 import streamlit as st
 from google import genai
 from google.genai import types
+import httpx
+import functools
 import json
+import re
+
+from services.generation_cache import get_generation_cache
 
 # -----------------------------------------------------------------------------
 # MODEL CONFIG — single source of truth. Image generation runs in two gears:
@@ -12,14 +17,69 @@ IMAGE_MODEL_QUALITY = "imagen-4.0-ultra-generate-001"
 IMAGE_MODEL_FAST = "imagen-4.0-fast-generate-001"
 
 
+# One client serves every session: its HTTP connections are pooled and kept
+# alive, so a call no longer pays client setup plus a fresh TCP/TLS handshake.
+# The underlying httpx client is thread-safe.
+MAX_CONNECTIONS = 20            # concurrent requests across all sessions
+MAX_KEEPALIVE_CONNECTIONS = 10  # idle connections held open for reuse
+KEEPALIVE_EXPIRY = 60.0         # seconds an idle connection is kept
+
+
+@st.cache_resource
 def get_gemini_client():
-    """Initializes and returns the Gemini client."""
-    return genai.Client(api_key=st.secrets["GOOGLE_API_KEY"])
+    """Returns the process-wide Gemini client. Cached so every session shares its connection pool."""
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    return genai.Client(
+        api_key=st.secrets["GOOGLE_API_KEY"],
+        http_options=types.HttpOptions(client_args={"limits": limits}),
+    )
 
-def generate_npc_text(concept: str, tone: str) -> dict:
+# -----------------------------------------------------------------------------
+# GENERATION CACHE — a generator whose repeat answer is as good as a new one
+# (the Menagerie's enhanced prompt) is answered from disk on a repeat request
+# (see generation_cache). NPC and item text is not cached: every one is saved
+# to the Vault, so a repeat would be a duplicate. Pass fresh=True to skip the
+# cache for one call. Bump PROMPT_VERSION whenever a prompt changes, so
+# answers to the old prompt stop being served.
+# -----------------------------------------------------------------------------
+PROMPT_VERSION = 1
+
+
+def _generation_key(name: str, args: tuple, kwargs: dict) -> str:
+    return get_generation_cache().key(name, TEXT_MODEL, PROMPT_VERSION, *args, sorted(kwargs.items()))
+
+def cached_generation(name: str):
+    """Decorator for a text generator returning JSON-able data: identical
+    calls (positional and keyword arguments alike) are served from the
+    generation cache. fresh=True calls the generator and leaves the cache alone.
     """
-    Generates the NPC text data and returns a structured dictionary.
-    Handles JSON parsing and error checking locally.
+    def wrap(generate):
+        @functools.wraps(generate)
+        def run(*args, fresh: bool = False, **kwargs):
+            cache = get_generation_cache()
+            if cache is None or fresh:
+                return generate(*args, **kwargs)
+            key = _generation_key(name, args, kwargs)
+            value = cache.get(key)
+            if value is None:
+                value = generate(*args, **kwargs)
+                cache.put(key, value)
+            return value
+        return run
+    return wrap
+
+def generation_stats() -> dict:
+    """Hit ratio and size of the generation cache, or {} when it is off."""
+    cache = get_generation_cache()
+    return cache.stats() if cache else {}
+
+def _npc_text_prompt(concept: str, tone: str) -> str:
+    """The NPC text prompt. Visual_Desc is asked for early so that a streamed
+    reply completes it (and the portrait can start) before the long Lore.
     """
     # 1. DEFINE VIBES
     if tone == "Grim & Shadow":
@@ -29,7 +89,7 @@ def generate_npc_text(concept: str, tone: str) -> dict:
     else:
         text_vibe = "themes include: strange, eerie, weird, dreamlike logic, mysterious, heavy folklore, unsettling phenomena, reality-bending, and the unknown. Characters should feel alien, ancient, esoteric, or tied to unnatural magics."
 
-    text_prompt = f"""
+    return f"""
     Role: Master Worldbuilder and Grounded Fantasy DM.
     Task: Create a vivid, highly believable, and realistic NPC based on: "{concept}".
     Rules:
@@ -38,21 +98,248 @@ def generate_npc_text(concept: str, tone: str) -> dict:
     3. Contextual realism: The setting is high-fantasy. Apply realism based on the subject's nature. Avoid cartoonish high-fantasy tropes.
     4. MANDATORY COMPLIANCE: The Visual_Desc MUST be PG-13.
     5. No Stats.
-    Format: JSON with keys: Name, Class, Visual_Desc, Lore, Greeting.
+    Format: JSON with keys, in this order: Name, Class, Visual_Desc, Greeting, Lore.
+    """
+
+def generate_npc_text(concept: str, tone: str) -> dict:
+    """
+    Generates the NPC text data and returns a structured dictionary.
+    The reply is held to NPC_FIELDS by a response schema (see _generate_record).
     """
+    return _generate_record(_npc_text_prompt(concept, tone), NPC_FIELDS)
 
+class JsonFieldStream:
+    """An incremental parser for a flat JSON object arriving in pieces.
+
+    feed() takes each chunk of text as it streams in. fields holds every
+    key whose value is complete; the string value being read right now is
+    also exposed, unfinished, so it can be shown as it grows. Code fences and
+    a wrapping list are skipped; nested values are not expected.
+    """
+
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.fields = {}
+        self.done = False
+        self._state = "start"    # start, key, colon, value, string, bare, comma
+        self._key = ""
+        self._buf = []
+        self._reading_key = False
+        self._escape = None      # None, "" after a backslash, or the hex digits of a \u escape
+        self._high = None        # a \u high surrogate waiting for the low half of its pair
+
+    def partial(self) -> dict:
+        """The complete fields, plus the string value currently being read."""
+        snapshot = dict(self.fields)
+        if self._state == "string" and not self._reading_key:
+            snapshot[self._key] = "".join(self._buf)
+        return snapshot
+
+    def _code_unit(self, unit: int):
+        """Adds one \\u escape, joining a surrogate pair into its character."""
+        if self._high is not None and 0xDC00 <= unit <= 0xDFFF:
+            self._buf.append(chr(0x10000 + ((self._high - 0xD800) << 10) + (unit - 0xDC00)))
+            self._high = None
+            return
+        self._flush_high()
+        if 0xD800 <= unit <= 0xDBFF:
+            self._high = unit
+        else:
+            self._buf.append(chr(unit))
+
+    def _flush_high(self):
+        """A high surrogate with no low half after it is kept as it came, like json.loads does."""
+        if self._high is not None:
+            self._buf.append(chr(self._high))
+            self._high = None
+
+    def _string_char(self, ch: str):
+        if self._escape is not None:
+            if self._escape == "" and ch != "u":
+                self._flush_high()
+                self._buf.append(self.ESCAPES.get(ch, ch))
+                self._escape = None
+            elif ch == "u" and self._escape == "":
+                self._escape = "u"
+            else:
+                self._escape += ch
+                if len(self._escape) == 5:
+                    self._code_unit(int(self._escape[1:], 16))
+                    self._escape = None
+        elif ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            self._flush_high()
+            text = "".join(self._buf)
+            self._buf = []
+            if self._reading_key:
+                self._key = text
+                self._state = "colon"
+            else:
+                self.fields[self._key] = text
+                self._state = "comma"
+        else:
+            self._flush_high()
+            self._buf.append(ch)
+
+    def feed(self, chunk: str):
+        for ch in chunk:
+            state = self._state
+            if state == "string":
+                self._string_char(ch)
+            elif self.done:
+                return
+            elif state == "start":
+                if ch == "{":
+                    self._state = "key"
+            elif state == "key":
+                if ch == '"':
+                    self._state, self._reading_key = "string", True
+                elif ch == "}":
+                    self.done = True
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value"
+            elif state == "value":
+                if ch == '"':
+                    self._state, self._reading_key = "string", False
+                elif not ch.isspace():
+                    self._state, self._buf = "bare", [ch]
+            elif state == "bare":
+                if ch in ",}":
+                    value = "".join(self._buf).strip()
+                    self._buf = []
+                    try:
+                        self.fields[self._key] = json.loads(value)
+                    except ValueError:
+                        self.fields[self._key] = value
+                    self._state = "key"
+                    self.done = ch == "}"
+                else:
+                    self._buf.append(ch)
+            elif state == "comma":
+                if ch == ",":
+                    self._state = "key"
+                elif ch == "}":
+                    self.done = True
+
+# -----------------------------------------------------------------------------
+# STRUCTURED REPLIES — the text model is held to a declared JSON schema, so a
+# record comes back as one flat object of strings. Should a reply still not
+# parse (cut short, wrapped in prose), the parser is tolerant, and failing that
+# one repair request names what was wrong. A bad reply costs one extra call
+# instead of the whole generation.
+# -----------------------------------------------------------------------------
+NPC_FIELDS = ("Name", "Class", "Visual_Desc", "Greeting", "Lore")
+ITEM_FIELDS = ("Name", "Type", "Rarity", "Lore", "Visual_Desc")
+
+
+def _record_config(fields: tuple) -> types.GenerateContentConfig:
+    """JSON output, with every field a required string, in the given order."""
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=types.Schema(
+            type=types.Type.OBJECT,
+            properties={field: types.Schema(type=types.Type.STRING) for field in fields},
+            required=list(fields),
+            property_ordering=list(fields),
+        ),
+    )
+
+def _parse_record(raw_text: str, fields: tuple) -> dict:
+    """
+    Reads a record out of a model reply: plain JSON, JSON in code fences or
+    prose, a one-element list, or an object cut off partway. Raises
+    ValueError naming the problem when a required field can't be recovered.
+    """
+    text = re.sub(r"```(?:json)?", "", raw_text or "").strip()
+    candidates = [text]
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    record = None
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, list) and parsed:
+            parsed = parsed[0]
+        if isinstance(parsed, dict):
+            record = parsed
+            break
+    if record is None:
+        # Not valid JSON at all: keep whatever fields did arrive whole.
+        parser = JsonFieldStream()
+        parser.feed(text)
+        record = parser.fields
+
+    # A null is as good as absent; str() would otherwise turn it into "None".
+    record = {key: "" if value is None else value if isinstance(value, str) else str(value)
+              for key, value in record.items()}
+    missing = [field for field in fields if not record.get(field, "").strip()]
+    if missing:
+        raise ValueError(f"missing or empty fields: {', '.join(missing)}")
+    return record
+
+def _repair_record(raw_text: str, fields: tuple, problem: str) -> dict:
+    """The single repair attempt: shows the model its reply and what was wrong."""
+    instruction = f"""
+    This reply was meant to be one JSON object with the string keys {", ".join(fields)},
+    but it could not be used ({problem}).
+    Return only the corrected JSON object. Keep every value that is already
+    there; write any missing one in the same voice.
+    Reply:
+    {raw_text}
+    """
     client = get_gemini_client()
-    text_response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=text_prompt
+    response = client.models.generate_content(
+        model=TEXT_MODEL, contents=instruction, config=_record_config(fields)
     )
+    try:
+        return _parse_record(response.text, fields)
+    except ValueError as e:
+        raise Exception(f"The reply could not be read, even after a repair attempt: {e}")
 
-    raw_text = text_response.text.replace('```json', '').replace('```', '').strip()
-    parsed_json = json.loads(raw_text)
+def _generate_record(prompt: str, fields: tuple) -> dict:
+    """One schema-bound request for a record, repaired once if it comes back unreadable."""
+    client = get_gemini_client()
+    response = client.models.generate_content(
+        model=TEXT_MODEL, contents=prompt, config=_record_config(fields)
+    )
+    try:
+        return _parse_record(response.text, fields)
+    except ValueError as e:
+        return _repair_record(response.text, fields, str(e))
 
-    if isinstance(parsed_json, list):
-        return parsed_json[0]
-    return parsed_json
+def stream_npc_text(concept: str, tone: str):
+    """
+    Streams the NPC text. Yields (data, complete) after every chunk: data
+    holds the fields so far (the one being written, unfinished), complete is
+    the set of keys whose values are final. The last yield is the whole NPC.
+    """
+    client = get_gemini_client()
+    parser = JsonFieldStream()
+    received = []
+    for chunk in client.models.generate_content_stream(
+        model=TEXT_MODEL,
+        contents=_npc_text_prompt(concept, tone),
+        config=_record_config(NPC_FIELDS),
+    ):
+        text = chunk.text or ""
+        received.append(text)
+        parser.feed(text)
+        yield parser.partial(), set(parser.fields)
+
+    # The whole reply decides the final record, repaired once if unreadable.
+    raw_text = "".join(received)
+    try:
+        parsed_json = _parse_record(raw_text, NPC_FIELDS)
+    except ValueError as e:
+        parsed_json = _repair_record(raw_text, NPC_FIELDS, str(e))
+    yield parsed_json, set(parsed_json)
 
 def _get_image_style(tone: str) -> str:
     """Helper to maintain a single source of truth for visual styles and tags."""
@@ -67,10 +354,34 @@ def _get_image_style(tone: str) -> str:
 
     return f"{base_style} {img_vibe}"
 
-def generate_npc_image(visual_desc: str, char_class: str, tone: str, fast: bool = False) -> bytes:
+MAX_CANDIDATES = 4  # the most images one request may ask for
+# The most images each model returns per request; the ultra model paints one.
+MODEL_MAX_CANDIDATES = {IMAGE_MODEL_QUALITY: 1, IMAGE_MODEL_FAST: MAX_CANDIDATES}
+
+def _render_images(model: str, prompt: str, aspect_ratio: str, candidates: int = 1) -> list:
+    """Raw bytes of `candidates` images for one prompt, from a single request.
+    Asking a one-image model for several falls back to the FAST model.
+    """
+    if candidates > MODEL_MAX_CANDIDATES.get(model, MAX_CANDIDATES):
+        model = IMAGE_MODEL_FAST
+    client = get_gemini_client()
+    image_response = client.models.generate_images(
+        model=model,
+        prompt=prompt,
+        config=types.GenerateImagesConfig(
+            number_of_images=max(1, min(candidates, MAX_CANDIDATES)),
+            aspect_ratio=aspect_ratio,
+        )
+    )
+    images = [generated.image.image_bytes for generated in image_response.generated_images]
+    if not images:
+        raise Exception("The image model returned no images.")
+    return images
+
+def generate_npc_image(visual_desc: str, char_class: str, tone: str, fast: bool = False, candidates: int = 1):
     """
     Generates an image of the NPC based on the text description and tone.
-    Returns the raw image bytes.
+    Returns the raw image bytes, or a list of candidates when candidates > 1.
 
     fast=True  -> quick image model, for live mid-session generation.
     fast=False -> high-fidelity model, for prep work.
@@ -84,23 +395,14 @@ def generate_npc_image(visual_desc: str, char_class: str, tone: str, fast: bool
         f"Style: {full_style}"
     )
 
-    client = get_gemini_client()
-    image_response = client.models.generate_images(
-        model=IMAGE_MODEL_FAST if fast else IMAGE_MODEL_QUALITY,
-        prompt=image_prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio="3:4",
-        )
-    )
-
-    # Return the raw image bytes
-    return image_response.generated_images[0].image.image_bytes
+    images = _render_images(IMAGE_MODEL_FAST if fast else IMAGE_MODEL_QUALITY, image_prompt, "3:4", candidates)
+    return images if candidates > 1 else images[0]
 
-def remix_npc_image(base_visual: str, char_class: str, tweak: str, tone: str) -> bytes:
+def remix_npc_image(base_visual: str, char_class: str, tweak: str, tone: str, candidates: int = 1):
     """
     Rerolls an image by combining the character's original visual description
-    with a specific user tweak (e.g., 'give him a scar').
+    with a specific user tweak (e.g., 'give him a scar'). A list of images
+    comes back when candidates > 1.
     """
     full_style = _get_image_style(tone)
 
@@ -112,16 +414,8 @@ def remix_npc_image(base_visual: str, char_class: str, tweak: str, tone: str) ->
         f"Style: {full_style}"
     )
 
-    client = get_gemini_client()
-    image_response = client.models.generate_images(
-        model=IMAGE_MODEL_QUALITY,
-        prompt=image_prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio="3:4",
-        )
-    )
-    return image_response.generated_images[0].image.image_bytes
+    images = _render_images(IMAGE_MODEL_QUALITY, image_prompt, "3:4", candidates)
+    return images if candidates > 1 else images[0]
 
 # -----------------------------------------------------------------------------
 # 3. MAGIC ITEM LOGIC
@@ -129,7 +423,7 @@ def remix_npc_image(base_visual: str, char_class: str, tweak: str, tone: str) ->
 def generate_item_text(concept: str, rarity: str) -> dict:
     """
     Generates the Magic Item text data and returns a structured dictionary.
-    Handles JSON parsing locally.
+    The reply is held to ITEM_FIELDS by a response schema (see _generate_record).
     """
     text_prompt = f"""
     Role: Master Worldbuilder and Grounded Fantasy DM.
@@ -141,23 +435,12 @@ def generate_item_text(concept: str, rarity: str) -> dict:
     Format: JSON strictly with these exact keys: Name, Type, Rarity, Lore, Visual_Desc.
     """
 
-    client = get_gemini_client()
-    text_response = client.models.generate_content(
-        model=TEXT_MODEL,
-        contents=text_prompt
-    )
-
-    raw_text = text_response.text.replace('```json', '').replace('```', '').strip()
-    parsed_json = json.loads(raw_text)
-
-    if isinstance(parsed_json, list):
-        return parsed_json[0]
-    return parsed_json
+    return _generate_record(text_prompt, ITEM_FIELDS)
 
-def generate_item_image(visual_desc: str, item_type: str) -> bytes:
+def generate_item_image(visual_desc: str, item_type: str, candidates: int = 1):
     """
     Generates an image of the Magic Item based on the text description.
-    Returns the raw image bytes.
+    Returns the raw image bytes, or a list of candidates when candidates > 1.
     """
     base_style = "Museum quality artifact macro photography, highly detailed, realistic textures, eerie cinematic lighting, 8k resolution, dramatic shadows, grounded. ABSOLUTELY NO CGI, NO 3D RENDER, NO CARTOON, NO VIDEO GAME GRAPHICS."
 
@@ -168,22 +451,15 @@ def generate_item_image(visual_desc: str, item_type: str) -> bytes:
         f"Style: {base_style}"
     )
 
-    client = get_gemini_client()
-    image_response = client.models.generate_images(
-        model=IMAGE_MODEL_QUALITY,
-        prompt=image_prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio="1:1",  # Items look great in square aspects
-        )
-    )
-
-    return image_response.generated_images[0].image.image_bytes
+    # Items look great in square aspects
+    images = _render_images(IMAGE_MODEL_QUALITY, image_prompt, "1:1", candidates)
+    return images if candidates > 1 else images[0]
 
-def remix_item_image(base_visual: str, item_type: str, tweak: str) -> bytes:
+def remix_item_image(base_visual: str, item_type: str, tweak: str, candidates: int = 1):
     """
     Rerolls an item image by combining the artifact's original visual description
-    with a specific user tweak (e.g., 'Make it glow blue').
+    with a specific user tweak (e.g., 'Make it glow blue'). A list of images
+    comes back when candidates > 1.
     """
     base_style = "Museum quality artifact macro photography, highly detailed, realistic textures, eerie cinematic lighting, 8k resolution, dramatic shadows, grounded. ABSOLUTELY NO CGI, NO 3D RENDER, NO CARTOON, NO VIDEO GAME GRAPHICS."
 
@@ -195,17 +471,8 @@ def remix_item_image(base_visual: str, item_type: str, tweak: str) -> bytes:
         f"Style: {base_style}"
     )
 
-    client = get_gemini_client()
-    image_response = client.models.generate_images(
-        model=IMAGE_MODEL_QUALITY,
-        prompt=image_prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio="1:1",
-        )
-    )
-
-    return image_response.generated_images[0].image.image_bytes
+    images = _render_images(IMAGE_MODEL_QUALITY, image_prompt, "1:1", candidates)
+    return images if candidates > 1 else images[0]
 
 
 # -----------------------------------------------------------------------------
@@ -259,6 +526,7 @@ def _tone_vibe(tone: str) -> str:
             "otherworldly and anomalous.")
 
 
+@cached_generation("enhanced_prompt")
 def enhance_prompt(concept: str, kind: str, tone: str) -> str:
     """The Vault's eye: sharpens a raw concept into a vivid, image-ready visual
     description in the house style. Returns plain text, never shown to the user --
@@ -282,9 +550,10 @@ def enhance_prompt(concept: str, kind: str, tone: str) -> str:
     return (response.text or "").strip() or concept
 
 
-def generate_image(description: str, kind: str, tone: str, fast: bool = True) -> bytes:
+def generate_image(description: str, kind: str, tone: str, fast: bool = True, candidates: int = 1):
     """Renders an image from a visual description, in the given room's look and
-    the chosen mood. Returns raw image bytes.
+    the chosen mood. Returns raw image bytes, or a list of candidates when
+    candidates > 1.
 
     fast=True uses the quick image model (default, for live use at the table).
     """
@@ -294,13 +563,7 @@ def generate_image(description: str, kind: str, tone: str, fast: bool = True) ->
         f"Description: {description}. "
         f"Style: {cfg['base_style']} {_tone_vibe(tone)}"
     )
-    client = get_gemini_client()
-    image_response = client.models.generate_images(
-        model=IMAGE_MODEL_FAST if fast else IMAGE_MODEL_QUALITY,
-        prompt=image_prompt,
-        config=types.GenerateImagesConfig(
-            number_of_images=1,
-            aspect_ratio=cfg["aspect_ratio"],
-        ),
+    images = _render_images(
+        IMAGE_MODEL_FAST if fast else IMAGE_MODEL_QUALITY, image_prompt, cfg["aspect_ratio"], candidates
     )
-    return image_response.generated_images[0].image.image_bytes
+    return images if candidates > 1 else images[0]
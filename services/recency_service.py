@@ -0,0 +1,103 @@
+import threading
+import bisect
+
+# -----------------------------------------------------------------------------
+# RECENCY ORDER — every archive lists its records newest first, so the order is
+# kept as an index rather than re-sorted on every rerun.
+#
+# Records are held in one sorted list of keys. The key puts real timestamps
+# first, newest to oldest; blank or unreadable timestamps (NaT) after them;
+# and breaks ties by entity ID, the same rule as the SQLite page path (see
+# VaultReplica.page). The order is therefore fully deterministic, and doesn't
+# change when rows move in the sheet. The index is a FrameCache watcher (see db_service):
+# appended rows are slotted in by bisection, never by a re-sort.
+# -----------------------------------------------------------------------------
+
+
+class RecencyIndex:
+    """Entity IDs of one tab, newest first, from the frame's parsed timestamps."""
+
+    def __init__(self, timestamp_column: str = "Timestamp_dt", id_column: str = "ID"):
+        self.timestamp_column = timestamp_column
+        self.id_column = id_column
+        self.version = -1
+        self._keys = []
+        self._key_of = {}
+        self._lock = threading.Lock()
+
+    def _key(self, entity_id: str, stamp) -> tuple:
+        if stamp is None or stamp != stamp:  # NaT never equals itself
+            return (1, 0, entity_id)
+        return (0, -stamp.value, entity_id)
+
+    def _insert(self, entity_id: str, stamp):
+        key = self._key(entity_id, stamp)
+        self._key_of[entity_id] = key
+        bisect.insort(self._keys, key)
+
+    def _remove(self, entity_id: str):
+        key = self._key_of.pop(entity_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def _rows(self, frame):
+        if self.id_column not in frame.columns:
+            return []
+        ids = frame[self.id_column].tolist()
+        if self.timestamp_column in frame.columns:
+            stamps = frame[self.timestamp_column].tolist()
+        else:
+            stamps = [None] * len(ids)
+        return [(entity_id, stamp) for entity_id, stamp in zip(ids, stamps) if entity_id]
+
+    # --- WATCHER EVENTS ------------------------------------------------------
+    def rebuild(self, frame):
+        with self._lock:
+            self._key_of = {entity_id: self._key(entity_id, stamp) for entity_id, stamp in self._rows(frame)}
+            self._keys = sorted(self._key_of.values())
+
+    def appended(self, added):
+        with self._lock:
+            for entity_id, stamp in self._rows(added):
+                self._insert(entity_id, stamp)
+
+    def updated(self, entity_id: str, row):
+        with self._lock:
+            key = self._key_of.get(entity_id)
+            if key is None:
+                return
+            new_key = self._key(entity_id, row.get(self.timestamp_column))
+            if new_key != key:
+                del self._keys[bisect.bisect_left(self._keys, key)]
+                self._key_of[entity_id] = new_key
+                bisect.insort(self._keys, new_key)
+
+    def deleted(self, entity_id: str):
+        with self._lock:
+            self._remove(entity_id)
+
+    # --- QUERIES -------------------------------------------------------------
+    def key_of(self, entity_id: str) -> tuple:
+        """The record's sort key; newest() lists IDs in ascending key order."""
+        return self._key_of[entity_id]
+
+    def newest(self, entity_ids=None, limit: int = None) -> list:
+        """IDs newest first, optionally only those in entity_ids (a set).
+
+        A small subset is sorted by its keys; a large one is read off the
+        index in order until limit is reached.
+        """
+        with self._lock:
+            if entity_ids is None:
+                keys = self._keys[:limit] if limit else self._keys
+                return [key[2] for key in keys]
+            if len(entity_ids) * 8 < len(self._keys):
+                keys = sorted(self._key_of[e] for e in entity_ids if e in self._key_of)
+                return [key[2] for key in (keys[:limit] if limit else keys)]
+            found = []
+            for key in self._keys:
+                if key[2] in entity_ids:
+                    found.append(key[2])
+                    if limit and len(found) == limit:
+                        break
+            return found
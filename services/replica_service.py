@@ -0,0 +1,408 @@
+import streamlit as st
+import sqlite3
+import threading
+import hashlib
+import json
+import time
+import os
+from datetime import datetime
+
+# -----------------------------------------------------------------------------
+# REPLICA CONFIG — a local SQLite mirror of Masters_Vault_Db. The archive pages
+# read from here; the sheet stays the source of truth and is pulled in the
+# background, while the write helpers in db_service write through to both.
+# -----------------------------------------------------------------------------
+REPLICA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".vault_cache")
+REPLICA_PATH = os.path.join(REPLICA_DIR, "vault_replica.db")
+SYNC_INTERVAL = 60  # seconds between background pulls from the sheet
+TIMESTAMP_HEADER = "Timestamp"
+ID_HEADER = "ID"
+TIMESTAMP_KEY_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+TIMESTAMP_FORMATS = ("%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d")
+
+
+def _digest(values: list) -> str:
+    """Content fingerprint of one sheet row, so a sync only rewrites what changed."""
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def timestamp_key(value: str) -> str:
+    """A Timestamp cell as a fixed-width string that sorts chronologically.
+    Blank or unreadable timestamps become "", which sorts after every real one
+    when reading newest first. db_service parses the frame's timestamps through
+    this too, so both read paths agree on the order.
+    """
+    value = str(value).strip()
+    if not value:
+        return ""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return ""
+    return parsed.replace(tzinfo=None).strftime(TIMESTAMP_KEY_FORMAT)
+
+
+class VaultReplica:
+    """Mirrors each worksheet tab as (sheet_row -> row values) in SQLite.
+
+    Rows keep their physical sheet row number, so the write-through helpers
+    can mirror append_rows / update_cell / delete_rows exactly. Each row also
+    stores its Timestamp as a sortable key (ts) and its entity ID (eid),
+    indexed as (ts DESC, eid) so the newest page of a tab is read without
+    touching the rest. The ID, unlike the sheet row, never moves, so it is
+    what breaks ties and what page cursors point at. One connection is shared
+    by every session, guarded by a lock.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tabs (
+                tab TEXT PRIMARY KEY,
+                header TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                tab TEXT NOT NULL,
+                sheet_row INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                data TEXT NOT NULL,
+                ts TEXT NOT NULL DEFAULT '',
+                eid TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (tab, sheet_row)
+            );
+            CREATE TABLE IF NOT EXISTS markers (
+                tab TEXT PRIMARY KEY,
+                marker TEXT NOT NULL
+            );
+        """)
+        self._migrate()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS rows_newest ON rows (tab, ts DESC, eid)"
+        )
+        self._conn.commit()
+        self._key_cols = {}
+        self._indexed = set()
+        self._sync_thread = None
+
+    def _migrate(self):
+        """Adds the ts and eid columns to replicas written before they existed,
+        fills them in, and drops the indexes that ordered ties by sheet row.
+        """
+        columns = [info[1] for info in self._conn.execute("PRAGMA table_info(rows)")]
+        if "eid" in columns:
+            return
+        if "ts" not in columns:
+            self._conn.execute("ALTER TABLE rows ADD COLUMN ts TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("ALTER TABLE rows ADD COLUMN eid TEXT NOT NULL DEFAULT ''")
+        for (name,) in self._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND (name = 'rows_recency' OR name LIKE 'rows_col_%')"
+        ).fetchall():
+            self._conn.execute(f"DROP INDEX {name}")
+        for tab, header in self._conn.execute("SELECT tab, header FROM tabs").fetchall():
+            ts_col, id_col = self._key_cols_of(json.loads(header))
+            cur = self._conn.execute("SELECT sheet_row, data FROM rows WHERE tab = ?", (tab,))
+            self._conn.executemany(
+                "UPDATE rows SET ts = ?, eid = ? WHERE tab = ? AND sheet_row = ?",
+                [
+                    (*self._keys(row, ts_col, id_col), tab, sheet_row)
+                    for sheet_row, row in ((r, json.loads(d)) for r, d in cur.fetchall())
+                ],
+            )
+
+    @staticmethod
+    def _key_cols_of(header: list) -> tuple:
+        """0-based positions of the Timestamp and ID columns (None where absent)."""
+        return (
+            header.index(TIMESTAMP_HEADER) if TIMESTAMP_HEADER in header else None,
+            header.index(ID_HEADER) if ID_HEADER in header else None,
+        )
+
+    @staticmethod
+    def _keys(row: list, ts_col, id_col) -> tuple:
+        """A row's (ts, eid) ordering keys."""
+        ts = timestamp_key(row[ts_col]) if ts_col is not None and len(row) > ts_col else ""
+        eid = str(row[id_col]) if id_col is not None and len(row) > id_col else ""
+        return ts, eid
+
+    def _key_col(self, tab: str) -> tuple:
+        if tab not in self._key_cols:
+            cur = self._conn.execute("SELECT header FROM tabs WHERE tab = ?", (tab,))
+            found = cur.fetchone()
+            if found is None:
+                # No header yet: don't remember that, the first sync brings one.
+                return None, None
+            self._key_cols[tab] = self._key_cols_of(json.loads(found[0]))
+        return self._key_cols[tab]
+
+    def _put_row(self, tab: str, sheet_row: int, row: list, digest: str = None):
+        ts, eid = self._keys(row, *self._key_col(tab))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO rows (tab, sheet_row, digest, data, ts, eid) VALUES (?, ?, ?, ?, ?, ?)",
+            (tab, sheet_row, digest or _digest(row), json.dumps(row, ensure_ascii=False), ts, eid),
+        )
+
+    # --- READS ---------------------------------------------------------------
+    def has_tab(self, tab: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("SELECT 1 FROM tabs WHERE tab = ?", (tab,))
+            return cur.fetchone() is not None
+
+    def column(self, tab: str, col: int) -> list:
+        """One column of the mirrored rows (header excluded), in sheet order."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM rows WHERE tab = ? ORDER BY sheet_row", (tab,)
+            )
+            rows = [json.loads(data) for (data,) in cur.fetchall()]
+        return [row[col - 1] if len(row) >= col else "" for row in rows]
+
+    def cells(self, tab: str, cells: list) -> list:
+        """The values of a batch of (sheet_row, column_number) cells; row 1 is the header."""
+        with self._lock:
+            rows = {1: self.header(tab)}
+            wanted = sorted({row for row, _ in cells if row != 1})
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start:start + 500]
+                cur = self._conn.execute(
+                    f"SELECT sheet_row, data FROM rows WHERE tab = ? AND sheet_row IN ({','.join('?' * len(chunk))})",
+                    [tab] + chunk,
+                )
+                rows.update((sheet_row, json.loads(data)) for sheet_row, data in cur.fetchall())
+        return [
+            rows[row][col - 1] if row in rows and len(rows[row]) >= col else ""
+            for row, col in cells
+        ]
+
+    def marker(self, tab: str):
+        """The change watermark recorded at the last sync, or None."""
+        with self._lock:
+            cur = self._conn.execute("SELECT marker FROM markers WHERE tab = ?", (tab,))
+            found = cur.fetchone()
+            return found[0] if found else None
+
+    def set_marker(self, tab: str, marker):
+        with self._lock:
+            if marker is None:
+                self._conn.execute("DELETE FROM markers WHERE tab = ?", (tab,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO markers (tab, marker) VALUES (?, ?)", (tab, str(marker))
+                )
+            self._conn.commit()
+
+    def values(self, tab: str) -> list:
+        """The mirrored tab as get_all_values() would return it: header row first."""
+        with self._lock:
+            cur = self._conn.execute("SELECT header FROM tabs WHERE tab = ?", (tab,))
+            found = cur.fetchone()
+            if found is None:
+                return []
+            cur = self._conn.execute(
+                "SELECT data FROM rows WHERE tab = ? ORDER BY sheet_row", (tab,)
+            )
+            return [json.loads(found[0])] + [json.loads(data) for (data,) in cur.fetchall()]
+
+    def header(self, tab: str) -> list:
+        with self._lock:
+            cur = self._conn.execute("SELECT header FROM tabs WHERE tab = ?", (tab,))
+            found = cur.fetchone()
+            return json.loads(found[0]) if found else []
+
+    def index_columns(self, cols: list):
+        """Makes sure each of these column numbers has an expression index, so
+        a filter on it seeks instead of reading every row's JSON. One index
+        per column position serves every tab.
+        """
+        missing = [int(col) for col in cols if int(col) not in self._indexed]
+        if not missing:
+            return
+        with self._lock:
+            for col in missing:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS rows_facet_{col} ON rows "
+                    f"(tab, json_extract(data, '$[{col - 1}]'), ts DESC, eid)"
+                )
+                self._indexed.add(col)
+            self._conn.commit()
+
+    def _where(self, tab: str, filters: dict):
+        """SQL for tab = ? plus one equality test per {column_number: value} filter.
+        The test is written exactly as the expression indexes are, so they apply;
+        only a filter on a blank value (a missing cell counts as blank) can't use them.
+        """
+        clause = "tab = ?"
+        params = [tab]
+        for col, value in filters.items():
+            cell = f"json_extract(data, '$[{int(col) - 1}]')"
+            clause += f" AND {cell} = ?" if str(value) else f" AND COALESCE({cell}, '') = ?"
+            params.append(str(value))
+        return clause, params
+
+    def page(self, tab: str, filters: dict, after, limit: int, total: int = None):
+        """One page of rows, newest Timestamp first (ties: by entity ID),
+        matching every {column_number: value} filter.
+
+        after is the (ts, eid) key of the previous page's last row, or None
+        for the first page. It names a record rather than a position, so
+        deleting a row on an earlier page doesn't skip or repeat one here; seeking to it on the recency index costs the
+        same on page 500 as on page 1. total is the number of matching rows if
+        the caller already knows it; otherwise they are counted here, so pass
+        it back in after the first page. Returns (rows, total, next_after), with
+        next_after None on the last page.
+        """
+        clause, params = self._where(tab, filters)
+        with self._lock:
+            if total is None:
+                total = self._conn.execute(f"SELECT COUNT(*) FROM rows WHERE {clause}", params).fetchone()[0]
+            if after is not None:
+                clause += " AND (ts < ? OR (ts = ? AND eid > ?))"
+                params = params + [after[0], after[0], after[1]]
+            cur = self._conn.execute(
+                f"SELECT data, ts, eid FROM rows WHERE {clause} ORDER BY ts DESC, eid LIMIT ?",
+                params + [limit + 1],
+            )
+            found = cur.fetchall()
+        next_after = found[limit - 1][1:] if len(found) > limit else None
+        return [json.loads(data) for data, _, _ in found[:limit]], total, next_after
+
+    # --- SYNC FROM THE SHEET -------------------------------------------------
+    def sync(self, tab: str, values: list) -> int:
+        """Applies a full get_all_values() pull as a delta: only rows whose
+        content changed are rewritten, and rows past the end are dropped.
+        Returns the number of rows touched.
+        """
+        header = values[0] if values else []
+        body = values[1:]
+        touched = 0
+        with self._lock:
+            # If the Timestamp or ID column moved, every row's keys are rewritten.
+            header_moved = self.has_tab(tab) and self._key_cols_of(self.header(tab)) != self._key_cols_of(header)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tabs (tab, header, synced_at) VALUES (?, ?, ?)",
+                (tab, json.dumps(header, ensure_ascii=False), time.time()),
+            )
+            self._key_cols.pop(tab, None)
+            cur = self._conn.execute(
+                "SELECT sheet_row, digest, ts = '' AND eid = '' FROM rows WHERE tab = ?", (tab,)
+            )
+            known = {} if header_moved else {row: (digest, keyless) for row, digest, keyless in cur.fetchall()}
+            key_cols = self._key_col(tab)
+            for offset, row in enumerate(body):
+                sheet_row = offset + 2
+                digest = _digest(row)
+                stored, keyless = known.get(sheet_row, (None, False))
+                # Rows written before the tab had a header carry no keys yet.
+                if stored != digest or (keyless and self._keys(row, *key_cols) != ("", "")):
+                    self._put_row(tab, sheet_row, row, digest)
+                    touched += 1
+            stale = self._conn.execute(
+                "DELETE FROM rows WHERE tab = ? AND sheet_row > ?", (tab, len(body) + 1)
+            ).rowcount
+            self._conn.commit()
+        return touched + stale
+
+    def ensure_syncing(self, refreshers: dict, on_change=None):
+        """Starts the background puller once per process.
+
+        refreshers maps tab name -> a zero-argument function that brings that
+        tab up to date and returns how many rows it touched.
+        on_change(tab) is called whenever a pull actually changed that tab.
+        """
+        with self._lock:
+            if self._sync_thread is not None and self._sync_thread.is_alive():
+                return
+            self._sync_thread = threading.Thread(
+                target=self._sync_loop, args=(refreshers, on_change), daemon=True, name="vault-replica-sync"
+            )
+            self._sync_thread.start()
+
+    def _sync_loop(self, refreshers: dict, on_change):
+        while True:
+            time.sleep(SYNC_INTERVAL)
+            for tab, refresh in refreshers.items():
+                try:
+                    if refresh() and on_change:
+                        on_change(tab)
+                except Exception as e:
+                    # A failed pull just leaves the replica one interval behind.
+                    print(f"Replica Sync Error ({tab}): {e}")
+
+    # --- WRITE-THROUGH -------------------------------------------------------
+    def _shift(self, tab: str, from_row: int, delta: int):
+        """Moves every row at or below from_row by delta, keeping the key unique."""
+        self._conn.execute(
+            "UPDATE rows SET sheet_row = -(sheet_row + ?) WHERE tab = ? AND sheet_row >= ?",
+            (delta, tab, from_row),
+        )
+        self._conn.execute(
+            "UPDATE rows SET sheet_row = -sheet_row WHERE tab = ? AND sheet_row < 0", (tab,)
+        )
+
+    def append_rows(self, tab: str, rows: list):
+        """Mirrors worksheet.append_rows(rows): the rows land after the last one."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT COALESCE(MAX(sheet_row), 1) FROM rows WHERE tab = ?", (tab,)
+            )
+            last_row = cur.fetchone()[0]
+            for offset, row_data in enumerate(rows, start=1):
+                self._put_row(tab, last_row + offset, [str(v) for v in row_data])
+            self._conn.commit()
+
+    def set_header_cell(self, tab: str, col: int, value: str):
+        """Writes one cell of the header row."""
+        with self._lock:
+            cur = self._conn.execute("SELECT header FROM tabs WHERE tab = ?", (tab,))
+            found = cur.fetchone()
+            header = json.loads(found[0]) if found else []
+            if len(header) < col:
+                header.extend([""] * (col - len(header)))
+            header[col - 1] = str(value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tabs (tab, header, synced_at) VALUES (?, ?, ?)",
+                (tab, json.dumps(header, ensure_ascii=False), time.time()),
+            )
+            self._key_cols.pop(tab, None)
+            self._conn.commit()
+
+    def update_cells(self, tab: str, sheet_row: int, cells: dict):
+        """Mirrors worksheet.update_cell for each {column_number: value} pair."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT data FROM rows WHERE tab = ? AND sheet_row = ?", (tab, sheet_row)
+            )
+            found = cur.fetchone()
+            row = json.loads(found[0]) if found else []
+            for col, value in cells.items():
+                if len(row) < col:
+                    row.extend([""] * (col - len(row)))
+                row[col - 1] = str(value)
+            self._put_row(tab, sheet_row, row)
+            self._conn.commit()
+
+    def delete_row(self, tab: str, sheet_row: int):
+        """Mirrors worksheet.delete_rows(sheet_row)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM rows WHERE tab = ? AND sheet_row = ?", (tab, sheet_row)
+            )
+            self._shift(tab, sheet_row + 1, -1)
+            self._conn.commit()
+
+
+@st.cache_resource
+def get_replica() -> VaultReplica:
+    """Returns the process-wide replica. Cached so every session shares one file handle."""
+    return VaultReplica(REPLICA_PATH)
+
@@ -0,0 +1,370 @@
+import threading
+import bisect
+import heapq
+import math
+import re
+
+# -----------------------------------------------------------------------------
+# FULL-TEXT SEARCH — an inverted index over an archive's text columns, so the
+# search box looks words up instead of running str.contains over every Lore
+# paragraph on each rerun.
+#
+# Documents are keyed by entity ID. The index is a FrameCache watcher (see
+# db_service): it is built once per frame version, and appends, edits and
+# deletes are applied to it in place as they reach the frame.
+# -----------------------------------------------------------------------------
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_PREFIX = 2          # shorter query terms only match whole words
+PREFIX_WEIGHT = 0.8     # a prefix hit counts a little less than the whole word
+MAX_PREFIX_TOKENS = 20  # a prefix expands to at most this many words, shortest first
+
+
+def tokenize(text) -> list:
+    """Lower-cased word tokens of a cell."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class TextIndex:
+    """Inverted index: token -> {entity_id: weighted term frequency}.
+
+    fields maps column name -> weight, so a hit in Name can outrank one buried
+    in Lore. The sorted vocabulary makes prefix lookups a bisect.
+    """
+
+    def __init__(self, fields: dict, id_column: str = "ID"):
+        self.fields = fields
+        self.id_column = id_column
+        self.version = -1
+        self._postings = {}
+        self._docs = {}
+        self._vocab = []
+        self._order = {}
+        self._lock = threading.Lock()
+
+    # --- MAINTENANCE ---------------------------------------------------------
+    def _add(self, entity_id, values: dict, keep_sorted: bool = True, fields: dict = None):
+        counts = {}
+        for column, weight in (fields or self.fields).items():
+            for token in tokenize(values.get(column, "")):
+                counts[token] = counts.get(token, 0) + weight
+        self._docs[entity_id] = counts
+        self._order.setdefault(entity_id, len(self._order))
+        postings = self._postings
+        for token, tf in counts.items():
+            posting = postings.get(token)
+            if posting is None:
+                posting = postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self._vocab, token)
+            posting[entity_id] = tf
+
+    def _remove(self, entity_id, keep_sorted: bool = True):
+        for token in self._docs.pop(entity_id, {}):
+            posting = self._postings[token]
+            posting.pop(entity_id, None)
+            if not posting:
+                del self._postings[token]
+                if keep_sorted:
+                    del self._vocab[bisect.bisect_left(self._vocab, token)]
+
+    def _rows(self, frame, fields: dict = None):
+        """(entity_id, {column: value}) for every row of a frame, without iterrows."""
+        if self.id_column not in frame.columns:
+            return
+        columns = [c for c in (fields or self.fields) if c in frame.columns]
+        cells = [frame[c].tolist() for c in columns]
+        for pos, entity_id in enumerate(frame[self.id_column].tolist()):
+            if entity_id:
+                yield entity_id, {c: col[pos] for c, col in zip(columns, cells)}
+
+    def rebuild(self, frame):
+        with self._lock:
+            self._postings, self._docs, self._vocab, self._order = {}, {}, [], {}
+            for entity_id, values in self._rows(frame):
+                self._add(entity_id, values, keep_sorted=False)
+            self._vocab = sorted(self._postings)
+
+    def appended(self, added):
+        with self._lock:
+            for entity_id, values in self._rows(added):
+                self._add(entity_id, values)
+
+    def updated(self, entity_id: str, row):
+        with self._lock:
+            self._remove(entity_id)
+            self._add(entity_id, {c: row.get(c, "") for c in self.fields})
+
+    def deleted(self, entity_id: str):
+        with self._lock:
+            self._remove(entity_id)
+            self._order.pop(entity_id, None)
+
+    # --- QUERIES -------------------------------------------------------------
+    def _expand(self, term: str) -> list:
+        """(token, weight) pairs a query term matches: the word itself, plus
+        the longer words it starts when the term is long enough. Only the
+        MAX_PREFIX_TOKENS closest (shortest) of those count, so a two-letter
+        prefix doesn't pull in half the vocabulary.
+        """
+        matches = [(term, 1.0)] if term in self._postings else []
+        if len(term) >= MIN_PREFIX:
+            start = bisect.bisect_right(self._vocab, term)
+            end = bisect.bisect_left(self._vocab, term + "\U0010ffff", start)
+            longer = self._vocab[start:end]
+            if len(longer) > MAX_PREFIX_TOKENS:
+                longer = heapq.nsmallest(MAX_PREFIX_TOKENS, longer, key=len)
+            matches.extend((token, PREFIX_WEIGHT) for token in longer)
+        return matches
+
+    def search(self, query: str, limit: int = None) -> list:
+        """Entity IDs matching every term of the query, best first."""
+        return self.ranked(query, limit)[0]
+
+    def ranked(self, query: str, limit: int = None) -> tuple:
+        """(the best `limit` matching IDs, best first; how many match in all).
+
+        Each term scores tf * idf on its best-matching token; a document's
+        score is the sum over terms. Ties keep the most recently added first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+        with self._lock:
+            total = len(self._docs) or 1
+            expanded = [self._expand(term) for term in terms]
+            scores = None
+            if len(expanded) == 1 and len(expanded[0]) == 1:
+                # One word, one token: the score is tf times a constant, so the
+                # posting itself ranks the matches without being copied.
+                scores, expanded = self._postings[expanded[0][0][0]], []
+            for tokens in expanded:
+                term_scores = None
+                for token, weight in tokens:
+                    posting = self._postings[token]
+                    scale = math.log(1 + total / len(posting)) * weight
+                    if term_scores is None:
+                        term_scores = {entity_id: tf * scale for entity_id, tf in posting.items()}
+                        continue
+                    for entity_id, tf in posting.items():
+                        score = tf * scale
+                        if score > term_scores.get(entity_id, 0.0):
+                            term_scores[entity_id] = score
+                if not term_scores:
+                    return [], 0
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {e: s + term_scores[e] for e, s in scores.items() if e in term_scores}
+                if not scores:
+                    return [], 0
+            candidates = scores
+            if limit and len(scores) > limit:
+                # Only what can make the cut is sorted: the limit-th best score
+                # comes off a heap of plain floats, and everything scoring below it is dropped.
+                cutoff = heapq.nlargest(limit, scores.values())[-1]
+                candidates = [e for e, s in scores.items() if s >= cutoff]
+            # Two stable sorts on plain lookups instead of one on a tuple key:
+            # newest first, then best first (ties keep the newest first).
+            ranked = sorted(candidates, key=self._order.__getitem__, reverse=True)
+            ranked.sort(key=scores.__getitem__, reverse=True)
+        return (ranked[:limit] if limit else ranked), len(scores)
+
+
+# -----------------------------------------------------------------------------
+# CROSS-ARCHIVE SEARCH — one index over several tabs, so a single query ranks
+# NPCs, items and creatures against each other on the same idf.
+# Documents are keyed (tab, entity_id) and each tab keeps its own field
+# weights. Every tab feeds the index through its own watcher (feed(tab)),
+# since each tab's FrameCache has its own version.
+# -----------------------------------------------------------------------------
+
+
+class CombinedIndex(TextIndex):
+    """A TextIndex over several tabs; search() returns (tab, entity_id) keys."""
+
+    def __init__(self, fields_by_tab: dict, id_column: str = "ID"):
+        super().__init__({}, id_column)
+        self.fields_by_tab = fields_by_tab
+        self.feeds = {}
+        self._keys_of = {tab: set() for tab in fields_by_tab}
+
+    def feed(self, tab: str) -> "_TabFeed":
+        """The watcher that keeps one tab's documents in this index."""
+        if tab not in self.feeds:
+            self.feeds[tab] = _TabFeed(self, tab)
+        return self.feeds[tab]
+
+
+class _TabFeed:
+    """Passes one tab's FrameCache events on to a CombinedIndex."""
+
+    def __init__(self, index: CombinedIndex, tab: str):
+        self.index = index
+        self.tab = tab
+        self.fields = index.fields_by_tab[tab]
+        self.version = -1
+
+    def rebuild(self, frame):
+        index = self.index
+        with index._lock:
+            keys = index._keys_of[self.tab]
+            for key in keys:
+                index._remove(key, keep_sorted=False)
+                index._order.pop(key, None)
+            keys.clear()
+            for entity_id, values in index._rows(frame, self.fields):
+                key = (self.tab, entity_id)
+                keys.add(key)
+                index._add(key, values, keep_sorted=False, fields=self.fields)
+            index._vocab = sorted(index._postings)
+
+    def appended(self, added):
+        index = self.index
+        with index._lock:
+            for entity_id, values in index._rows(added, self.fields):
+                key = (self.tab, entity_id)
+                index._keys_of[self.tab].add(key)
+                index._add(key, values, fields=self.fields)
+
+    def updated(self, entity_id: str, row):
+        index = self.index
+        key = (self.tab, entity_id)
+        with index._lock:
+            index._remove(key)
+            index._add(key, {c: row.get(c, "") for c in self.fields}, fields=self.fields)
+
+    def deleted(self, entity_id: str):
+        index = self.index
+        key = (self.tab, entity_id)
+        with index._lock:
+            index._remove(key)
+            index._order.pop(key, None)
+            index._keys_of[self.tab].discard(key)
+
+
+# -----------------------------------------------------------------------------
+# FUZZY NAMES — a trigram index over a name column, so a misspelt name still
+# finds its record ("Sigrud" finds Sigrid).
+# The index works on the distinct words of the names rather than whole names,
+# so one misspelt word scores against "Sigrid" and not against all of
+# "Sigrid Ironhand of the Northern Reach". Word similarity is the Jaccard
+# overlap of the words' trigram sets.
+# -----------------------------------------------------------------------------
+FUZZY_THRESHOLD = 0.3   # least similarity (0..1) a fuzzy match needs
+
+
+def trigrams(word: str) -> set:
+    """The trigrams of a word, padded so its start and end count extra."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """word -> trigrams for every word of one name column, plus word -> IDs."""
+
+    def __init__(self, column: str, id_column: str = "ID"):
+        self.column = column
+        self.id_column = id_column
+        self.version = -1
+        self._grams_of = {}
+        self._words_by_gram = {}
+        self._ids_of = {}
+        self._words_of = {}
+        self._order = {}
+        self._lock = threading.Lock()
+
+    # --- MAINTENANCE ---------------------------------------------------------
+    def _add(self, entity_id: str, name):
+        words = set(tokenize(name))
+        self._words_of[entity_id] = words
+        self._order.setdefault(entity_id, len(self._order))
+        for word in words:
+            ids = self._ids_of.get(word)
+            if ids is None:
+                ids = self._ids_of[word] = set()
+                grams = self._grams_of[word] = trigrams(word)
+                for gram in grams:
+                    self._words_by_gram.setdefault(gram, set()).add(word)
+            ids.add(entity_id)
+
+    def _remove(self, entity_id: str):
+        for word in self._words_of.pop(entity_id, ()):
+            ids = self._ids_of[word]
+            ids.discard(entity_id)
+            if ids:
+                continue
+            del self._ids_of[word]
+            for gram in self._grams_of.pop(word):
+                words = self._words_by_gram[gram]
+                words.discard(word)
+                if not words:
+                    del self._words_by_gram[gram]
+
+    def _rows(self, frame):
+        if self.id_column not in frame.columns or self.column not in frame.columns:
+            return []
+        return [
+            (entity_id, name)
+            for entity_id, name in zip(frame[self.id_column].tolist(), frame[self.column].tolist())
+            if entity_id
+        ]
+
+    def rebuild(self, frame):
+        with self._lock:
+            self._grams_of, self._words_by_gram, self._ids_of = {}, {}, {}
+            self._words_of, self._order = {}, {}
+            for entity_id, name in self._rows(frame):
+                self._add(entity_id, name)
+
+    def appended(self, added):
+        with self._lock:
+            for entity_id, name in self._rows(added):
+                self._add(entity_id, name)
+
+    def updated(self, entity_id: str, row):
+        with self._lock:
+            self._remove(entity_id)
+            self._add(entity_id, row.get(self.column, ""))
+
+    def deleted(self, entity_id: str):
+        with self._lock:
+            self._remove(entity_id)
+            self._order.pop(entity_id, None)
+
+    # --- QUERIES -------------------------------------------------------------
+    def _close_words(self, word: str, threshold: float) -> dict:
+        """{indexed word: similarity} for the words close enough to one query word."""
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for candidate in self._words_by_gram.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        close = {}
+        for candidate, count in shared.items():
+            score = count / (len(grams) + len(self._grams_of[candidate]) - count)
+            if score >= threshold:
+                close[candidate] = score
+        return close
+
+    def similar(self, query: str, limit: int = 10, threshold: float = FUZZY_THRESHOLD) -> list:
+        """(entity_id, similarity) for names resembling the query, best first.
+
+        A record scores the mean, over the query's words, of its best word
+        match; ties keep the most recently added first.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        with self._lock:
+            totals = {}
+            for word in words:
+                best = {}
+                for candidate, score in self._close_words(word, threshold).items():
+                    for entity_id in self._ids_of[candidate]:
+                        if score > best.get(entity_id, 0.0):
+                            best[entity_id] = score
+                for entity_id, score in best.items():
+                    totals[entity_id] = totals.get(entity_id, 0.0) + score
+            scored = [(e, total / len(words)) for e, total in totals.items() if total / len(words) >= threshold]
+            rank = lambda pair: (-pair[1], -self._order[pair[0]])
+            return heapq.nsmallest(limit, scored, key=rank) if limit else sorted(scored, key=rank)
@@ -0,0 +1,166 @@
+import streamlit as st
+from concurrent.futures import Future
+import threading
+import random
+import time
+
+# -----------------------------------------------------------------------------
+# SHEETS SCHEDULER — every Google Sheets call goes through here.
+# One process-wide token bucket keeps us under the per-minute quota no matter
+# how many DMs are saving at once; writes queued for the same tab while a token
+# is awaited are coalesced into one request; and a 429 (or a transient 5xx)
+# is retried with jittered exponential backoff instead of losing the row.
+# Appends and deletes are not safe to replay: a 5xx may arrive after the
+# server already applied them, and a second try would duplicate the rows (or
+# delete the wrong one). Those are retried on a 429 alone, which Sheets sends
+# before doing anything.
+# -----------------------------------------------------------------------------
+REQUESTS_PER_MINUTE = 60   # the Sheets per-user quota
+BURST = 10                 # requests allowed back-to-back after a quiet spell
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0         # seconds; doubles each attempt...
+BACKOFF_CAP = 32.0         # ...up to this ceiling
+RETRY_STATUSES = {429, 500, 502, 503}
+UNSAFE_RETRY_STATUSES = {429}  # for calls that must not run twice
+
+
+def _status_of(error: Exception):
+    """The HTTP status behind a gspread APIError (or anything shaped like one)."""
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+class _Batch:
+    """Items waiting under one coalescing key, plus the Future they all share."""
+
+    def __init__(self):
+        self.items = []
+        self.done = Future()
+
+
+class SheetsScheduler:
+    """Token-bucket rate limiter with retry, write coalescing and metrics."""
+
+    def __init__(self, per_minute: float = REQUESTS_PER_MINUTE, burst: int = BURST, sleep=time.sleep):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._metrics = {
+            "calls": 0,
+            "retries": 0,
+            "throttled": 0,
+            "coalesced": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    # --- RATE LIMIT ----------------------------------------------------------
+    def acquire(self):
+        """Blocks until a request token is free."""
+        started = time.monotonic()
+        with self._lock:
+            self._metrics["queue_depth"] += 1
+            self._metrics["max_queue_depth"] = max(
+                self._metrics["max_queue_depth"], self._metrics["queue_depth"]
+            )
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                    self._stamp = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+                self._sleep(delay)
+        finally:
+            waited = time.monotonic() - started
+            with self._lock:
+                self._metrics["queue_depth"] -= 1
+                self._metrics["total_wait"] += waited
+                self._metrics["max_wait"] = max(self._metrics["max_wait"], waited)
+
+    # --- CALLS ---------------------------------------------------------------
+    def call(self, fn, *args, **kwargs):
+        """Runs one Sheets call under the quota, retrying throttled attempts."""
+        return self._run(lambda: fn(*args, **kwargs))
+
+    def call_once(self, fn, *args, **kwargs):
+        """Like call(), for a request that must not be replayed once it may have
+        landed (appends, deletes): only a 429 is retried.
+        """
+        return self._run(lambda: fn(*args, **kwargs), retry_on=UNSAFE_RETRY_STATUSES)
+
+    def _run(self, attempt_call, on_token=None, retry_on=RETRY_STATUSES):
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire()
+            if on_token is not None and attempt == 0:
+                on_token()
+            with self._lock:
+                self._metrics["calls"] += 1
+            try:
+                return attempt_call()
+            except Exception as e:
+                status = _status_of(e)
+                if status not in retry_on or attempt == MAX_RETRIES:
+                    raise
+                with self._lock:
+                    self._metrics["retries"] += 1
+                    if status == 429:
+                        self._metrics["throttled"] += 1
+                # "Full jitter": a random wait up to the exponential ceiling.
+                self._sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+    def coalesce(self, key, items: list, execute, replayable: bool = True):
+        """Queues items under key and runs execute(all_items) once for every
+        caller that joined while the first one was waiting for a token.
+        Every caller gets the same result (or the same exception).
+        With replayable=False only a 429 is retried (see call_once).
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = _Batch()
+            else:
+                self._metrics["coalesced"] += 1
+            batch.items.extend(items)
+        if not leader:
+            return batch.done.result()
+
+        def close():
+            # Token in hand: anyone arriving from here on starts a new batch.
+            with self._lock:
+                del self._batches[key]
+
+        try:
+            result = self._run(
+                lambda: execute(batch.items), on_token=close,
+                retry_on=RETRY_STATUSES if replayable else UNSAFE_RETRY_STATUSES,
+            )
+        except Exception as e:
+            batch.done.set_exception(e)
+            raise
+        batch.done.set_result(result)
+        return result
+
+    # --- METRICS -------------------------------------------------------------
+    def stats(self) -> dict:
+        """A snapshot of the scheduler counters, with the average wait worked out."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["tokens_available"] = round(self._tokens, 2)
+        snapshot["avg_wait"] = snapshot["total_wait"] / snapshot["calls"] if snapshot["calls"] else 0.0
+        return snapshot
+
+
+@st.cache_resource
+def get_scheduler() -> SheetsScheduler:
+    """Returns the process-wide scheduler. Cached so every session shares one bucket."""
+    return SheetsScheduler()
@@ -0,0 +1,318 @@
+import streamlit as st
+import gspread
+from google.oauth2 import service_account
+import threading
+import os
+
+from services.replica_service import VaultReplica, REPLICA_DIR
+from services.sheets_scheduler import get_scheduler
+
+# -----------------------------------------------------------------------------
+# STORAGE BACKENDS — where the vault's three tabs actually live.
+# db_service only ever talks to a VaultBackend, so the pages can run against
+# Google Sheets (the real vault), a standalone SQLite file, or plain memory
+# (no credentials, no network) without knowing the difference.
+#
+# Every backend speaks in sheet terms: tabs by name, values as lists of
+# strings, rows numbered from 1 with row 1 holding the header.
+# -----------------------------------------------------------------------------
+SPREADSHEET_NAME = "Masters_Vault_Db"
+
+# The columns each tab starts with when a backend has to create it.
+TAB_HEADERS = {
+    "NPCs": ["Name", "Class", "Lore", "Greeting", "Visual_Desc", "Image_URL", "Timestamp", "Campaign", "Faction", "ID"],
+    "Magic Items": ["Name", "Type", "Rarity", "Lore", "Visual_Desc", "Image_URL", "Timestamp", "ID"],
+    "Creatures": ["Concept", "Tone", "Image_URL", "Timestamp", "ID"],
+}
+
+
+class VaultBackend:
+    """The storage operations db_service needs. Subclasses implement the four
+    core operations; the cheap partial reads below fall back to read_values.
+
+    remote backends are slow to read, so db_service fronts them with the local
+    SQLite replica; local ones are read directly.
+    """
+
+    name = "base"
+    remote = False
+
+    def read_values(self, tab: str) -> list:
+        """The whole tab, header row first, as lists of strings."""
+        raise NotImplementedError
+
+    def append_rows(self, tab: str, rows: list):
+        """Adds rows after the last one."""
+        raise NotImplementedError
+
+    def update_cells(self, tab: str, cells: list):
+        """Writes a batch of (sheet_row, column_number, value) cells in one go."""
+        raise NotImplementedError
+
+    def delete_row(self, tab: str, sheet_row: int):
+        """Removes one row; the rows below move up."""
+        raise NotImplementedError
+
+    def change_marker(self, tab: str):
+        """A cheap token that changes whenever the tab might have; None if unknown."""
+        return None
+
+    def read_header(self, tab: str) -> list:
+        """The header row alone."""
+        values = self.read_values(tab)
+        return values[0] if values else []
+
+    def read_column(self, tab: str, col: int) -> list:
+        """One column, header cell first."""
+        return [row[col - 1] if len(row) >= col else "" for row in self.read_values(tab)]
+
+    def read_columns(self, tab: str, cols: list) -> list:
+        """Several columns at once, each header cell first."""
+        values = self.read_values(tab)
+        return [[row[col - 1] if len(row) >= col else "" for row in values] for col in cols]
+
+    def read_cells(self, tab: str, cells: list) -> list:
+        """The values of a batch of (sheet_row, column_number) cells, "" where empty."""
+        values = self.read_values(tab)
+        return [
+            values[row - 1][col - 1] if len(values) >= row and len(values[row - 1]) >= col else ""
+            for row, col in cells
+        ]
+
+    def read_rows(self, tab: str, first_row: int) -> list:
+        """Every row from first_row to the end."""
+        return self.read_values(tab)[first_row - 1:]
+
+    def local_store(self):
+        """The VaultReplica this backend keeps its rows in, if it has one."""
+        return None
+
+
+# -----------------------------------------------------------------------------
+# 1. GOOGLE SHEETS (the real vault)
+# -----------------------------------------------------------------------------
+@st.cache_resource
+def get_gspread_client():
+    """Authenticates and returns the gspread client. Cached so we only connect once."""
+    SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    if "gcp_service_account" in st.secrets:
+        creds = service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"], scopes=SCOPES
+        )
+    else:
+        creds = service_account.Credentials.from_service_account_file("service_account.json", scopes=SCOPES)
+
+    return gspread.authorize(creds)
+
+
+class SheetsBackend(VaultBackend):
+    """The Masters_Vault_Db spreadsheet. Worksheets are opened once and kept.
+
+    Every API call goes through the shared SheetsScheduler; appends and cell
+    updates for the same tab that pile up behind the quota go out as one call.
+    Appends and deletes are retried only on a 429, never after a 5xx.
+    """
+
+    name = "sheets"
+    remote = True
+
+    def __init__(self, spreadsheet_name: str = SPREADSHEET_NAME):
+        self._spreadsheet_name = spreadsheet_name
+        self._worksheets = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, tab: str):
+        with self._lock:
+            if tab not in self._worksheets:
+                scheduler = get_scheduler()
+                sh = scheduler.call(get_gspread_client().open, self._spreadsheet_name)
+                try:
+                    self._worksheets[tab] = scheduler.call(sh.worksheet, tab)
+                except gspread.WorksheetNotFound as e:
+                    if tab != "Creatures":
+                        raise Exception(f"Could not find a tab named '{tab}' in your Google Sheet. Error: {e}")
+                    # The Menagerie's tab is created on first use.
+                    ws = scheduler.call(sh.add_worksheet, title=tab, rows=200, cols=8)
+                    scheduler.call_once(ws.append_row, TAB_HEADERS[tab])
+                    self._worksheets[tab] = ws
+            return self._worksheets[tab]
+
+    def read_values(self, tab: str) -> list:
+        return get_scheduler().call(self.worksheet(tab).get_all_values)
+
+    def append_rows(self, tab: str, rows: list):
+        ws = self.worksheet(tab)
+        get_scheduler().coalesce(("append", tab), rows, ws.append_rows, replayable=False)
+
+    def update_cells(self, tab: str, cells: list):
+        if not cells:
+            return
+        ws = self.worksheet(tab)
+        scheduler = get_scheduler()
+        widest = max(col for _, col, _ in cells)
+        if ws.col_count < widest:
+            scheduler.call(ws.add_cols, widest - ws.col_count)
+
+        def write(all_cells: list):
+            ws.batch_update([
+                {"range": gspread.utils.rowcol_to_a1(row, col), "values": [[value]]}
+                for row, col, value in all_cells
+            ])
+
+        scheduler.coalesce(("update", tab), cells, write)
+
+    def delete_row(self, tab: str, sheet_row: int):
+        get_scheduler().call_once(self.worksheet(tab).delete_rows, sheet_row)
+
+    def change_marker(self, tab: str):
+        # The Drive modifiedTime of the whole spreadsheet: one tiny metadata call.
+        sh = self.worksheet(tab).spreadsheet
+        try:
+            if hasattr(sh, "get_lastUpdateTime"):
+                return get_scheduler().call(sh.get_lastUpdateTime)
+            return get_scheduler().call(lambda: sh.lastUpdateTime)
+        except Exception as e:
+            print(f"Change Marker Error ({tab}): {e}")
+            return None
+
+    def read_header(self, tab: str) -> list:
+        return get_scheduler().call(self.worksheet(tab).row_values, 1)
+
+    def read_column(self, tab: str, col: int) -> list:
+        return get_scheduler().call(self.worksheet(tab).col_values, col)
+
+    def read_columns(self, tab: str, cols: list) -> list:
+        # One values.batchGet for every column.
+        ranges = []
+        for col in cols:
+            letter = gspread.utils.rowcol_to_a1(1, col).rstrip("0123456789")
+            ranges.append(f"{letter}:{letter}")
+        found = get_scheduler().call(self.worksheet(tab).batch_get, ranges, major_dimension="COLUMNS")
+        return [list(value_range[0]) if value_range else [] for value_range in found]
+
+    def read_cells(self, tab: str, cells: list) -> list:
+        if not cells:
+            return []
+        found = get_scheduler().call(
+            self.worksheet(tab).batch_get, [gspread.utils.rowcol_to_a1(row, col) for row, col in cells]
+        )
+        return [value_range[0][0] if value_range and value_range[0] else "" for value_range in found]
+
+    def read_rows(self, tab: str, first_row: int) -> list:
+        ws = self.worksheet(tab)
+        last_col = gspread.utils.rowcol_to_a1(1, ws.col_count).rstrip("0123456789")
+        return get_scheduler().call(ws.get_values, f"A{first_row}:{last_col}")
+
+
+# -----------------------------------------------------------------------------
+# 2. SQLITE (a standalone local vault — same row layout as the replica)
+# -----------------------------------------------------------------------------
+SQLITE_PATH = os.path.join(REPLICA_DIR, "vault.db")
+
+
+class SqliteBackend(VaultBackend):
+    """A vault kept entirely in a local SQLite file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self._store = VaultReplica(path)
+
+    def _ensure_tab(self, tab: str):
+        if not self._store.has_tab(tab):
+            self._store.sync(tab, [TAB_HEADERS[tab]])
+
+    def read_values(self, tab: str) -> list:
+        self._ensure_tab(tab)
+        return self._store.values(tab)
+
+    def append_rows(self, tab: str, rows: list):
+        self._ensure_tab(tab)
+        self._store.append_rows(tab, rows)
+
+    def update_cells(self, tab: str, cells: list):
+        self._ensure_tab(tab)
+        for row, col, value in cells:
+            if row == 1:
+                self._store.set_header_cell(tab, col, value)
+            else:
+                self._store.update_cells(tab, row, {col: value})
+
+    def delete_row(self, tab: str, sheet_row: int):
+        self._ensure_tab(tab)
+        self._store.delete_row(tab, sheet_row)
+
+    def read_header(self, tab: str) -> list:
+        self._ensure_tab(tab)
+        return self._store.header(tab)
+
+    def read_column(self, tab: str, col: int) -> list:
+        self._ensure_tab(tab)
+        header = self._store.header(tab)
+        return [header[col - 1] if len(header) >= col else ""] + self._store.column(tab, col)
+
+    def read_columns(self, tab: str, cols: list) -> list:
+        return [self.read_column(tab, col) for col in cols]
+
+    def read_cells(self, tab: str, cells: list) -> list:
+        self._ensure_tab(tab)
+        return self._store.cells(tab, cells)
+
+    def local_store(self):
+        return self._store
+
+
+# -----------------------------------------------------------------------------
+# 3. IN-MEMORY (a throwaway vault for offline runs and load tests)
+# -----------------------------------------------------------------------------
+class MemoryBackend(VaultBackend):
+    """A vault held in plain lists. Everything is lost when the process exits."""
+
+    name = "memory"
+
+    def __init__(self, seed: dict = None):
+        self._tabs = {tab: [list(header)] for tab, header in TAB_HEADERS.items()}
+        for tab, rows in (seed or {}).items():
+            self._tabs[tab] = [list(row) for row in rows]
+        self._lock = threading.Lock()
+
+    def read_values(self, tab: str) -> list:
+        with self._lock:
+            return [list(row) for row in self._tabs[tab]]
+
+    def append_rows(self, tab: str, rows: list):
+        with self._lock:
+            self._tabs[tab].extend([str(v) for v in row] for row in rows)
+
+    def update_cells(self, tab: str, cells: list):
+        with self._lock:
+            values = self._tabs[tab]
+            for row, col, value in cells:
+                while len(values) < row:
+                    values.append([])
+                target = values[row - 1]
+                if len(target) < col:
+                    target.extend([""] * (col - len(target)))
+                target[col - 1] = str(value)
+
+    def delete_row(self, tab: str, sheet_row: int):
+        with self._lock:
+            del self._tabs[tab][sheet_row - 1]
+
+
+BACKENDS = {
+    "sheets": SheetsBackend,
+    "sqlite": SqliteBackend,
+    "memory": MemoryBackend,
+}
+
+
+@st.cache_resource
+def get_backend() -> VaultBackend:
+    """Returns the process-wide backend named by the `vault_backend` secret
+    ("sheets", "sqlite" or "memory"; Google Sheets when unset).
+    """
+    choice = st.secrets["vault_backend"] if "vault_backend" in st.secrets else "sheets"
+    if choice not in BACKENDS:
+        raise Exception(f"Unknown vault_backend '{choice}'. Choose one of: {', '.join(BACKENDS)}.")
+    return BACKENDS[choice]()
@@ -0,0 +1,251 @@
+import numpy as np
+import threading
+import hashlib
+import atexit
+import zlib
+import os
+
+from services.search_service import tokenize
+
+# -----------------------------------------------------------------------------
+# SIMILARITY SEARCH — "souls like this one", offline.
+# Each record's descriptive text is turned into a hashed TF-IDF vector: words
+# are hashed (with a sign) into DIM buckets, counts are log-scaled, weighted by
+# inverse document frequency and normalised, so a top-k query is one
+# matrix-vector product.
+#
+# The index is a FrameCache watcher (see db_service). Raw bucket counts are
+# saved under .vault_cache with a digest of each record's text, so a restart
+# only re-embeds the records whose text changed. A rebuild runs on the query
+# path, so it hands the write to a background thread; edits are saved at exit.
+#
+# The matrices keep spare rows past the last record and grow by a quarter when
+# they run out, so an insert writes one row in place instead of copying the
+# matrix (a quarter, not double: at 50k records each spare row is 6 KB).
+# -----------------------------------------------------------------------------
+DIM = 512
+MIN_CAPACITY = 64
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on or
+she that the their them they this to was were with who whose will into your you
+""".split())
+
+
+def _bucket(token: str):
+    """(bucket, sign) for a token; crc32 so the hashing is stable across restarts."""
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % DIM, 1.0 if (h >> 16) & 1 else -1.0
+
+
+class VectorIndex:
+    """Hashed TF-IDF vectors for one tab, one row per entity ID.
+    Only the first len(_ids) rows of _raw and _normed hold records.
+    """
+
+    def __init__(self, fields: tuple, path: str, id_column: str = "ID"):
+        self.fields = fields
+        self.path = path
+        self.id_column = id_column
+        self.version = -1
+        self._ids = []
+        self._digests = []
+        self._row_of = {}
+        self._raw = np.zeros((0, DIM), dtype=np.float16)
+        self._normed = np.zeros((0, DIM), dtype=np.float32)
+        self._idf = np.ones(DIM, dtype=np.float32)
+        self._buckets = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saver = None
+        atexit.register(self.save)
+
+    # --- EMBEDDING -----------------------------------------------------------
+    def _text(self, values: dict) -> str:
+        return " ".join(str(values.get(column, "")) for column in self.fields)
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Signed bucket counts of a text's words."""
+        vec = np.zeros(DIM, dtype=np.float32)
+        for token in tokenize(text):
+            if token in STOPWORDS:
+                continue
+            hashed = self._buckets.get(token)
+            if hashed is None:
+                hashed = self._buckets[token] = _bucket(token)
+            vec[hashed[0]] += hashed[1]
+        return vec
+
+    def _weigh(self, raw: np.ndarray) -> np.ndarray:
+        """Log-scales and idf-weights raw counts (one row or many), unit length."""
+        raw = raw.astype(np.float32)
+        weighted = np.sign(raw) * np.log1p(np.abs(raw)) * self._idf
+        norms = np.linalg.norm(weighted, axis=-1, keepdims=True)
+        return weighted / np.where(norms == 0, 1, norms)
+
+    # --- PERSISTENCE ---------------------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                if saved["raw"].shape[1:] != (DIM,):
+                    return
+                self._ids = saved["ids"].tolist()
+                self._digests = saved["digests"].tolist()
+                self._raw = saved["raw"].astype(np.float16)
+        except Exception as e:
+            # A damaged file only costs a full re-embed.
+            print(f"Vector Index Load Error ({self.path}): {e}")
+            self._ids, self._digests = [], []
+            self._raw = np.zeros((0, DIM), dtype=np.float16)
+        self._row_of = {entity_id: pos for pos, entity_id in enumerate(self._ids)}
+
+    def save(self):
+        """Writes the raw vectors to disk if anything changed since the last save.
+        The index is only locked while the rows are copied, not during the write.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                ids, digests = list(self._ids), list(self._digests)
+                raw = self._raw[:len(ids)].copy()
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = self.path + ".tmp.npz"
+                np.savez(tmp, ids=np.array(ids, dtype=str), digests=np.array(digests, dtype=str), raw=raw)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"Vector Index Save Error ({self.path}): {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def save_soon(self):
+        """Saves on a background thread."""
+        self._saver = threading.Thread(target=self.save, daemon=True, name="vector-index-save")
+        self._saver.start()
+
+    # --- WATCHER EVENTS ------------------------------------------------------
+    def _rows(self, frame):
+        if self.id_column not in frame.columns:
+            return
+        columns = [c for c in self.fields if c in frame.columns]
+        cells = [frame[c].tolist() for c in columns]
+        for pos, entity_id in enumerate(frame[self.id_column].tolist()):
+            if entity_id:
+                yield entity_id, {c: col[pos] for c, col in zip(columns, cells)}
+
+    def rebuild(self, frame):
+        """Re-syncs with the whole frame, re-embedding only records whose text changed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            ids, digests, rows, embedded = [], [], [], 0
+            for entity_id, values in self._rows(frame):
+                text = self._text(values)
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                old = self._row_of.get(entity_id)
+                if old is not None and self._digests[old] == digest:
+                    rows.append(self._raw[old])
+                else:
+                    rows.append(self._embed(text).astype(np.float16))
+                    embedded += 1
+                ids.append(entity_id)
+                digests.append(digest)
+            changed = embedded or len(ids) != len(self._ids)
+            self._ids, self._digests = ids, digests
+            self._row_of = {entity_id: pos for pos, entity_id in enumerate(ids)}
+            self._raw = np.vstack(rows) if rows else np.zeros((0, DIM), dtype=np.float16)
+            document_freq = (self._raw != 0).sum(axis=0)
+            self._idf = (np.log((1 + len(ids)) / (1 + document_freq)) + 1).astype(np.float32)
+            self._normed = self._weigh(self._raw)
+            self._dirty = self._dirty or bool(changed)
+            if not self._dirty:
+                return
+        self.save_soon()
+
+    def _reserve(self, count: int):
+        """Makes room for `count` records, growing the matrices by at least a quarter."""
+        if count <= len(self._raw):
+            return
+        capacity = max(count, len(self._raw) + len(self._raw) // 4, MIN_CAPACITY)
+        used = len(self._ids)
+        raw = np.zeros((capacity, DIM), dtype=np.float16)
+        normed = np.zeros((capacity, DIM), dtype=np.float32)
+        raw[:used], normed[:used] = self._raw[:used], self._normed[:used]
+        self._raw, self._normed = raw, normed
+
+    def _put(self, entity_id: str, values: dict):
+        text = self._text(values)
+        raw = self._embed(text)
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        pos = self._row_of.get(entity_id)
+        if pos is None:
+            # New rows reuse the idf of the last rebuild.
+            pos = len(self._ids)
+            self._reserve(pos + 1)
+            self._row_of[entity_id] = pos
+            self._ids.append(entity_id)
+            self._digests.append(digest)
+            self._raw[pos] = raw
+            self._normed[pos] = self._weigh(raw)
+        else:
+            self._digests[pos] = digest
+            self._raw[pos] = raw
+            self._normed[pos] = self._weigh(raw)
+        self._dirty = True
+
+    def appended(self, added):
+        with self._lock:
+            self._reserve(len(self._ids) + len(added))
+            for entity_id, values in self._rows(added):
+                self._put(entity_id, values)
+
+    def updated(self, entity_id: str, row):
+        with self._lock:
+            self._put(entity_id, {c: row.get(c, "") for c in self.fields})
+
+    def deleted(self, entity_id: str):
+        with self._lock:
+            pos = self._row_of.pop(entity_id, None)
+            if pos is None:
+                return
+            # Move the last row into the hole so the matrix stays dense.
+            last = len(self._ids) - 1
+            if pos != last:
+                moved = self._ids[last]
+                self._ids[pos], self._digests[pos] = moved, self._digests[last]
+                self._raw[pos], self._normed[pos] = self._raw[last], self._normed[last]
+                self._row_of[moved] = pos
+            self._ids.pop()
+            self._digests.pop()
+            self._dirty = True
+
+    # --- QUERIES -------------------------------------------------------------
+    def _top(self, query: np.ndarray, k: int, skip: str = None) -> list:
+        if not self._ids or not query.any():
+            return []
+        scores = self._normed[:len(self._ids)] @ query
+        if skip in self._row_of:
+            scores[self._row_of[skip]] = -np.inf
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [self._ids[pos] for pos in best if scores[pos] > 0]
+
+    def similar_to_text(self, text: str, k: int = 10) -> list:
+        """Entity IDs whose text is closest to a free-text description, best first."""
+        with self._lock:
+            return self._top(self._weigh(self._embed(text)), k)
+
+    def similar_to(self, entity_id: str, k: int = 10) -> list:
+        """Entity IDs closest to a record already in the index, best first."""
+        with self._lock:
+            pos = self._row_of.get(entity_id)
+            if pos is None:
+                return []
+            return self._top(self._normed[pos].copy(), k, skip=entity_id)
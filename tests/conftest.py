@@ -0,0 +1,69 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import db_service, replica_service, vault_backends  # noqa: E402
+
+# The services cache their singletons with st.cache_resource, which works
+# outside a Streamlit run but warns about the missing script context each time.
+for name in list(logging.root.manager.loggerDict):
+    if name.startswith("streamlit"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+from services.sheets_scheduler import SheetsScheduler  # noqa: E402
+from fake_sheets import FakeSheetsBackend  # noqa: E402
+
+BACKENDS = ("sheets", "sqlite", "memory")
+
+
+@pytest.fixture
+def unthrottled(monkeypatch):
+    """A scheduler with quota to spare, so tests never wait for a token."""
+    scheduler = SheetsScheduler(per_minute=60000, burst=1000, sleep=lambda seconds: None)
+    monkeypatch.setattr(vault_backends, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def make_backend(name: str, tmp_path):
+    if name == "sheets":
+        return FakeSheetsBackend()
+    if name == "sqlite":
+        return vault_backends.SqliteBackend(str(tmp_path / "vault.db"))
+    return vault_backends.MemoryBackend()
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path, unthrottled):
+    """Each storage backend in turn, empty but for the tab headers."""
+    return make_backend(request.param, tmp_path)
+
+
+# The process-wide singletons db_service keeps; each test starts without them.
+SINGLETONS = (
+    "get_id_column", "get_frame_cache", "get_tab_lock", "get_write_queue",
+    "get_facet_index", "get_text_index", "get_archive_index", "get_fuzzy_index",
+    "get_vector_index", "get_recency_index",
+)
+
+
+@pytest.fixture
+def use_vault(monkeypatch, tmp_path, unthrottled):
+    """Points db_service at a given backend, with a fresh replica and fresh
+    caches. Returns a function taking the backend and returning it.
+    """
+    def use(backend):
+        monkeypatch.setattr(db_service, "get_backend", lambda: backend)
+        monkeypatch.setattr(replica_service, "REPLICA_DIR", str(tmp_path))
+        replica = replica_service.VaultReplica(str(tmp_path / "replica.db"))
+        monkeypatch.setattr(replica_service, "get_replica", lambda: replica)
+        monkeypatch.setattr(replica_service, "SYNC_INTERVAL", 3600)
+        for name in SINGLETONS:
+            getattr(db_service, name).clear()
+        return backend
+    yield use
+    for name in SINGLETONS:
+        getattr(db_service, name).clear()
@@ -0,0 +1,146 @@
+"""A stand-in for the slice of gspread the SheetsBackend uses, held in memory.
+
+Every call can be made to fail first: push HTTP statuses onto
+FakeSpreadsheet.failures and the next calls raise a FakeAPIError with those
+statuses, the way a throttled (429) or unwell (5xx) Sheets API does.
+With commit_before_failing set, a write lands before its error is raised,
+like a 5xx that arrives after the server already applied the request.
+"""
+import itertools
+import threading
+import types
+
+import gspread
+
+from services.vault_backends import SheetsBackend, TAB_HEADERS
+
+
+class FakeAPIError(Exception):
+    """Shaped like gspread's APIError: the status sits on .response."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.response = types.SimpleNamespace(status_code=status)
+
+
+def _column_of(letters: str) -> int:
+    return gspread.utils.a1_to_rowcol(f"{letters}1")[1]
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, header: list):
+        self.spreadsheet = spreadsheet
+        self.values = [list(header)]
+        self.col_count = max(len(header), 1)
+
+    # --- reads ---------------------------------------------------------------
+    def _padded(self, row: list) -> list:
+        return (list(row) + [""] * self.col_count)[:self.col_count]
+
+    def get_all_values(self):
+        self.spreadsheet.request("read")
+        return [self._padded(row) for row in self.values]
+
+    def row_values(self, row: int):
+        self.spreadsheet.request("read")
+        found = list(self.values[row - 1]) if len(self.values) >= row else []
+        while found and found[-1] == "":
+            found.pop()
+        return found
+
+    def _column(self, col: int) -> list:
+        found = [row[col - 1] if len(row) >= col else "" for row in self.values]
+        while found and found[-1] == "":
+            found.pop()
+        return found
+
+    def col_values(self, col: int):
+        self.spreadsheet.request("read")
+        return self._column(col)
+
+    def get_values(self, range_name: str):
+        # Only the "A{first_row}:{last_column}" shape read_rows asks for.
+        self.spreadsheet.request("read")
+        first_row = int(range_name.split(":")[0][1:])
+        return [self._padded(row) for row in self.values[first_row - 1:]]
+
+    def batch_get(self, ranges, major_dimension=None):
+        self.spreadsheet.request("read")
+        found = []
+        for a1 in ranges:
+            if ":" in a1:
+                column = self._column(_column_of(a1.split(":")[0]))
+                found.append([column] if column else [])
+            else:
+                row, col = gspread.utils.a1_to_rowcol(a1)
+                value = self.values[row - 1][col - 1] if len(self.values) >= row and len(self.values[row - 1]) >= col else ""
+                found.append([[value]] if value != "" else [])
+        return found
+
+    # --- writes --------------------------------------------------------------
+    def append_rows(self, rows, value_input_option="RAW"):
+        def apply():
+            self.values.extend([str(v) for v in row] for row in rows)
+        self.spreadsheet.request("write", apply)
+
+    def append_row(self, row):
+        self.append_rows([row])
+
+    def add_cols(self, count: int):
+        self.spreadsheet.request("write", lambda: setattr(self, "col_count", self.col_count + count))
+
+    def batch_update(self, data: list):
+        def apply():
+            for change in data:
+                row, col = gspread.utils.a1_to_rowcol(change["range"])
+                while len(self.values) < row:
+                    self.values.append([])
+                target = self.values[row - 1]
+                if len(target) < col:
+                    target.extend([""] * (col - len(target)))
+                target[col - 1] = str(change["values"][0][0])
+        self.spreadsheet.request("write", apply)
+
+    def delete_rows(self, row: int):
+        self.spreadsheet.request("write", lambda: self.values.pop(row - 1))
+
+
+class FakeSpreadsheet:
+    """The spreadsheet: its tabs, a modified-time counter, and the failure script."""
+
+    def __init__(self):
+        self.tabs = {tab: FakeWorksheet(self, header) for tab, header in TAB_HEADERS.items()}
+        self.failures = []
+        self.commit_before_failing = False
+        self.calls = {"read": 0, "write": 0}
+        self._clock = itertools.count(1)
+        self._modified = next(self._clock)
+        self._lock = threading.Lock()
+
+    def request(self, kind: str, apply=None):
+        """One API request: fail if a failure is scripted, else do it."""
+        with self._lock:
+            self.calls[kind] += 1
+            status = self.failures.pop(0) if self.failures else None
+            if status is not None and not (self.commit_before_failing and apply):
+                raise FakeAPIError(status)
+            if apply is not None:
+                apply()
+                self._modified = next(self._clock)
+            if status is not None:
+                raise FakeAPIError(status)
+
+    def get_lastUpdateTime(self):
+        with self._lock:
+            return str(self._modified)
+
+
+class FakeSheetsBackend(SheetsBackend):
+    """The real SheetsBackend, talking to a FakeSpreadsheet instead of Google."""
+
+    def __init__(self, spreadsheet: FakeSpreadsheet = None):
+        super().__init__()
+        self.spreadsheet = spreadsheet or FakeSpreadsheet()
+
+    def worksheet(self, tab: str):
+        return self.spreadsheet.tabs[tab]
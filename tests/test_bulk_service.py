@@ -0,0 +1,67 @@
+"""Saving a bulk job to the Vault, including after a restart cut a save short."""
+import pytest
+
+from services import bulk_service, db_service
+
+
+def finished_job(count: int = 3) -> bulk_service.BulkJob:
+    return bulk_service.BulkJob({
+        "id": "job1", "kind": "Creatures", "concurrency": 1, "created_at": "",
+        "saved_at": None, "save_error": "",
+        "items": [
+            {"concept": f"Beast {i}", "variant": "Grim & Shadow", "status": bulk_service.DONE, "error": "",
+             "row": [f"Beast {i}", "Grim & Shadow", "", f"2024-01-0{i + 1} 10:00:00"]}
+            for i in range(count)
+        ],
+    })
+
+
+@pytest.fixture
+def jobs_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk_service, "JOBS_DIR", str(tmp_path))
+
+
+def concepts(backend) -> list:
+    return [row[0] for row in backend.read_values("Creatures")[1:]]
+
+
+def test_a_save_writes_every_finished_row_once(use_vault, backend, jobs_dir):
+    use_vault(backend)
+    job = finished_job()
+    job._save()
+    job._save()
+    assert concepts(backend) == ["Beast 0", "Beast 1", "Beast 2"]
+    assert job.state["save_error"] == "" and "save_ids" not in job.state
+
+
+def test_retrying_a_failed_save_skips_the_rows_that_landed(use_vault, backend, jobs_dir):
+    use_vault(backend)
+    job = finished_job()
+    append = backend.append_rows
+
+    def dies_after_landing(tab, rows):
+        append(tab, rows[:2])
+        raise RuntimeError("the app went down mid-save")
+    backend.append_rows = dies_after_landing
+    job._save()
+    assert job.state["save_error"] and job.state["save_ids"]
+
+    backend.append_rows = append
+    job.retry_save()
+    assert concepts(backend) == ["Beast 0", "Beast 1", "Beast 2"]
+    ids = [row[-1] for row in backend.read_values("Creatures")[1:]]
+    assert len(set(ids)) == 3
+
+
+def test_a_save_cut_short_by_a_restart_is_not_written_twice(use_vault, backend, jobs_dir):
+    use_vault(backend)
+    job = finished_job()
+    job.state["save_ids"] = ["id0", "id1", "id2"]
+    job._persist()
+    # The app went down after the first two rows landed, before saved_at was recorded.
+    backend.append_rows("Creatures", [item["row"] + [f"id{i}"] for i, item in enumerate(job.state["items"][:2])])
+
+    bulk_service._get_jobs.clear()
+    resumed = bulk_service.get_job("job1")
+    assert not resumed.running()
+    assert [row[-1] for row in backend.read_values("Creatures")[1:]] == ["id0", "id1", "id2"]
@@ -0,0 +1,45 @@
+"""The generation cache decorator: hits, fresh calls and the cache turned off."""
+import pytest
+
+from services import llm_service
+from services.generation_cache import GenerationCache
+
+
+@pytest.fixture
+def generator():
+    """A cached generator that counts its real calls."""
+    calls = []
+
+    @llm_service.cached_generation("test")
+    def generate(concept: str, kind: str = "creature") -> str:
+        calls.append((concept, kind))
+        return f"{concept} ({kind}) #{len(calls)}"
+    generate.calls = calls
+    return generate
+
+
+def test_a_repeat_request_is_a_hit(monkeypatch, tmp_path, generator):
+    cache = GenerationCache(str(tmp_path))
+    monkeypatch.setattr(llm_service, "get_generation_cache", lambda: cache)
+    assert generator("Wyrm") == generator("Wyrm") == "Wyrm (creature) #1"
+    assert generator("Wyrm", kind="item") == "Wyrm (item) #2"
+    assert generator("Wyrm", kind="item") == "Wyrm (item) #2"
+    assert len(generator.calls) == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_fresh_skips_the_cache_and_stores_nothing(monkeypatch, tmp_path, generator):
+    cache = GenerationCache(str(tmp_path))
+    monkeypatch.setattr(llm_service, "get_generation_cache", lambda: cache)
+    assert generator("Wyrm", fresh=True) == "Wyrm (creature) #1"
+    assert generator("Wyrm", fresh=True) == "Wyrm (creature) #2"
+    assert cache.stats()["entries"] == 0
+    assert generator("Wyrm") == "Wyrm (creature) #3"
+
+
+def test_with_the_cache_off_every_call_generates(monkeypatch, generator):
+    monkeypatch.setattr(llm_service, "get_generation_cache", lambda: None)
+    generator("Wyrm")
+    generator("Wyrm", kind="item")
+    assert generator.calls == [("Wyrm", "creature"), ("Wyrm", "item")]
+    assert llm_service.generation_stats() == {}
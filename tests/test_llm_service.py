@@ -0,0 +1,115 @@
+"""Reading records out of model replies, whole and as they stream in."""
+import json
+
+import pytest
+
+from services import llm_service
+from services.llm_service import NPC_FIELDS, JsonFieldStream, _parse_record
+
+
+def streamed(text: str, size: int) -> JsonFieldStream:
+    stream = JsonFieldStream()
+    for start in range(0, len(text), size):
+        stream.feed(text[start:start + size])
+    return stream
+
+
+def test_escapes_decode_like_json_in_any_chunking():
+    record = {
+        "Name": "Ysolde \"the Pale\"",
+        "Lore": "Line one\nLine two\t\\ done / é \U0001F409 and \U0001F525!",
+        "Greeting": "☃",
+    }
+    text = json.dumps(record)  # ASCII, so the dragon and the flame arrive as surrogate pairs
+    assert "\\ud83d\\udc09" in text
+    for size in (1, 2, 3, 5, 7, len(text)):
+        stream = streamed(text, size)
+        assert stream.done
+        assert stream.fields == record
+
+
+def test_a_lone_surrogate_is_kept_as_json_keeps_it():
+    text = '{"Name": "a\\ud83d b", "Lore": "\\ud83d"}'
+    assert streamed(text, 1).fields == json.loads(text)
+
+
+def test_keys_and_values_split_across_chunks():
+    text = '```json\n[{"Visual_Desc": "a tall figure", "Level": 3, "Class": "Bard"}]\n```'
+    for size in (1, 4, 9):
+        stream = streamed(text, size)
+        assert stream.fields == {"Visual_Desc": "a tall figure", "Level": 3, "Class": "Bard"}
+
+
+def test_visual_desc_is_ready_before_the_object_closes():
+    stream = JsonFieldStream()
+    stream.feed('{"Name": "Orm", "Visual_De')
+    assert stream.partial() == {"Name": "Orm"}
+    stream.feed('sc": "a grey wo')
+    assert stream.partial()["Visual_Desc"] == "a grey wo"
+    assert "Visual_Desc" not in stream.fields
+    stream.feed('lf", "Lore": "He')
+    assert stream.fields["Visual_Desc"] == "a grey wolf"
+    assert not stream.done
+
+
+# -----------------------------------------------------------------------------
+# WHOLE REPLIES
+# -----------------------------------------------------------------------------
+NPC = {"Name": "Orm", "Class": "Ranger", "Visual_Desc": "a grey wolf", "Greeting": "Hail.", "Lore": "Old."}
+
+
+@pytest.mark.parametrize("reply", [
+    json.dumps(NPC),
+    f"```json\n{json.dumps(NPC)}\n```",
+    f"Here is your NPC:\n{json.dumps(NPC)}\nEnjoy!",
+    json.dumps([NPC]),
+])
+def test_a_wrapped_reply_reads_whole(reply):
+    assert _parse_record(reply, NPC_FIELDS) == NPC
+
+
+def test_a_cut_off_reply_names_the_fields_it_lost():
+    reply = json.dumps(NPC)[:-12]
+    with pytest.raises(ValueError, match="missing or empty fields: Lore"):
+        _parse_record(reply, NPC_FIELDS)
+
+
+def test_a_null_field_counts_as_missing():
+    with pytest.raises(ValueError, match="Greeting, Lore"):
+        _parse_record(json.dumps({**NPC, "Greeting": None, "Lore": ""}), NPC_FIELDS)
+    assert _parse_record(json.dumps({**NPC, "Extra": None}), NPC_FIELDS)["Extra"] == ""
+
+
+class FakeModels:
+    """Hands out the given replies in turn and remembers every prompt."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        return type("Response", (), {"text": self.replies.pop(0)})()
+
+
+@pytest.fixture
+def models(monkeypatch):
+    def install(*replies):
+        fake = FakeModels(*replies)
+        monkeypatch.setattr(llm_service, "get_gemini_client", lambda: type("Client", (), {"models": fake})())
+        return fake
+    return install
+
+
+def test_an_unreadable_reply_is_repaired_once(models):
+    fake = models(json.dumps({**NPC, "Lore": None}), json.dumps(NPC))
+    assert llm_service._generate_record("make an NPC", NPC_FIELDS) == NPC
+    assert len(fake.prompts) == 2
+    assert "missing or empty fields: Lore" in fake.prompts[1]
+
+
+def test_a_repair_that_fails_too_gives_up(models):
+    fake = models("not json", '{"Name": "Orm"}', json.dumps(NPC))
+    with pytest.raises(Exception, match="even after a repair attempt"):
+        llm_service._generate_record("make an NPC", NPC_FIELDS)
+    assert len(fake.prompts) == 2
@@ -0,0 +1,94 @@
+"""Paging through the archive while cards are burned under it."""
+from services import db_service
+
+
+def seeded(use_vault, backend, count: int = 9) -> list:
+    """NPCs sharing a few timestamps, so ties have to be broken somehow."""
+    use_vault(backend)
+    rows = [
+        [f"Hero {i}", "Bard", "", "", "", "", f"2024-01-0{i // 3 + 1} 10:00:00", "Saltmarsh", "", f"id{i}"]
+        for i in range(count)
+    ]
+    backend.append_rows("NPCs", rows)
+    return [row[-1] for row in rows]
+
+
+def walk(**query) -> list:
+    pages, cursor = [], None
+    while True:
+        page, _, cursor = db_service.query_page("NPCs", page_size=3, cursor=cursor, **query)
+        pages.append(page["ID"].tolist())
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_record_once(use_vault, backend):
+    ids = seeded(use_vault, backend)
+    pages = walk()
+    found = [entity_id for page in pages for entity_id in page]
+    assert sorted(found) == sorted(ids)
+    assert found == db_service.query_matches("NPCs")["ID"].tolist()
+    # A search is ranked one page at a time; the walk still sees every match once.
+    found = [entity_id for page in walk(search="Hero") for entity_id in page]
+    assert found == db_service.query_matches("NPCs", search="Hero")["ID"].tolist()
+    assert db_service.query_page("NPCs", page_size=3, search="Hero")[1] == len(ids)
+
+
+def test_burning_a_card_on_an_earlier_page_skips_nothing(use_vault, backend):
+    seeded(use_vault, backend)
+    for query in ({}, {"search": "Hero"}):
+        first, _, cursor = db_service.query_page("NPCs", page_size=3, **query)
+        expected = db_service.query_matches("NPCs", **query)["ID"].tolist()[3:6]
+        db_service.delete_character(first["ID"].iloc[0])
+        second, _, _ = db_service.query_page("NPCs", page_size=3, cursor=cursor, **query)
+        assert second["ID"].tolist() == expected
+
+
+def test_burning_several_cards_or_adding_one_skips_and_repeats_nothing(use_vault, backend):
+    seeded(use_vault, backend)
+    for query in ({}, {"search": "Hero"}):
+        first, _, cursor = db_service.query_page("NPCs", page_size=3, **query)
+        expected = db_service.query_matches("NPCs", **query)["ID"].tolist()[3:6]
+        for entity_id in first["ID"].tolist()[:2]:
+            db_service.delete_character(entity_id)
+        db_service.insert_many("NPCs", [["Hero new", "Bard", "", "", "", "", "2024-02-01 10:00:00", "Saltmarsh", ""]])
+        second, _, _ = db_service.query_page("NPCs", page_size=3, cursor=cursor, **query)
+        assert second["ID"].tolist() == expected
+
+
+def test_mixed_precision_timestamps_sort_the_same_on_every_path(use_vault, backend):
+    use_vault(backend)
+    stamps = ["2024-01-01 10:00:00", "2024-01-01 10:00:00.500", "2024-01-02", "", "01/03/2024 09:00:00", "not a date"]
+    backend.append_rows("NPCs", [
+        [f"Hero {i}", "Bard", "", "", "", "", stamp, "Saltmarsh", "", f"id{i}"] for i, stamp in enumerate(stamps)
+    ])
+    frame = db_service.get_frame_cache("NPCs").get()
+    assert frame[db_service.PARSED_TIMESTAMP].notna().tolist() == [True, True, True, False, True, False]
+
+    newest_first = ["id4", "id2", "id1", "id0", "id3", "id5"]
+    assert db_service.query_matches("NPCs")["ID"].tolist() == newest_first
+    assert [entity_id for page in walk() for entity_id in page] == newest_first
+
+
+def test_saves_before_the_first_read_still_page_newest_first(use_vault, unthrottled):
+    from fake_sheets import FakeSheetsBackend
+    use_vault(FakeSheetsBackend())
+    for i in range(3):
+        db_service.insert_creature([f"Beast {i}", "Grim & Shadow", "", f"2024-01-0{i + 1} 10:00:00"])
+    db_service.get_write_queue("Creatures").flush()
+
+    page, total, _ = db_service.query_page("Creatures", page_size=10)
+    assert total == 3
+    assert page["Concept"].tolist() == ["Beast 2", "Beast 1", "Beast 0"]
+    assert page["ID"].tolist() == db_service.query_matches("Creatures")["ID"].tolist()
+
+
+def test_a_sync_fills_in_keys_the_replica_could_not_place(tmp_path):
+    from services.replica_service import VaultReplica
+    from services.vault_backends import TAB_HEADERS
+    replica = VaultReplica(str(tmp_path / "replica.db"))
+    rows = [[f"Beast {i}", "Grim & Shadow", "", f"2024-01-0{i + 1} 10:00:00", f"id{i}"] for i in range(3)]
+    replica.append_rows("Creatures", rows)  # mirrored before the tab was ever synced
+    replica.sync("Creatures", [TAB_HEADERS["Creatures"]] + rows)
+    page, _, _ = replica.page("Creatures", {}, None, 10)
+    assert [row[-1] for row in page] == ["id2", "id1", "id0"]
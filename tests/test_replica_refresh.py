@@ -0,0 +1,89 @@
+"""How much the replica refresh reads from a (faked) Sheets vault."""
+from services import db_service
+from fake_sheets import FakeSheetsBackend
+
+
+class CountingSheets(FakeSheetsBackend):
+    """Counts whole-tab reads, the expensive kind."""
+
+    def __init__(self):
+        super().__init__()
+        self.full_reads = 0
+
+    def read_values(self, tab: str) -> list:
+        self.full_reads += 1
+        return super().read_values(tab)
+
+
+def seeded_vault(use_vault) -> CountingSheets:
+    backend = use_vault(CountingSheets())
+    backend.spreadsheet.tabs["Creatures"].values.extend(
+        [f"Beast {i}", "Grim & Shadow", "", f"2024-01-0{i + 1} 10:00:00", f"id{i}"] for i in range(3)
+    )
+    for tab in db_service.TABS:
+        db_service.get_frame_cache(tab).get()
+    return backend
+
+
+def test_own_writes_need_no_read_on_the_next_refresh(use_vault):
+    backend = seeded_vault(use_vault)
+    ticket = db_service.insert_creature(["Wyrm", "Noble & Bright", "", "2024-02-01 10:00:00"])
+    db_service.get_write_queue("Creatures").flush()
+    assert ticket.result(5)
+    entity_id = db_service.get_all_creatures()["ID"].iloc[-1]
+    db_service.update_records("Creatures", [(entity_id, {"Tone": "Mystic & Strange"})])
+
+    reads = backend.full_reads
+    for tab in db_service.TABS:
+        assert db_service._refresh(tab) == 0
+    assert backend.full_reads == reads
+    assert len(db_service.get_all_creatures()) == 4
+
+
+def test_outside_appends_read_only_the_new_rows(use_vault):
+    backend = seeded_vault(use_vault)
+    backend.worksheet("Creatures").append_rows([["Owl", "Mystic & Strange", "", "2024-03-01 10:00:00", "id9"]])
+
+    reads = backend.full_reads
+    assert db_service._refresh_and_reconcile("Creatures") == 1
+    assert backend.full_reads == reads
+    assert db_service.get_all_creatures()["Concept"].tolist()[-1] == "Owl"
+
+
+def test_outside_edits_are_read_in_full(use_vault):
+    backend = seeded_vault(use_vault)
+    backend.worksheet("Creatures").batch_update([{"range": "A2", "values": [["Renamed"]]}])
+
+    assert db_service._refresh_and_reconcile("Creatures") == 1
+    assert db_service.get_all_creatures()["Concept"].tolist()[0] == "Renamed"
+
+
+def test_a_refresh_racing_a_flush_mirrors_the_rows_once(use_vault):
+    import threading
+
+    backend = seeded_vault(use_vault)
+    landed, release = threading.Event(), threading.Event()
+    append = backend.append_rows
+
+    def slow_append(tab, rows):
+        # The rows are in the sheet, but the flush hasn't mirrored them yet.
+        append(tab, rows)
+        landed.set()
+        release.wait(5)
+    backend.append_rows = slow_append
+
+    db_service.insert_creature(["Wyrm", "Noble & Bright", "", "2024-02-01 10:00:00"])
+    flusher = threading.Thread(target=db_service.get_write_queue("Creatures").flush)
+    flusher.start()
+    assert landed.wait(5)
+    refresher = threading.Thread(target=db_service._refresh_and_reconcile, args=("Creatures",))
+    refresher.start()
+    refresher.join(0.2)
+    release.set()
+    flusher.join(5)
+    refresher.join(5)
+
+    ids = db_service.get_all_creatures()["ID"].tolist()
+    assert len(ids) == len(set(ids)) == 4
+    replica_ids = db_service._replica().column("Creatures", db_service.get_id_column("Creatures"))
+    assert replica_ids == ids
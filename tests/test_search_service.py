@@ -0,0 +1,40 @@
+"""Ranking in the full-text index."""
+import pandas as pd
+
+from services.search_service import TextIndex
+
+
+def index_of(rows: list) -> TextIndex:
+    index = TextIndex({"Name": 3, "Lore": 1})
+    index.rebuild(pd.DataFrame(rows, columns=["Name", "Lore", "ID"]))
+    return index
+
+
+def test_better_matches_first_and_ties_newest_first():
+    index = index_of([
+        ["Sigrid", "a raven of the north", "a"],
+        ["Raven", "keeper of ravens", "b"],
+        ["Halvard", "a raven of the north", "c"],
+        ["Orm", "a wolf", "d"],
+    ])
+    # A Name hit outweighs a Lore hit; equal Lore hits keep the newest first.
+    assert index.search("raven") == ["b", "c", "a"]
+    assert index.search("raven", limit=2) == ["b", "c"]
+    assert index.search("rav north") == ["c", "a"]
+    assert index.search("wolf raven") == []
+
+
+def test_a_limited_ranking_keeps_the_order_and_the_full_count():
+    rows = [[f"Hero {i}", "raven " * (i % 3 + 1), f"id{i}"] for i in range(40)]
+    index = index_of(rows)
+    whole = index.search("raven")
+    assert index.ranked("raven", limit=5) == (whole[:5], 40)
+    assert index.ranked("rav hero", limit=5) == (index.search("rav hero")[:5], 40)
+
+
+def test_a_short_prefix_expands_to_the_closest_words_only():
+    from services import search_service
+    words = [f"ra{'v' * n}" for n in range(1, search_service.MAX_PREFIX_TOKENS + 10)]
+    index = index_of([[word, "", f"id{i}"] for i, word in enumerate(words)])
+    tokens = [token for token, _ in index._expand("ra")]
+    assert tokens == words[:search_service.MAX_PREFIX_TOKENS]
@@ -0,0 +1,150 @@
+"""The Sheets scheduler against a fake API that answers with 429s and 5xx."""
+import threading
+import time
+
+import pytest
+
+from services import sheets_scheduler
+from services.sheets_scheduler import SheetsScheduler
+from fake_sheets import FakeAPIError, FakeSheetsBackend
+
+
+class Sleeps:
+    """Records every wait the scheduler asks for instead of sleeping."""
+
+    def __init__(self):
+        self.waits = []
+
+    def __call__(self, seconds: float):
+        self.waits.append(seconds)
+
+
+def failing(statuses: list, result="ok"):
+    """A call that raises the given statuses in turn, then returns result."""
+    remaining = list(statuses)
+    calls = []
+
+    def call(*args):
+        calls.append(args)
+        if remaining:
+            raise FakeAPIError(remaining.pop(0))
+        return result
+    call.calls = calls
+    return call
+
+
+def test_429s_back_off_exponentially_with_jitter():
+    sleeps = Sleeps()
+    scheduler = SheetsScheduler(per_minute=60000, burst=100, sleep=sleeps)
+    call = failing([429, 429, 429, 429])
+    assert scheduler.call(call) == "ok"
+    assert len(call.calls) == 5
+    assert len(sleeps.waits) == 4
+    for attempt, wait in enumerate(sleeps.waits):
+        assert 0 <= wait <= min(sheets_scheduler.BACKOFF_CAP, sheets_scheduler.BACKOFF_BASE * 2 ** attempt)
+    stats = scheduler.stats()
+    assert stats["retries"] == 4 and stats["throttled"] == 4 and stats["calls"] == 5
+
+
+def test_gives_up_after_max_retries():
+    scheduler = SheetsScheduler(per_minute=60000, burst=100, sleep=Sleeps())
+    call = failing([429] * (sheets_scheduler.MAX_RETRIES + 1))
+    with pytest.raises(FakeAPIError):
+        scheduler.call(call)
+    assert len(call.calls) == sheets_scheduler.MAX_RETRIES + 1
+
+
+def test_other_errors_are_not_retried():
+    scheduler = SheetsScheduler(per_minute=60000, burst=100, sleep=Sleeps())
+    call = failing([404])
+    with pytest.raises(FakeAPIError):
+        scheduler.call(call)
+    assert len(call.calls) == 1
+
+
+def test_5xx_is_retried_only_where_replaying_is_safe():
+    scheduler = SheetsScheduler(per_minute=60000, burst=100, sleep=Sleeps())
+    read = failing([503])
+    assert scheduler.call(read) == "ok"
+    assert len(read.calls) == 2
+
+    delete = failing([503])
+    with pytest.raises(FakeAPIError):
+        scheduler.call_once(delete)
+    assert len(delete.calls) == 1
+
+    append = failing([503])
+    with pytest.raises(FakeAPIError):
+        scheduler.coalesce("append", [1], append, replayable=False)
+    assert len(append.calls) == 1
+
+    throttled = failing([429])
+    assert scheduler.coalesce("append", [1], throttled, replayable=False) == "ok"
+    assert len(throttled.calls) == 2
+
+
+def test_an_append_that_landed_before_a_5xx_is_not_written_twice(monkeypatch):
+    scheduler = SheetsScheduler(per_minute=60000, burst=100, sleep=Sleeps())
+    monkeypatch.setattr("services.vault_backends.get_scheduler", lambda: scheduler)
+    backend = FakeSheetsBackend()
+    backend.spreadsheet.commit_before_failing = True
+    backend.spreadsheet.failures = [502]
+    with pytest.raises(FakeAPIError):
+        backend.append_rows("Creatures", [["Wyrm", "Grim & Shadow", "", "2024-01-01", "id1"]])
+    assert [row[0] for row in backend.read_values("Creatures")[1:]] == ["Wyrm"]
+
+
+def test_the_token_bucket_holds_to_the_rate():
+    sleeps = Sleeps()
+    scheduler = SheetsScheduler(per_minute=60, burst=2, sleep=sleeps)
+    scheduler.acquire()
+    scheduler.acquire()
+    assert sleeps.waits == []
+    waiter = threading.Thread(target=scheduler.acquire)
+    waiter.start()
+    waiter.join(timeout=3)
+    # The third call had to wait for the bucket to refill (~1 s at 60/min).
+    assert sleeps.waits and 0 < sleeps.waits[0] <= 1.0
+
+
+def test_writes_queued_behind_the_quota_go_out_as_one_call():
+    released = threading.Event()
+    leader_waiting = threading.Event()
+
+    def sleep(seconds: float):
+        # The leader's token wait: hold it until every follower has joined.
+        if not released.is_set():
+            leader_waiting.set()
+            released.wait(5)
+        else:
+            time.sleep(seconds)
+
+    scheduler = SheetsScheduler(per_minute=6000, burst=1, sleep=sleep)
+    scheduler.acquire()  # spend the only token
+    batches = []
+    results = []
+
+    def execute(items):
+        batches.append(list(items))
+        return len(items)
+
+    def write(item):
+        results.append(scheduler.coalesce(("append", "NPCs"), [item], execute, replayable=False))
+
+    leader = threading.Thread(target=write, args=(0,))
+    leader.start()
+    assert leader_waiting.wait(5)
+    followers = [threading.Thread(target=write, args=(i,)) for i in range(1, 6)]
+    for follower in followers:
+        follower.start()
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["coalesced"] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    released.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(batches) == 1
+    assert sorted(batches[0]) == [0, 1, 2, 3, 4, 5]
+    assert results == [6] * 6
+    assert scheduler.stats()["coalesced"] == 5
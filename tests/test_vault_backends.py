@@ -0,0 +1,92 @@
+"""The contract every storage backend keeps, run against Sheets (faked), SQLite
+and memory alike. db_service relies on nothing beyond what is checked here.
+"""
+from services.vault_backends import TAB_HEADERS
+
+
+def trimmed(values: list) -> list:
+    """Rows without trailing blank cells: Sheets pads every row to the grid
+    width, the local backends keep them as written.
+    """
+    rows = []
+    for row in values:
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        rows.append(row)
+    return rows
+
+
+def seed(backend, count: int = 3) -> list:
+    rows = [[f"Beast {i}", "Grim & Shadow", f"http://img/{i}", f"2024-01-0{i + 1} 10:00:00", f"id{i}"] for i in range(count)]
+    backend.append_rows("Creatures", rows)
+    return rows
+
+
+def test_read_starts_with_the_header(backend):
+    for tab, header in TAB_HEADERS.items():
+        assert trimmed(backend.read_values(tab)) == [header]
+        assert backend.read_header(tab) == header
+
+
+def test_append_adds_rows_after_the_last_one(backend):
+    rows = seed(backend)
+    backend.append_rows("Creatures", [["Late", "Noble & Bright", "", "2024-02-01", 7]])
+    assert trimmed(backend.read_values("Creatures")) == (
+        [TAB_HEADERS["Creatures"]] + rows + [["Late", "Noble & Bright", "", "2024-02-01", "7"]]
+    )
+
+
+def test_update_cells_writes_a_batch_across_rows(backend):
+    seed(backend)
+    backend.update_cells("Creatures", [(2, 1, "Renamed"), (4, 2, "Mystic & Strange"), (3, 7, "wide")])
+    values = trimmed(backend.read_values("Creatures"))
+    assert values[1][0] == "Renamed"
+    assert values[3][1] == "Mystic & Strange"
+    assert values[2][6] == "wide" and values[2][5] == ""
+
+
+def test_update_cells_can_extend_the_header(backend):
+    backend.update_cells("Creatures", [(1, 6, "Campaign")])
+    assert backend.read_header("Creatures") == TAB_HEADERS["Creatures"] + ["Campaign"]
+
+
+def test_delete_moves_the_rows_below_up(backend):
+    rows = seed(backend)
+    backend.delete_row("Creatures", 3)
+    assert trimmed(backend.read_values("Creatures")) == [TAB_HEADERS["Creatures"], rows[0], rows[2]]
+
+
+def test_partial_reads_agree_with_the_whole_tab(backend):
+    seed(backend)
+    values = backend.read_values("Creatures")
+    assert trimmed([backend.read_column("Creatures", 5)]) == trimmed([[row[4] for row in values]])
+    first, ids = backend.read_columns("Creatures", [1, 5])
+    assert trimmed([first, ids]) == trimmed([[row[0] for row in values], [row[4] for row in values]])
+    assert trimmed(backend.read_rows("Creatures", 3)) == trimmed(values[2:])
+    assert backend.read_cells("Creatures", [(2, 5), (4, 1), (1, 2), (9, 1)]) == ["id0", "Beast 2", "Tone", ""]
+
+
+def test_change_marker_moves_on_every_write(backend):
+    writes = [
+        lambda: seed(backend, 1),
+        lambda: backend.update_cells("Creatures", [(2, 1, "Changed")]),
+        lambda: backend.delete_row("Creatures", 2),
+    ]
+    for write in writes:
+        before = backend.change_marker("Creatures")
+        write()
+        after = backend.change_marker("Creatures")
+        # None means "unknown" and is always allowed; a real marker must move.
+        assert before is None or after != before
+
+
+def test_local_store_mirrors_the_tab(backend):
+    seed(backend)
+    store = backend.local_store()
+    if store is None:
+        assert backend.remote or backend.name == "memory"
+        return
+    assert trimmed(store.values("Creatures")) == trimmed(backend.read_values("Creatures"))
+    rows, total, _ = store.page("Creatures", {}, None, 2)
+    assert total == 3 and len(rows) == 2
@@ -0,0 +1,60 @@
+"""The similarity index as records are added and removed one at a time, and saved."""
+import threading
+
+import pandas as pd
+
+from services import vector_service
+from services.vector_service import VectorIndex
+
+
+def frame(ids: list, lore: list) -> pd.DataFrame:
+    return pd.DataFrame({"ID": ids, "Lore": lore, "Visual_Desc": [""] * len(ids)})
+
+
+def test_inserts_grow_in_place_and_deletes_leave_no_trace(tmp_path):
+    index = VectorIndex(("Visual_Desc", "Lore"), str(tmp_path / "vectors.npz"))
+    index.rebuild(frame(["a", "b"], ["iron golem of the forge", "silver harp of the elves"]))
+
+    count = vector_service.MIN_CAPACITY + 10
+    for i in range(count):
+        index.appended(frame([f"ghost{i}"], [f"drowned ghost number {i}"]))
+    index.appended(frame(["pirate"], ["a drowned pirate ghost"]))
+    # Spare rows past the last record, rather than a matrix sized exactly.
+    assert len(index._raw) > len(index._ids) == count + 3
+
+    assert index.similar_to_text("iron golem", 1) == ["a"]
+    assert "pirate" in index.similar_to_text("drowned pirate", 3)
+
+    index.deleted("pirate")
+    index.deleted("a")
+    assert "pirate" not in index.similar_to_text("drowned pirate", 100)
+    assert index.similar_to_text("iron golem", 5) == []
+    assert len(index._ids) == count + 1
+
+    index.save()
+    reloaded = VectorIndex(("Visual_Desc", "Lore"), str(tmp_path / "vectors.npz"))
+    reloaded._load()
+    assert reloaded._ids == index._ids and len(reloaded._raw) == count + 1
+
+
+def test_a_rebuild_saves_in_the_background(tmp_path, monkeypatch):
+    path = tmp_path / "vectors.npz"
+    index = VectorIndex(("Visual_Desc", "Lore"), str(path))
+    release = threading.Event()
+    savez = vector_service.np.savez
+
+    def slow_savez(*args, **kwargs):
+        release.wait(5)
+        savez(*args, **kwargs)
+    monkeypatch.setattr(vector_service.np, "savez", slow_savez)
+
+    index.rebuild(frame(["a", "b"], ["iron golem of the forge", "silver harp of the elves"]))
+    # The write is still waiting, yet the rebuild has returned and queries answer.
+    assert index.similar_to_text("iron golem", 1) == ["a"]
+    assert not path.exists()
+
+    release.set()
+    index._saver.join(5)
+    reloaded = VectorIndex(("Visual_Desc", "Lore"), str(path))
+    reloaded._load()
+    assert reloaded._ids == ["a", "b"]
@@ -0,0 +1,88 @@
+import streamlit as st
+from collections import OrderedDict
+import functools
+import threading
+
+# -----------------------------------------------------------------------------
+# CARD CACHE — card HTML is built once per distinct record and reused on every
+# rerun after that. Entries are keyed (and hashed) on the card variant, the
+# record's fields and the builder's options, so an edited record simply misses
+# and gets rebuilt; the least recently used entries fall out first.
+# -----------------------------------------------------------------------------
+MAX_CARDS = 1024
+
+
+class CardCache:
+    """A bounded LRU of rendered card HTML, with hit/miss counters."""
+
+    def __init__(self, max_size: int = MAX_CARDS):
+        self.max_size = max_size
+        self._cards = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def render(self, variant: str, data, options: dict, build) -> str:
+        key = (
+            variant,
+            tuple((str(k), str(v)) for k, v in data.items()),
+            tuple(sorted(options.items())),
+        )
+        with self._lock:
+            html = self._cards.get(key)
+            if html is not None:
+                self._cards.move_to_end(key)
+                self._hits += 1
+                return html
+            self._misses += 1
+        html = build()
+        with self._lock:
+            self._cards[key] = html
+            while len(self._cards) > self.max_size:
+                self._cards.popitem(last=False)
+        return html
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._cards),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+@st.cache_resource
+def get_card_cache() -> CardCache:
+    """Returns the process-wide card cache. Cached so every session shares it."""
+    return CardCache()
+
+
+def cached_card(variant: str):
+    """Decorator for a card builder taking (data, **options): the HTML is
+    memoised on the data's fields and the options.
+    """
+    def wrap(build):
+        @functools.wraps(build)
+        def render(data, **options):
+            return get_card_cache().render(variant, data, options, lambda: build(data, **options))
+        return render
+    return wrap
+
+
+def grid_row(cards: list, per_row: int = 3) -> str:
+    """Several cards as one block laid out like an st.columns(per_row) row,
+    so a whole grid row goes out in a single st.markdown call.
+    """
+    cells = "".join(f"<div>{card}</div>" for card in cards)
+    return (
+        f'<div style="display:grid; grid-template-columns:repeat({per_row}, minmax(0, 1fr)); gap:1rem;">'
+        f'{cells}</div>'
+    )
+
+
+def render_stats():
+    """A quiet sidebar line with the card cache's hit rate."""
+    stats = get_card_cache().stats()
+    st.sidebar.caption(f"Card cache: {stats['hit_rate']:.0%} hits · {stats['size']} cards held")
@@ -0,0 +1,25 @@
+import streamlit as st
+
+CANDIDATE_CHOICES = [1, 2, 3, 4]
+
+def candidate_count(key: str) -> int:
+    """The sidebar dial for how many images one generation asks for."""
+    count = st.sidebar.select_slider(
+        "Visages per summoning", CANDIDATE_CHOICES, value=1, key=key,
+        help="Ask for several images in a single request and keep the one you like. Only the chosen one is saved.",
+    )
+    if count > 1:
+        st.sidebar.caption("The finest image model paints one visage at a time, so several are drawn by the fast one.")
+    return count
+
+def pick_one(key: str, candidates: list, label: str = "CHOOSE ᛦ"):
+    """Shows candidate images side by side, each with a button.
+    Returns the index of the one chosen on this run, or None.
+    """
+    chosen = None
+    for i, (col, image) in enumerate(zip(st.columns(len(candidates)), candidates)):
+        with col:
+            st.image(image, use_container_width=True)
+            if st.button(label, key=f"{key}_{i}", type="primary", use_container_width=True):
+                chosen = i
+    return chosen
@@ -0,0 +1,37 @@
+import streamlit as st
+
+def page_cursor(key: str, query: tuple):
+    """Returns the cursor an archive grid should read its page from.
+
+    The cursors of the pages visited so far are kept in st.session_state[key],
+    so stepping back needs no re-read of earlier pages. A different query
+    (filters or search changed) starts over at page one.
+    """
+    state = st.session_state.setdefault(key, {"query": query, "cursors": [None]})
+    if state["query"] != query:
+        state["query"] = query
+        state["cursors"] = [None]
+    return state["cursors"][-1]
+
+def render_pager(key: str, next_cursor, total: int, page_size: int, noun: str):
+    """Draws the PREVIOUS / page count / NEXT row under a grid."""
+    state = st.session_state[key]
+    page = len(state["cursors"])
+    if page == 1 and next_cursor is None:
+        return
+    pages = max(1, -(-total // page_size))
+
+    prev_col, count_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("◀ PREVIOUS", key=f"{key}_prev", use_container_width=True, disabled=page == 1):
+            state["cursors"].pop()
+            st.rerun()
+    with count_col:
+        st.markdown(
+            f"<div class='subtext' style='text-align:center;'>Page {page} of {pages} · {total} {noun}</div>",
+            unsafe_allow_html=True,
+        )
+    with next_col:
+        if st.button("NEXT ▶", key=f"{key}_next", use_container_width=True, disabled=next_cursor is None):
+            state["cursors"].append(next_cursor)
+            st.rerun()